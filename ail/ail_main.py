@@ -25,7 +25,6 @@ if PY_VERSION_CHECK:
         exit(1)
 
 
-import argparse
 import os.path
 import sys
 from importlib import import_module
@@ -33,8 +32,6 @@ from .core import shared
 from .core import aconfig
 from .core.abuiltins import init_builtins
 from .core.pyexec import ail_exec
-from .core.alex import Lex
-from .core.aparser import Parser, ASTConverter
 from .core.error import AILSyntaxError
 
 from . import _config
@@ -48,6 +45,19 @@ class _Option:
         self.source = False
         self.cmd = None
         self.native_compile = False
+        self.optimize = False
+        self.lazy_import = False
+        self.startup_profile = False
+
+        # ail compile [paths]
+        self.compile_paths = None
+        self.jobs = None
+        self.force = False
+        self.quiet = False
+
+        # ail bundle entry
+        self.bundle_entry = None
+        self.bundle_output = None
 
 
 # load AIL_PATH in environ
@@ -60,7 +70,90 @@ shared.GLOBAL_SHARED_DATA.find_path = [
 ]
 
 
+def _parse_compile_arg(args) -> _Option:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        'ail compile',
+        description='compile AIL source files to the bytecode cache'
+    )
+    parser.add_argument(
+        'paths', nargs='+', help='source files or directories')
+    parser.add_argument(
+        '-j', help='number of worker processes (default: cpu count)',
+        type=int, dest='jobs')
+    parser.add_argument(
+        '-f', help='compile even if the cache is up to date',
+        action='store_true', dest='force')
+    parser.add_argument(
+        '-q', help='only report errors', action='store_true', dest='quiet')
+    parser.add_argument(
+        '-n', help='use the native compile mode', action='store_true',
+        dest='native')
+    parser.add_argument(
+        '-O', help='fold constants and remove unreachable branches',
+        action='store_true', dest='optimize')
+
+    namespace = parser.parse_args(args)
+
+    opt = _Option()
+    opt.shell_mode = False
+    opt.compile_paths = namespace.paths
+    opt.jobs = namespace.jobs
+    opt.force = namespace.force
+    opt.quiet = namespace.quiet
+    opt.native_compile = namespace.native
+    opt.optimize = namespace.optimize
+
+    return opt
+
+
+def _parse_bundle_arg(args) -> _Option:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        'ail bundle',
+        description='compile an AIL application and the modules it '
+                    'imports to a bundle, run it by \'ail <bundle>\''
+    )
+    parser.add_argument('entry', help='the entry source file')
+    parser.add_argument(
+        '-o', help='output path (default: <entry>.ailz)', dest='output')
+    parser.add_argument(
+        '-n', help='use the native compile mode', action='store_true',
+        dest='native')
+    parser.add_argument(
+        '-O', help='fold constants and remove unreachable branches',
+        action='store_true', dest='optimize')
+
+    namespace = parser.parse_args(args)
+
+    opt = _Option()
+    opt.shell_mode = False
+    opt.bundle_entry = namespace.entry
+    opt.bundle_output = namespace.output
+    opt.native_compile = namespace.native
+    opt.optimize = namespace.optimize
+
+    return opt
+
+
 def parse_arg(args) -> _Option:
+    if args and args[0] == 'compile':
+        return _parse_compile_arg(args[1:])
+    if args and args[0] == 'bundle':
+        return _parse_bundle_arg(args[1:])
+
+    if args and not args[0].startswith('-'):
+        # 'ail <file> [args]', the common case does not need argparse
+        opt = _Option()
+        opt.filename = args[0]
+        opt.rest_args = args[1:]
+        opt.shell_mode = False
+        return opt
+
+    import argparse
+
     parser = argparse.ArgumentParser(
         'ail', description='AIL Programming Language'
     )
@@ -71,6 +164,19 @@ def parse_arg(args) -> _Option:
     parser.add_argument(
         '-n', help='dump to python source code', action='store_true',
         dest='native')
+    parser.add_argument(
+        '-O', help='fold constants and remove unreachable branches',
+        action='store_true', dest='optimize')
+    parser.add_argument(
+        '--lazy-import',
+        help='run a module imported by \'import\' when its attributes '
+             'are first used',
+        action='store_true', dest='lazy_import')
+    parser.add_argument(
+        '--startup-profile',
+        help='run with \'python -X importtime\' and report the modules '
+             'that slow down the startup',
+        action='store_true', dest='startup_profile')
     parser.add_argument('args', nargs=argparse.REMAINDER)
 
     namespace = parser.parse_args(args)
@@ -80,6 +186,9 @@ def parse_arg(args) -> _Option:
     opt.source = namespace.source
     opt.rest_args = namespace.args
     opt.native_compile = namespace.native
+    opt.optimize = namespace.optimize
+    opt.lazy_import = namespace.lazy_import
+    opt.startup_profile = namespace.startup_profile
     opt.shell_mode = namespace.file is None
 
     return opt
@@ -96,10 +205,76 @@ def launch_py_test(test_name):
         print('No test named \'%s\'' % test_name)
 
 
-def _launch_main(argv: list) -> int:
-    init_builtins()
+def _launch_compile(option: _Option) -> int:
+    from time import perf_counter
+    from .core.acompileall import (
+        find_source_files, compile_files, format_compile_report
+    )
+
+    start = perf_counter()
+    results = compile_files(
+        find_source_files(option.compile_paths),
+        int(option.native_compile) + 1, int(option.optimize),
+        option.force, option.jobs)
+
+    print(format_compile_report(results, not option.quiet))
+    print('done in %.2f s' % (perf_counter() - start))
+
+    return int(any(result.error is not None for result in results))
 
+
+def _launch_bundle(option: _Option) -> int:
+    from .core.abundle import build_bundle
+
+    try:
+        builder = build_bundle(
+            option.bundle_entry, option.bundle_output,
+            int(option.native_compile) + 1, int(option.optimize))
+    except (OSError, SyntaxError) as e:
+        print('AIL: cannot build bundle: %s' % e, file=sys.stderr)
+        return 1
+
+    for importer, name in builder.unresolved:
+        print('warning: %s: cannot find module \'%s\'' % (importer, name),
+              file=sys.stderr)
+    print('%d modules bundled' % len(builder.modules))
+
+    return 0
+
+
+def _make_argv(option: _Option) -> list:
+    """
+    :return: the arguments of 'ail' which give option, except
+             --startup-profile
+    """
+    argv = [flag for flag, on in (
+        ('-s', option.source),
+        ('-n', option.native_compile),
+        ('-O', option.optimize),
+        ('--lazy-import', option.lazy_import),
+    ) if on]
+
+    if option.filename is not None:
+        argv.append(option.filename)
+        argv.extend(option.rest_args)
+
+    return argv
+
+
+def _launch_main(argv: list) -> int:
     option = parse_arg(argv)
+
+    if option.startup_profile:
+        from .core.startup import run_startup_profile
+
+        return run_startup_profile(_make_argv(option))
+
+    if option.compile_paths is not None:
+        return _launch_compile(option)
+    if option.bundle_entry is not None:
+        return _launch_bundle(option)
+
+    init_builtins()
     # print(option.filename, option.source, option.rest_args)
 
     option.rest_args.insert(0, option.filename)
@@ -109,6 +284,9 @@ def _launch_main(argv: list) -> int:
     if option is None:
         return 1
 
+    shared.GLOBAL_SHARED_DATA.optimize = int(option.optimize)
+    shared.GLOBAL_SHARED_DATA.lazy_import = option.lazy_import
+
     if option.shell_mode:
         from .core import ashell
         ashell.Shell().run_shell(option.native_compile)
@@ -118,6 +296,10 @@ def _launch_main(argv: list) -> int:
     native_compile = option.native_compile
 
     file_path = option.filename
+
+    if file_path.endswith(aconfig.BUNDLE_SUFFIX) and not source_mode:
+        from .core.abundle import run_bundle
+        return run_bundle(file_path)
     file_dir = os.path.dirname(
                 os.path.normpath(
                     os.path.abspath(file_path)))
@@ -135,9 +317,17 @@ def _launch_main(argv: list) -> int:
             source = open(file_path, encoding='UTF-8').read()
 
         if not source_mode:
-            return ail_exec(source, file_path, dict(), compiler=int(native_compile)+1)
+            return ail_exec(
+                source, file_path, dict(), compiler=int(native_compile)+1,
+                use_cache=option.cmd is None)
+
+        from .core.aoptimizer import optimize_ast
+        from .core.aparser import ASTConverter
+        from .core.astcache import parse_cached
 
-        ast = Parser().parse(Lex().lex(source), source, file_path, source_mode)
+        ast = parse_cached(source, file_path, source_mode)
+        if option.optimize:
+            ast = optimize_ast(ast)
 
         if source_mode:
             try:
@@ -51,8 +51,10 @@ AIL_PY_GLOBAL.update({
     'py::raise': _func.raise_exception,
     'py::locals': locals,
     'py::globals': globals,
+    'py::range': range,
 
     'ail::match': _func.ail_match,
+    'ail::match_index': _func.ail_match_index,
     'ail::ObjectPattern': _object.ObjectPattern,
     'ail::namespace': _func.convert_to_namespace,
     'ail::using': _func.ail_using,
@@ -0,0 +1,369 @@
+# ahead-of-time bundle of an AIL application
+#
+# a bundle is a zip archive (stored, not compressed) that holds the
+# marshalled code objects of an entry file and every module it imports,
+# with a manifest:
+#
+#   MANIFEST.json       {"format", "ail_version", "py_magic", "compiler",
+#                        "optimize", "entry", "modules"}
+#   code/<key>.aic      marshalled code object of the module <key>
+#
+# modules[key] = {"type": "ail" | "py" | "builtin", "source": <path>,
+#                 "imports": {<name in import / load>: <key>}}
+#
+# the imports are resolved by AILImporter.get_path when the bundle is
+# built, so running a bundle does not search the find path or read any
+# source file.
+
+import json
+import marshal
+import os
+import os.path
+import sys
+import zipfile
+import zlib
+
+from importlib.util import MAGIC_NUMBER as _PY_MAGIC
+from types import CodeType, ModuleType
+from typing import Dict, List, Optional, Tuple
+
+from . import asts as ast
+from . import shared
+from .aconfig import BUNDLE_SUFFIX
+from .aloader import MAIN_LOADER, get_ail_namespace, _py_module_name
+from .astcache import parse_cached
+from .objects import AILImporter, _NONE
+from .pyexec import ail_compile, CP_PY_AST
+from .version import AIL_VERSION_NUMBER
+
+from .._config import BUILTINS_MODULE_PATH, CURRENT_WORK_PATH, LIB_PATH
+
+
+BUNDLE_FORMAT = 1
+
+MANIFEST_NAME = 'MANIFEST.json'
+CODE_DIR = 'code'
+
+MOD_AIL = 'ail'
+MOD_PY = 'py'
+MOD_BUILTIN = 'builtin'
+
+
+class BundleError(Exception):
+    pass
+
+
+def find_imports(tree: ast.BlockAST) -> List[str]:
+    """
+    :return: the names in the import and load statements of tree, in the
+             order of appearance
+    """
+    names = []
+    stack = [tree]
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, ast.ImportStmtAST):
+            names.append(node.path)
+        elif isinstance(node, ast.LoadStmtAST) and \
+                isinstance(node.path, str):
+            names.append(node.path)
+
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+
+    return list(dict.fromkeys(names))
+
+
+def _is_in(path: str, directory: str) -> bool:
+    path = os.path.normcase(os.path.abspath(path))
+    directory = os.path.normcase(os.path.abspath(directory))
+    return os.path.commonpath((path, directory)) == directory
+
+
+def _module_key(path: str, root: str) -> str:
+    if _is_in(path, root):
+        rel = os.path.relpath(path, root)
+    elif _is_in(path, LIB_PATH):
+        rel = os.path.join('ail-lib', os.path.relpath(path, LIB_PATH))
+    elif _is_in(path, BUILTINS_MODULE_PATH):
+        rel = os.path.join(
+            'ail-modules', os.path.relpath(path, BUILTINS_MODULE_PATH))
+    else:
+        rel = os.path.join(
+            'ext', '%08x' % zlib.crc32(
+                os.path.normcase(path).encode('UTF-8')),
+            os.path.basename(path))
+
+    return rel.replace(os.path.sep, '/')
+
+
+class BundleBuilder:
+    """
+    :param compiler: CP_PY_AST or CP_PY_CODE
+    :param optimize: the optimize level, like '-O'
+    """
+
+    def __init__(self, compiler: int = CP_PY_AST, optimize: int = 0):
+        self.compiler = compiler
+        self.optimize = optimize
+
+        self.entry: str = None
+        self.modules: Dict[str, dict] = {}
+        self.codes: Dict[str, bytes] = {}
+
+        # (importer key, name) of the names cannot be resolved
+        self.unresolved: List[Tuple[str, str]] = []
+
+    def _compile_module(self, path: str, mod_type: str) -> Optional[bytes]:
+        if mod_type == MOD_BUILTIN:
+            return None
+
+        with open(path, encoding='UTF-8') as f:
+            source = f.read()
+
+        if mod_type == MOD_PY:
+            code = compile(source, path, 'exec')
+        else:
+            code = ail_compile(
+                source, path, 'exec',
+                compiler=self.compiler, optimize=self.optimize)
+
+        return marshal.dumps(code)
+
+    def _resolve_imports(self, path: str) -> List[Tuple[str, str]]:
+        with open(path, encoding='UTF-8') as f:
+            source = f.read()
+
+        tree = parse_cached(source, path)
+
+        # like AILImporter.get_namespace, a module imports the others in
+        # its own directory.
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(path))
+        try:
+            return [(name, AILImporter.get_path(name, None))
+                    for name in find_imports(tree)]
+        finally:
+            os.chdir(cwd)
+
+    def _module_type(self, path: str) -> str:
+        if MAIN_LOADER.get_type(path) not in ('py', 'ailp'):
+            return MOD_AIL
+        if _py_module_name(path).startswith('ail.modules.'):
+            return MOD_BUILTIN
+        return MOD_PY
+
+    def build(self, entry: str):
+        """
+        compile entry and the modules reachable from it.
+        """
+        entry = os.path.abspath(entry)
+        root = os.path.dirname(entry)
+
+        # the find path of 'ail <entry>'
+        old_find_path = shared.GLOBAL_SHARED_DATA.find_path
+        shared.GLOBAL_SHARED_DATA.find_path = [root] + (
+            old_find_path or [CURRENT_WORK_PATH, BUILTINS_MODULE_PATH, LIB_PATH])
+
+        try:
+            self.entry = _module_key(entry, root)
+            queue = [(entry, self.entry)]
+            keys = {entry: self.entry}
+
+            while queue:
+                path, key = queue.pop(0)
+                mod_type = self._module_type(path)
+                imports = {}
+
+                if mod_type == MOD_AIL:
+                    for name, dep in self._resolve_imports(path):
+                        if dep is None:
+                            self.unresolved.append((key, name))
+                            continue
+
+                        dep = os.path.abspath(dep)
+                        if dep not in keys:
+                            keys[dep] = _module_key(dep, root)
+                            queue.append((dep, keys[dep]))
+                        imports[name] = keys[dep]
+
+                self.modules[key] = {
+                    'type': mod_type,
+                    'source': path,
+                    'imports': imports,
+                }
+
+                code = self._compile_module(path, mod_type)
+                if code is not None:
+                    self.codes[key] = code
+        finally:
+            shared.GLOBAL_SHARED_DATA.find_path = old_find_path
+
+    def write(self, path: str):
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'ail_version': AIL_VERSION_NUMBER,
+            'py_magic': _PY_MAGIC.hex(),
+            'compiler': self.compiler,
+            'optimize': self.optimize,
+            'entry': self.entry,
+            'modules': self.modules,
+        }
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=1))
+            for key, code in self.codes.items():
+                zf.writestr('%s/%s.aic' % (CODE_DIR, key), code)
+
+
+def build_bundle(
+        entry: str, output: str = None, compiler: int = CP_PY_AST,
+        optimize: int = 0) -> BundleBuilder:
+    """
+    :param output: the bundle path, default: <entry name>.ailz
+    """
+    if output is None:
+        output = os.path.splitext(entry)[0] + BUNDLE_SUFFIX
+
+    builder = BundleBuilder(compiler, optimize)
+    builder.build(entry)
+    builder.write(output)
+
+    return builder
+
+
+class BundleImporter(AILImporter):
+    """
+    import the modules from a bundle instead of the find path.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+
+        try:
+            manifest = json.loads(self._zip.read(MANIFEST_NAME))
+        except (KeyError, ValueError) as e:
+            raise BundleError('%s is not an AIL bundle: %s' % (path, e))
+
+        if manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError(
+                'unsupported bundle format: %s' % manifest.get('format'))
+        if manifest.get('py_magic') != _PY_MAGIC.hex():
+            raise BundleError(
+                'the bundle is built by another version of python')
+        if manifest.get('ail_version') != AIL_VERSION_NUMBER:
+            raise BundleError(
+                'the bundle is built by AIL version %s' %
+                manifest.get('ail_version'))
+
+        self.manifest = manifest
+        self.modules: Dict[str, dict] = manifest['modules']
+        self.entry: str = manifest['entry']
+
+        # the keys of the modules being executed, the last one imports
+        self._running: List[str] = []
+
+    def _key_of(self, path: str) -> str:
+        return path[len(self.path) + 1:]
+
+    def get_code(self, key: str) -> CodeType:
+        return marshal.loads(self._zip.read('%s/%s.aic' % (CODE_DIR, key)))
+
+    def get_path(self, name: str, default=_NONE) -> str:
+        current = self._running[-1] if self._running else self.entry
+        key = self.modules[current]['imports'].get(name)
+
+        if key is None:
+            if default is not _NONE:
+                return default
+            raise ModuleNotFoundError(
+                'cannot find module \'%s\' in bundle \'%s\'' %
+                (name, self.path))
+
+        return '%s/%s' % (self.path, key)
+
+    def get_source(self, path: str) -> str:
+        return None
+
+    def get_namespace(self, path: str, source: str) -> dict:
+        key = self._key_of(path)
+        module = self.modules[key]
+
+        if module['type'] == MOD_BUILTIN:
+            return MAIN_LOADER.get_py_namespace(os.path.join(
+                BUILTINS_MODULE_PATH, os.path.basename(module['source'])))
+
+        if module['type'] == MOD_PY:
+            name = _py_module_name(module['source'])
+            py_module = sys.modules.get(name)
+            if py_module is None:
+                py_module = ModuleType(name)
+                py_module.__file__ = path
+                sys.modules[name] = py_module
+                try:
+                    exec(self.get_code(key), py_module.__dict__)
+                except BaseException:
+                    sys.modules.pop(name, None)
+                    raise
+            return get_ail_namespace(py_module, path)
+
+        from .namespace import fill_namespace
+
+        module_globals = {}
+        fill_namespace(module_globals, path, False, filename=path)
+
+        self._running.append(key)
+        try:
+            exec(self.get_code(key), module_globals)
+        finally:
+            self._running.pop()
+
+        return module_globals
+
+    def run_entry(self, globals: dict):
+        from .namespace import fill_namespace
+
+        fill_namespace(globals, '__main__', True, filename=self.path)
+
+        self._running.append(self.entry)
+        try:
+            exec(self.get_code(self.entry), globals)
+        finally:
+            self._running.pop()
+
+    def close(self):
+        self._zip.close()
+
+
+def run_bundle(path: str) -> int:
+    """
+    :return: 0 -> ok | 1 -> exception occurred
+    """
+    from .exceptions import print_py_traceback
+    from .functions import set_importer
+
+    try:
+        importer = BundleImporter(path)
+    except (OSError, zipfile.BadZipFile, BundleError) as e:
+        print('AIL: can\'t open bundle \'%s\': %s' % (path, e),
+              file=sys.stderr)
+        return 1
+
+    old_importer = set_importer(importer)
+
+    try:
+        importer.run_entry({})
+        return 0
+    except Exception:
+        print_py_traceback()
+        return 1
+    except (KeyboardInterrupt, EOFError):
+        print_py_traceback()
+        return 0
+    finally:
+        set_importer(old_importer)
+        importer.close()
@@ -0,0 +1,153 @@
+# bytecode cache for AIL source files
+#
+# 编译后的 code object 会被 marshal 到源文件旁边的 __ailcache__ 目录，
+# 类似 CPython 的 .pyc。缓存文件格式 (little endian):
+#
+#   magic       4 bytes   AIL_VERSION_NUMBER
+#   py magic    4 bytes   importlib.util.MAGIC_NUMBER
+#   flags       4 bytes   compile flags | compiler << 8 | feature flags << 16
+#   mtime       8 bytes   source mtime (ns)
+#   size        8 bytes   source size
+#   hash        8 bytes   importlib.util.source_hash(source)
+#   code        ...       marshalled code object
+
+import marshal
+import os
+import os.path
+
+from importlib.util import MAGIC_NUMBER as _PY_MAGIC, source_hash as _source_hash
+from types import CodeType
+from typing import Optional
+
+from .aconfig import BYTECODE_CACHE, BYTECODE_CACHE_DIR
+from .feature import parse_feature_flag
+from .version import AIL_VERSION_NUMBER
+
+
+AIL_CACHE_MAGIC = AIL_VERSION_NUMBER.to_bytes(4, 'little')
+CACHE_SUFFIX = '.aic'
+
+_HEADER_SIZE = 36
+
+
+def cache_path_from_source(
+        path: str, compiler: int, optimize: int = 0) -> str:
+    """
+    :return: <dir>/__ailcache__/<name>.ail-<version>.<compiler>[.opt-<n>].aic
+    """
+    head, tail = os.path.split(path)
+    name = '%s.ail-%s.%s%s%s' % (
+        os.path.splitext(tail)[0], AIL_VERSION_NUMBER, compiler,
+        '.opt-%s' % optimize if optimize > 0 else '', CACHE_SUFFIX)
+    return os.path.join(head, BYTECODE_CACHE_DIR, name)
+
+
+def _source_stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _make_flags(source: str, flags: int, compiler: int) -> int:
+    return (flags & 0xff) | \
+           ((compiler & 0xff) << 8) | \
+           ((parse_feature_flag(source) & 0xffff) << 16)
+
+
+def _make_header(
+        source: str, stat, flags: int, compiler: int) -> bytes:
+    mtime, size = stat
+    return b''.join((
+        AIL_CACHE_MAGIC,
+        _PY_MAGIC,
+        _make_flags(source, flags, compiler).to_bytes(4, 'little'),
+        (mtime & 0xffffffffffffffff).to_bytes(8, 'little'),
+        size.to_bytes(8, 'little'),
+        _source_hash(source.encode('UTF-8')),
+    ))
+
+
+def _fix_co_filename(code: CodeType, filename: str) -> CodeType:
+    # like importlib's _fix_co_filename: the code keeps the file name of
+    # the compile which wrote the cache ('m.ail' if it was run in the
+    # directory of m.ail), use the name of this load instead.
+    if code.co_filename == filename:
+        return code
+
+    consts = tuple(
+        _fix_co_filename(c, filename) if isinstance(c, CodeType) else c
+        for c in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+
+def load_cached_code(
+        path: str, source: str, flags: int = 0,
+        compiler: int = 1, optimize: int = 0) -> Optional[CodeType]:
+    """
+    :return: cached code object if the cache is valid else None
+    """
+    if not BYTECODE_CACHE:
+        return None
+
+    stat = _source_stat(path)
+    if stat is None:
+        return None
+
+    try:
+        with open(cache_path_from_source(path, compiler, optimize), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if data[:_HEADER_SIZE] != _make_header(source, stat, flags, compiler):
+        return None
+
+    try:
+        code = marshal.loads(data[_HEADER_SIZE:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(code, CodeType):
+        return None
+
+    return _fix_co_filename(code, path)
+
+
+def write_cached_code(
+        path: str, source: str, code: CodeType, flags: int = 0,
+        compiler: int = 1, optimize: int = 0) -> bool:
+    """
+    :return: True if the cache file was written
+    """
+    if not BYTECODE_CACHE:
+        return False
+
+    stat = _source_stat(path)
+    if stat is None:
+        return False
+
+    cache_path = cache_path_from_source(path, compiler, optimize)
+    tmp_path = '%s.%s.tmp' % (cache_path, os.getpid())
+
+    try:
+        data = marshal.dumps(code)
+    except ValueError:
+        return False
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(_make_header(source, stat, flags, compiler))
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # cache directory not writable, just skip it
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+    return True
@@ -6,6 +6,8 @@ from . import asts as ast
 from .pyopcode import *
 
 from .tokentype import AIL_IDENTIFIER, AIL_NUMBER, AIL_STRING
+from .aoptimizer import RangeLoop, analyse_range_loop, match_table
+from .apeephole import PeepholeOptimizer, PEEPHOLE_ALL, format_peephole_report
 
 from .symbol import (
     SymbolTable, FunctionSymbolTable, ClassSymbolTable, SymbolAnalyzer, Symbol,
@@ -84,6 +86,31 @@ def _new_cell_fast(value: str, _type: int, ln: int, scope: int):
     return ast.CellAST(value, _type, ln, Symbol(value, scope))
 
 
+def _const_key(const: object) -> object:
+    """
+    1, 1.0 and True are equal but they are different constants, so the
+    constant tables are keyed by (type, value) instead of the value.
+
+    :return: the key of const in a constant table
+    """
+    type_ = type(const)
+
+    if type_ in (float, complex):
+        # repr keeps the sign of 0.0 and -0.0
+        return type_, repr(const)
+    if type_ is tuple:
+        return type_, tuple(_const_key(c) for c in const)
+    if type_ is frozenset:
+        return type_, frozenset(_const_key(c) for c in const)
+
+    try:
+        hash(const)
+    except TypeError:
+        return type_, id(const)
+
+    return type_, const
+
+
 class CompilerError(Exception):
     pass
 
@@ -107,6 +134,9 @@ class CodeObjectBuffer:
         self.freevars = []
         self.cellvars = []
 
+        self.__constant_index = {}
+        self.__varname_index = {}
+
         self.__real_time_stack_size = 0
         self.__now_line = firstlineno
         self.__code_increase = 0
@@ -119,16 +149,19 @@ class CodeObjectBuffer:
         self.__code_increase += increase
 
     def add_varname(self, name: str) -> int:
-        if name in self.varnames:
-            return self.varnames.index(name)
-        self.varnames.append(name)
-        return len(self.varnames) - 1
+        index = self.__varname_index.get(name)
+        if index is None:
+            index = self.__varname_index[name] = len(self.varnames)
+            self.varnames.append(name)
+        return index
 
     def add_const(self, const: object) -> int:
-        if const in self.constants:
-            return self.constants.index(const)
-        self.constants.append(const)
-        return len(self.constants) - 1
+        key = _const_key(const)
+        index = self.__constant_index.get(key)
+        if index is None:
+            index = self.__constant_index[key] = len(self.constants)
+            self.constants.append(const)
+        return index
 
     def __append_bytecode(self, instr, arg, stack_effect=None):
         effect = OPCODE_STACK_EFFECT.get(instr, 0)
@@ -151,10 +184,15 @@ class CodeObjectBuffer:
         """
         # check extend arg
         size = 0
-        if arg > 255:
-            self.__append_bytecode(EXTENDED_ARG, arg >> 8)
+        shift = 0
+        while arg >> (shift + 8):
+            shift += 8
+
+        while shift:
+            self.__append_bytecode(EXTENDED_ARG, (arg >> shift) & 0xff)
             size += 2
-            arg &= 0xff
+            shift -= 8
+        arg &= 0xff
 
         self.code.append(instr)
         self.code.append(arg)
@@ -232,6 +270,13 @@ class CompileUnit:
         self.varnames: List[str] = []
         self.consts: List[object] = []
         self.names: List[str] = []
+
+        # the indexes of the items in varnames, consts (by _const_key)
+        # and names
+        self.varname_index: Dict[str, int] = {}
+        self.const_index: Dict[object, int] = {}
+        self.name_index: Dict[str, int] = {}
+
         self.freevars: Tuple[str] = ()
         self.cellvars: Tuple[str] = ()
         self.stack_size = 0
@@ -264,10 +309,17 @@ class Compiler:
             self._compiler.pop_frame()
             return False
 
-    def __init__(self):
+    def __init__(self, peephole: int = 0):
+        """
+        :param peephole: the PEEPHOLE_* flags of the enabled peephole passes
+        """
         self._unit: CompileUnit = None
         self._mode = ''
 
+        self._peephole = peephole
+        # (code name, instructions before, instructions after)
+        self.peephole_stats: List[Tuple[str, int, int]] = []
+
     @property
     def unit(self) -> CompileUnit:
         return self._unit
@@ -308,15 +360,6 @@ class Compiler:
 
         return do_mangle(cls, name)
 
-    def _check_oparg(self, arg: int, ln: int) -> int:
-        final = arg & 0xff
-        if arg >= 1 << 16:
-            self._add_instruction(EXTENDED_ARG, arg >> 16, ln, False)
-            self._add_instruction(EXTENDED_ARG, (arg >> 8) & 0xff, ln, False)
-        elif arg >= 1 << 8:
-            self._add_instruction(EXTENDED_ARG, arg >> 8, ln, False)
-        return final
-
     def _get_stack_effect(self, op, stack_effect=None) -> int:
         if op in OPCODE_STACK_EFFECT:
             effect = OPCODE_STACK_EFFECT[op]
@@ -343,15 +386,13 @@ class Compiler:
         )
 
     def _add_instruction(
-            self, op: int, arg: int, ln: int,
-            check=True, stack_effect=None) -> int:
+            self, op: int, arg: int, ln: int, stack_effect=None) -> int:
         """
+        the EXTENDED_ARG prefixes of arg are added by Assembler
+
         :returns: returns the offset from head of this instruction
         """
 
-        if check:
-            arg = self._check_oparg(arg, ln)
-
         instr = Instruction()
         instr.stack_effect = self._get_stack_effect(op, stack_effect)
         instr.line = ln
@@ -374,22 +415,29 @@ class Compiler:
         self._unit.block.add_instruction(instr)
 
     def _add_const(self, const: object) -> int:
-        if const in self._unit.consts:
-            return self._unit.consts.index(const)
-        self._unit.consts.append(const)
-        return len(self._unit.consts) - 1
+        unit = self._unit
+        key = _const_key(const)
+        index = unit.const_index.get(key)
+        if index is None:
+            index = unit.const_index[key] = len(unit.consts)
+            unit.consts.append(const)
+        return index
 
     def _add_varname(self, name: str) -> int:
-        if name in self._unit.varnames:
-            return self._unit.varnames.index(name)
-        self._unit.varnames.append(name)
-        return len(self._unit.varnames) - 1
+        unit = self._unit
+        index = unit.varname_index.get(name)
+        if index is None:
+            index = unit.varname_index[name] = len(unit.varnames)
+            unit.varnames.append(name)
+        return index
 
     def _add_name(self, name: str) -> int:
-        if name in self._unit.names:
-            return self._unit.names.index(name)
-        self._unit.names.append(name)
-        return len(self._unit.names) - 1
+        unit = self._unit
+        index = unit.name_index.get(name)
+        if index is None:
+            index = unit.name_index[name] = len(unit.names)
+            unit.names.append(name)
+        return index
 
     def _unwind_frame_block(self, block: FrameBlock, preserve_tos=False):
         if block.type == FB_FINALLY_END:
@@ -417,9 +465,15 @@ class Compiler:
         elif block.type == FB_WITH:
             pass
 
+        elif block.type == FB_FOREACH_LOOP:
+            # pop the iterator
+            if preserve_tos:
+                self._add_instruction(ROT_TWO, 0, -1)
+            self._add_instruction(POP_TOP, 0, -1)
+
 
     def _compile_build_tuple(self, elements: List[ast.Expression]) -> bool:
-        all_constant = True
+        all_constant = False
 
         for elt in elements:
             if not isinstance(elt, ast.CellAST) or elt.type == AIL_IDENTIFIER:
@@ -622,6 +676,9 @@ class Compiler:
             self._add_instruction(COMPARE_OP, op, expr.ln)
         else:
             # a > b > c  -> a > b and b > c
+            # like CPython, a false result jumps to the cleanup block,
+            # which pops the operand left under it by DUP_TOP & ROT_THREE.
+            cleanup = BasicBlock()
             end = BasicBlock()
             count = 0
 
@@ -639,9 +696,15 @@ class Compiler:
                 self._add_instruction(COMPARE_OP, CMP_OP_MAP[op], exp.ln)
 
                 if count < n:
-                    self._add_jump_op(JUMP_IF_FALSE_OR_POP, end, -1)
+                    self._add_jump_op(JUMP_IF_FALSE_OR_POP, cleanup, -1)
                 self._enter_next_block(next_)
 
+            self._add_jump_op(JUMP_FORWARD, end, -1)
+
+            self._enter_next_block(cleanup)
+            self._add_instruction(ROT_TWO, 0, -1)
+            self._add_instruction(POP_TOP, 0, -1)
+
             self._enter_next_block(end)
 
     def _compile_call_arg(self, arg_list: ast.ArgListAST, call_method: bool):
@@ -824,7 +887,7 @@ class Compiler:
             if seen_star:
                 arg = before_star_count + ((len(left) - before_star_count - 1) << 8)
                 self._add_instruction(
-                    UNPACK_EX, arg, -1, check=True,
+                    UNPACK_EX, arg, -1,
                     stack_effect=len(left) - 1
                 )
 
@@ -873,6 +936,11 @@ class Compiler:
             self._add_instruction(
                 STORE_ATTR, self._add_name(attr), target.ln)
 
+        elif isinstance(target, ast.SubscriptExprAST):
+            self._compile(target.left)
+            self._compile_subscript_index(target.expr)
+            self._add_instruction(STORE_SUBSCR, 0, target.ln)
+
     def _compile_do_loop(self, stmt: ast.DoLoopStmtAST):
         body = BasicBlock()
         test = BasicBlock()
@@ -906,7 +974,42 @@ class Compiler:
 
         self._enter_next_block(next_)
 
+    def _compile_range_for_stmt(self, stmt: ast.ForStmtAST, loop: RangeLoop):
+        # for i in range(start, stop, step) {...} else { i = final }
+        target = stmt.init_list.expr_list[0].left
+        ln = stmt.ln
+
+        start = BasicBlock()
+        else_ = BasicBlock()
+        next_ = BasicBlock()
+
+        frame = FrameBlock(FB_FOREACH_LOOP, start, next_)
+
+        with self._frame(frame):
+            self._compile_call_name(
+                'py::range',
+                [_new_cell_fast(str(v), AIL_NUMBER, ln, 0)
+                 for v in (loop.start, loop.stop, loop.step)],
+                ln)
+            self._add_instruction(GET_ITER, 0, ln)
+            self._enter_next_block(start)
+            self._add_jump_op(FOR_ITER, else_, ln)
+            self._compile_store(target)
+            self._compile_block(stmt.block)
+            self._add_jump_op(JUMP_ABSOLUTE, start, ln)
+
+        self._enter_next_block(else_)
+        self._compile_const(_new_cell_fast(str(loop.final), AIL_NUMBER, ln, 0))
+        self._compile_store(target)
+
+        self._enter_next_block(next_)
+
     def _compile_for_stmt(self, stmt: ast.ForStmtAST):
+        loop = analyse_range_loop(stmt)
+        if loop is not None:
+            self._compile_range_for_stmt(stmt, loop)
+            return
+
         for expr in stmt.init_list.expr_list:
             self._compile(expr, True)
         
@@ -917,8 +1020,9 @@ class Compiler:
         self.push_new_frame(FB_FOR_LOOP, update, next_, None)
         
         self._enter_next_block(body)
-        self._compile(stmt.test.test)
-        self._add_jump_op(POP_JUMP_IF_FALSE, next_, -1)
+        if stmt.test is not None:
+            self._compile(stmt.test)
+            self._add_jump_op(POP_JUMP_IF_FALSE, next_, -1)
 
         self._compile(stmt.block)
         
@@ -955,11 +1059,9 @@ class Compiler:
         while index >= 0:
             self._unwind_frame_block(frame)
 
-            if frame.type in (FB_WHILE_LOOP, FB_FOREACH_LOOP):
+            if frame.type in (FB_WHILE_LOOP, FB_FOREACH_LOOP, FB_FOR_LOOP):
                 self._add_jump_op(JUMP_ABSOLUTE, frame.next, stmt.ln)
                 return
-            elif frame.type == FB_FOR_LOOP:
-                self._add_jump_op(JUMP_ABSOLUTE, frame.next, stmt.ln)
 
             index -= 1
             frame = self._unit.fb_stack[index]
@@ -986,7 +1088,64 @@ class Compiler:
 
         self._add_instruction(RETURN_VALUE, 0, stmt.ln)
 
+    def _compile_unhandled_match(self):
+        self._compile_call_name(
+            'py::UnhandledMatchError',
+            [ast.CellAST('unhandled match value', AIL_STRING, -1)],
+            -1, SYM_GLOBAL,
+        )
+        self._add_instruction(RAISE_VARARGS, 1, -1, stack_effect=-1)
+
+    def _compile_match_dispatch(self, expr: ast.MatchExpr, table):
+        # index = ail::match_index(table, patterns, target, default)
+        # then jump to the case by binary search on index
+        table, patterns, default = table
+        ln = expr.ln
+
+        self._compile_name(
+            _new_cell_fast('ail::match_index', AIL_IDENTIFIER, ln, SYM_GLOBAL))
+        self._add_instruction(LOAD_CONST, self._add_const(table), ln)
+        self._add_instruction(LOAD_CONST, self._add_const(patterns), ln)
+        self._compile(expr.target)
+        self._add_instruction(LOAD_CONST, self._add_const(default), ln)
+        self._add_instruction(CALL_FUNCTION, 4, ln, stack_effect=-4)
+
+        has_default = default < len(expr.cases)
+        end = BasicBlock()
+
+        def _dispatch(lo: int, hi: int):
+            if hi - lo == 1:
+                self._add_instruction(POP_TOP, 0, -1)  # pop index
+                if lo == default and not has_default:
+                    self._compile_unhandled_match()
+                else:
+                    self._compile(expr.cases[lo].expr)
+                    self._add_jump_op(JUMP_FORWARD, end, -1)
+                return
+
+            mid = (lo + hi) // 2
+            right = BasicBlock()
+
+            self._add_instruction(DUP_TOP, 0, -1)
+            self._add_instruction(LOAD_CONST, self._add_const(mid), -1)
+            self._add_instruction(COMPARE_OP, CMP_OP_MAP['<'], -1)
+            self._add_jump_op(POP_JUMP_IF_FALSE, right, -1)
+
+            self._enter_next_block(BasicBlock())
+            _dispatch(lo, mid)
+            self._enter_next_block(right)
+            _dispatch(mid, hi)
+
+        _dispatch(0, default + 1)
+
+        self._enter_next_block(end)
+
     def _compile_match_expr(self, expr: ast.MatchExpr):
+        table = match_table(expr.cases)
+        if table is not None:
+            self._compile_match_dispatch(expr, table)
+            return
+
         self._compile_name(
             ast.CellAST(
                 'ail::match', AIL_IDENTIFIER, expr.ln, Symbol('ail::match', SYM_GLOBAL)))
@@ -998,10 +1157,18 @@ class Compiler:
         for case in expr.cases:
             self._enter_next_block(case_bb)
             next_case_bb = BasicBlock()
-            if len(case.patterns) > 0:
+            if case.when_test is not None:
+                self._compile(case.when_test)
+                self._add_jump_op(POP_JUMP_IF_FALSE, next_case_bb, -1)
+            elif len(case.patterns) > 0:
+                only_const = all(
+                    isinstance(p, ast.CellAST) and p.type != AIL_IDENTIFIER
+                    for p in case.patterns)
                 self._add_instruction(DUP_TOP_TWO, 0, case.ln)
                 self._compile_build_tuple(case.patterns)
-                self._add_instruction(CALL_FUNCTION, 2, -1, stack_effect=-2)
+                self._add_instruction(
+                    LOAD_CONST, self._add_const(only_const), -1)
+                self._add_instruction(CALL_FUNCTION, 3, -1, stack_effect=-3)
                 self._add_jump_op(POP_JUMP_IF_FALSE, next_case_bb, -1)
             self._compile(case.expr)
             self._add_instruction(ROT_THREE, 0, -1)
@@ -1018,12 +1185,7 @@ class Compiler:
         self._add_instruction(POP_TOP, 0, -1)
         self._add_instruction(POP_TOP, 0, -1)
 
-        self._compile_call_name(
-            'py::UnhandledMatchError',
-            [ast.CellAST('unhandled match value', AIL_STRING, -1)],
-            -1, SYM_GLOBAL,
-        )
-        self._add_instruction(RAISE_VARARGS, 1, -1, stack_effect=-1)
+        self._compile_unhandled_match()
 
         self._enter_next_block(next_)
 
@@ -1224,6 +1386,8 @@ class Compiler:
         )
         self._add_instruction(RETURN_VALUE, 0, -1)
 
+        self.optimize_unit()
+
         assembler = Assembler()
         code = assembler.assemble(self._unit.top_block, self, co_flags)
 
@@ -1296,15 +1460,12 @@ class Compiler:
 
         index = len(self._unit.fb_stack) - 1
         while index >= 0:
-            self._unwind_frame_block(frame)
-
-            if frame.type in (FB_WHILE_LOOP, FB_FOREACH_LOOP):
+            # the iterator of foreach loop is still needed
+            if frame.type in (FB_WHILE_LOOP, FB_FOREACH_LOOP, FB_FOR_LOOP):
                 self._add_jump_op(JUMP_ABSOLUTE, frame.start, stmt.ln)
                 return
 
-            elif frame.type == FB_FOR_LOOP:
-                self._add_jump_op(JUMP_ABSOLUTE, frame.start, stmt.ln)
-                return
+            self._unwind_frame_block(frame)
 
             index -= 1
             frame = self._unit.fb_stack[index]
@@ -1535,9 +1696,10 @@ class Compiler:
 
     def _compile_subscript_expr(self, expr: ast.SubscriptExprAST):
         self._compile(expr.left)
+        self._compile_subscript_index(expr.expr)
+        self._add_instruction(BINARY_SUBSCR, 0, expr.ln)
 
-        exp = expr.expr
-
+    def _compile_subscript_index(self, exp: ast.Expression):
         if isinstance(exp, ast.SliceExpr):
             exp_count = 2
 
@@ -1563,8 +1725,6 @@ class Compiler:
         else:
             self._compile(exp)
 
-        self._add_instruction(BINARY_SUBSCR, 0, expr.ln)
-
     def _compile_py_import_stmt(self, stmt: ast.PyImportStmt):
         for item in stmt.names:
             alias = item.alias if item.alias else item.name
@@ -1860,6 +2020,20 @@ class Compiler:
                 else:
                     self._add_instruction(POP_TOP, 0, -1)
 
+    def optimize_unit(self):
+        """
+        run the enabled peephole passes on the CFG of current compile unit,
+        must be called before the unit is assembled.
+        """
+        if not self._peephole:
+            return
+
+        unit = self._unit
+        before, after = PeepholeOptimizer(self._peephole).optimize(
+            unit.top_block, unit.consts, self._add_const)
+
+        self.peephole_stats.append((unit.name, before, after))
+
     def _enter_next_block(self, block: BasicBlock):
         self._unit.block.next_block = block
         self._unit.block = block
@@ -1918,6 +2092,20 @@ class Compiler:
         )
         self._add_instruction(RETURN_VALUE, 0, -1)
 
+        self.optimize_unit()
+
+
+def _instr_size(instr: Instruction) -> int:
+    """
+    :return: the code units of instr, including its EXTENDED_ARG prefixes
+    """
+    arg = instr.arg
+    size = 1
+    while arg >= 1 << 8:
+        arg >>= 8
+        size += 1
+    return size
+
 
 class AssembleTask:
     def __init__(self):
@@ -1930,56 +2118,52 @@ class AssembleTask:
 class Assembler:
     def __init__(self):
         self._task: AssembleTask = None
-        self._wish_table: Dict[BasicBlock, List[Instruction]] = {}
-
-    def __set_wish(self, instr: Instruction, offset: int):
-        assert instr.target is not None
-
-        wish = self._wish_table
-        block = instr.target
-
-        if block not in wish:
-            followers = []
-            wish[block] = followers
-        else:
-            followers = wish[block]
-
-        followers.append((instr, offset))
 
     def _set_jump_instr_argument(
-            self, instr: Instruction, offset: int, now_offset: int):
+            self, instr: Instruction, offset: int, next_offset: int):
+        if offset < 0:
+            raise CompilerError('jump target is not in the CFG')
+
         if instr.is_jabs:
             instr.arg = offset
         if instr.is_jrel:
-            instr.arg = offset - now_offset - 2  # skip self
+            instr.arg = offset - next_offset
+            if instr.arg < 0:
+                raise CompilerError(
+                    'backward relative jump: %s' % instr)
 
     def _assemble_jump_offset(self):
-        not_extended_arg_recompile = True
-
+        # the size of a jump depends on its argument, and its argument
+        # depends on the size of the instructions before the target.
+        # a jump never shrinks when the others grow, so repeat until
+        # no jump needs more EXTENDED_ARG.
         while True:
             block = self._task.block
             total_offset = 0
             while block is not None:
-                instructions = block.instructions
                 block.offset = total_offset
+                for instr in block.instructions:
+                    total_offset += _instr_size(instr) * 2
+                block = block.next_block
 
-                if block in self._wish_table:
-                    for follower, offset in self._wish_table[block]:
-                        self._set_jump_instr_argument(
-                            follower, block.offset, offset)
+            resized = False
+
+            block = self._task.block
+            while block is not None:
+                offset = block.offset
+                for instr in block.instructions:
+                    size = _instr_size(instr)
+                    offset += size * 2
 
-                for instr in instructions:
                     if instr.opcode in OPCODE_JUMP:
-                        if instr.target.offset == -1:
-                            self.__set_wish(instr, total_offset)
-                        else:
-                            self._set_jump_instr_argument(
-                                instr, instr.target.offset, total_offset)
-                    total_offset += 2
+                        self._set_jump_instr_argument(
+                            instr, instr.target.offset, offset)
+                        if _instr_size(instr) != size:
+                            resized = True
 
                 block = block.next_block
 
-            if not_extended_arg_recompile:
+            if not resized:
                 break
 
     def _make_bytecode_sequence(self) -> bytes:
@@ -1987,24 +2171,87 @@ class Assembler:
 
         sequence = bytearray()
 
-        stack_size = 0
-
         while block is not None:
             for instr in block.instructions:
-                effect = instr.stack_effect
-                tmp_size = effect + stack_size
-                if tmp_size > stack_size:
-                    stack_size = tmp_size
+                arg = instr.arg
+                shift = (_instr_size(instr) - 1) * 8
+                while shift:
+                    sequence.append(EXTENDED_ARG)
+                    sequence.append((arg >> shift) & 0xff)
+                    shift -= 8
 
                 sequence.append(instr.opcode)
-                sequence.append(instr.arg)
+                sequence.append(arg & 0xff)
 
             block = block.next_block
 
-        self._task.compiler.unit.stack_size = stack_size
-
         return bytes(sequence)
 
+    def _compute_stack_depth(self) -> int:
+        # walk the CFG with the stack depth at the entry of each block,
+        # like stackdepth() in CPython's compile.c
+        top_block = self._task.block
+        entry_depth: Dict[BasicBlock, int] = {top_block: 0}
+        stack = [top_block]
+        max_depth = 0
+
+        def _push(block: BasicBlock, depth: int):
+            # a block reached at different depths is walked again with the
+            # larger one, so the result is never too small.
+            if entry_depth.get(block, -1) < depth:
+                entry_depth[block] = depth
+                stack.append(block)
+
+        while stack:
+            block = stack.pop()
+            depth = entry_depth[block]
+            next_block = block.next_block
+
+            for instr in block.instructions:
+                opcode, arg = instr.opcode, instr.arg
+
+                if instr.target is not None:
+                    target_depth = depth + stack_effect(opcode, arg, True)
+                    max_depth = max(max_depth, target_depth)
+
+                    # the finally body is walked from its SETUP_FINALLY
+                    # with 6 more items, CALL_FINALLY (break, continue and
+                    # return) pushes only 1 of them, like CPython 3.8.
+                    if opcode != CALL_FINALLY:
+                        _push(instr.target, target_depth)
+
+                depth += stack_effect(opcode, arg, False)
+                max_depth = max(max_depth, depth)
+
+                if opcode in OPCODE_TERMINATOR:
+                    next_block = None
+                    break
+
+            if next_block is not None:
+                _push(next_block, depth)
+
+        return max_depth
+
+    @staticmethod
+    def _add_lnotab_entry(lnotab: bytearray, ofs_inc: int, line_inc: int):
+        # an entry is an unsigned byte offset increment and a signed byte
+        # line increment, the larger ones are split like CPython does.
+        while ofs_inc > 255:
+            lnotab.extend((255, 0))
+            ofs_inc -= 255
+
+        while line_inc > 127:
+            lnotab.extend((ofs_inc, 127))
+            ofs_inc = 0
+            line_inc -= 127
+
+        while line_inc < -128:
+            lnotab.extend((ofs_inc, 0x80))
+            ofs_inc = 0
+            line_inc += 128
+
+        lnotab.extend((ofs_inc, line_inc & 0xff))
+
     def _make_lnotab(self, firstlineno=1) -> bytes:
         line = firstlineno
         ofs_inc = 0
@@ -2015,14 +2262,10 @@ class Assembler:
         while block is not None:
             for instr in block.instructions:
                 if instr.line != line and instr.line > 0:
-                    inc = instr.line - line
-                    if inc < 0:
-                        inc = 0x100 + inc
-                    lnotab.append(ofs_inc)
-                    lnotab.append(inc)
+                    self._add_lnotab_entry(lnotab, ofs_inc, instr.line - line)
                     ofs_inc = 0
                     line = instr.line
-                ofs_inc += 2
+                ofs_inc += _instr_size(instr) * 2
             block = block.next_block
 
         return bytes(lnotab)
@@ -2060,21 +2303,41 @@ class Assembler:
             tuple(unit.cellvars),
         )
 
-    def _assemble_block(self, extra_flags: int = 0) -> CodeType:
+    def _assemble_code_string(self) -> Tuple[bytes, bytes]:
         self._assemble_jump_offset()
         code_str = self._make_bytecode_sequence()
+        self._task.compiler.unit.stack_size = self._compute_stack_depth()
         lnotab = self._make_lnotab(self._task.compiler.unit.firstlineno)
 
+        return code_str, lnotab
+
+    def _assemble_block(self, extra_flags: int = 0) -> CodeType:
+        code_str, lnotab = self._assemble_code_string()
+
         return self._make_code(code_str, lnotab, extra_flags)
 
-    def assemble(
-            self, block: BasicBlock, compiler: Compiler, extra_flags=0) -> CodeType:
+    def _new_task(self, block: BasicBlock, compiler: Compiler):
         self._task = AssembleTask()
-        self._wish_table.clear()
 
         self._task.block = block
         self._task.compiler = compiler
 
+    def assemble_code_string(
+            self, block: BasicBlock, compiler: Compiler) -> Tuple[bytes, bytes]:
+        """
+        assemble the CFG without making the code object, whose constructor
+        depends on the version of Python.
+
+        :return: (bytecode, lnotab)
+        """
+        self._new_task(block, compiler)
+
+        return self._assemble_code_string()
+
+    def assemble(
+            self, block: BasicBlock, compiler: Compiler, extra_flags=0) -> CodeType:
+        self._new_task(block, compiler)
+
         co = self._assemble_block(extra_flags)
         return co
 
@@ -2094,13 +2357,16 @@ def test():
     node = Parser().parse(ts, source, '<test>')
 
     if mode not in ('cp', 'rp'):
-        compiler = Compiler()
+        compiler = Compiler(PEEPHOLE_ALL if mode == 'p' else 0)
         compiler.compile(node, source, '<test>', mode='exec')
 
-    if mode == 'd':
+    if mode in ('d', 'p'):
         disassembler = CFGDisassembler()
         disassembler.disassemble(compiler.unit.top_block, compiler.unit)
 
+        if mode == 'p':
+            print(format_peephole_report(compiler.peephole_stats))
+
     elif mode in ('c', 'cp'):
         from ..debug.dis import dis
 
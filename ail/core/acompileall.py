@@ -0,0 +1,137 @@
+# compile a tree of AIL source files to __ailcache__
+#
+# like the compileall module of CPython. the files are compiled by
+# pyexec.ail_compile in a process pool, and the code objects are written
+# to the bytecode cache, so the later runs can load them directly.
+
+import os
+import os.path
+
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Iterable, List, Optional
+
+from .aconfig import BYTECODE_CACHE_DIR
+from .acache import load_cached_code, write_cached_code
+from .error import is_ail_syntax_error
+from .pyexec import ail_compile
+
+
+AIL_SOURCE_SUFFIX = '.ail'
+
+
+class CompileResult:
+    def __init__(
+            self, path: str, time: float,
+            error: Optional[str] = None, cached: bool = False):
+        self.path = path
+        self.time = time
+        self.error = error
+        self.cached = cached  # the cache was valid, nothing compiled
+
+    def __repr__(self):
+        return '<CompileResult %s %.3fs error=%r>' % (
+            self.path, self.time, self.error)
+
+
+def find_source_files(paths: Iterable[str]) -> List[str]:
+    """
+    :return: the .ail files in paths (files or directories), sorted by
+             each path
+    """
+    files = []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        found = []
+        for root, dirs, names in os.walk(path):
+            dirs[:] = [d for d in dirs if d != BYTECODE_CACHE_DIR]
+            found.extend(os.path.join(root, name) for name in names
+                         if name.endswith(AIL_SOURCE_SUFFIX))
+        files.extend(sorted(found))
+
+    return files
+
+
+def _format_error(err: BaseException) -> str:
+    if is_ail_syntax_error(err):
+        return 'line %s: %s' % (err.lineno, err.msg)
+    return '%s: %s' % (type(err).__name__, err)
+
+
+def compile_file(
+        path: str, compiler: int, optimize: int = 0,
+        force: bool = False) -> CompileResult:
+    """
+    compile path and write the code object to the bytecode cache.
+
+    :param force: compile even if the cache is valid
+    """
+    start = perf_counter()
+
+    try:
+        with open(path, encoding='UTF-8') as f:
+            source = f.read()
+
+        if not force and load_cached_code(
+                path, source, 0, compiler, optimize) is not None:
+            return CompileResult(path, perf_counter() - start, cached=True)
+
+        code = ail_compile(
+            source, path, 'exec', compiler=compiler, optimize=optimize)
+        write_cached_code(path, source, code, 0, compiler, optimize)
+    except (Exception, SystemExit) as e:
+        return CompileResult(path, perf_counter() - start, _format_error(e))
+
+    return CompileResult(path, perf_counter() - start)
+
+
+def compile_files(
+        files: List[str], compiler: int, optimize: int = 0,
+        force: bool = False, workers: int = None) -> List[CompileResult]:
+    """
+    :param workers: the number of worker processes, None -> cpu count.
+                    the files are compiled in this process if it is 1
+    :return: the results in the order of files
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(files) <= 1:
+        return [compile_file(path, compiler, optimize, force)
+                for path in files]
+
+    n = len(files)
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(
+            compile_file, files, [compiler] * n, [optimize] * n, [force] * n,
+            chunksize=max(1, n // (workers * 4))))
+
+
+def format_compile_report(
+        results: List[CompileResult], verbose: bool = True) -> str:
+    lines = []
+    total = 0.0
+    errors = cached = 0
+
+    for result in results:
+        total += result.time
+
+        if result.error is not None:
+            errors += 1
+            lines.append('%s: error: %s' % (result.path, result.error))
+        elif result.cached:
+            cached += 1
+        elif verbose:
+            lines.append('%8.2f ms  %s' % (result.time * 1000, result.path))
+
+    lines.append(
+        '%d files, %d compiled, %d up to date, %d errors, '
+        '%.2f s compile time' % (
+            len(results), len(results) - cached - errors, cached, errors,
+            total))
+
+    return '\n'.join(lines)
@@ -19,3 +19,9 @@ PY_RUNTIME_IMPORT_NAME = 'ail.py_runtime'
 
 RENAME_PY_RUNTIME = True
 
+
+BYTECODE_CACHE = True  # read & write compiled code in __ailcache__
+
+BYTECODE_CACHE_DIR = '__ailcache__'
+
+BUNDLE_SUFFIX = '.ailz'  # ahead-of-time bundle, see abundle.py
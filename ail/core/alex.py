@@ -1,5 +1,8 @@
 # 用于ail的词法分析器
 
+import re
+
+from sys import intern
 from typing import Tuple
 
 from string import hexdigits, octdigits
@@ -404,12 +407,71 @@ def get_doc_string(source: str, cursor: int) -> tuple:
     return ccur - cursor, ln_inc, doc_string
 
 
+_EMOJI_CHARS = (
+    '\U0001F600-\U0001F64F'
+    '\U0001F300-\U0001F5FF'
+    '\U0001F680-\U0001F6FF'
+    '\U0001F1E0-\U0001F1FF'
+)
+
+# operators which have fixed value and token type
+_OPERATOR_TYPES = {
+    '+': AIL_PLUS, '-': AIL_SUB, '*': AIL_MULT, '/': AIL_DIV,
+    '%': AIL_MOD, '^': AIL_XOR, '|': AIL_BIN_OR, '&': AIL_BIN_AND,
+    '+=': AIL_INP_PLUS, '-=': AIL_INP_SUB, '*=': AIL_INP_MULT,
+    '%=': AIL_INP_MOD, '^=': AIL_INP_XOR, '|=': AIL_INP_BIN_OR,
+    '&=': AIL_INP_BIN_AND,
+    '||': AIL_OR, '&&': AIL_AND, '**': AIL_POW, '**=': AIL_INP_POW,
+    '->': AIL_RARROW,
+    '<<': AIL_LSHIFT, '>>': AIL_RSHIFT,
+    '<<=': AIL_INP_LSHIFT, '>>=': AIL_INP_RSHIFT,
+    '<': AIL_SMALER, '>': AIL_LARGER,
+    '<=': AIL_SMALER_EQ, '>=': AIL_LARGER_EQ,
+    '(': AIL_SLBASKET, ')': AIL_SRBASKET,
+    '[': AIL_MLBASKET, ']': AIL_MRBASKET,
+    '{': AIL_LLBASKET, '}': AIL_LRBASKET,
+    ',': AIL_COMMA, '.': AIL_DOT, ';': AIL_SEMI, '$': AIL_MONEY,
+    '@': AIL_AT, '\\': AIL_ESCAPE, '~': AIL_WAVE,
+    ':': AIL_COLON, ':=': AIL_REASSI,
+    '?': AIL_QUESTION_MARK,
+    '!': AIL_NOT, '!=': AIL_UEQ, '!==': AIL_AUEQ,
+    '=': AIL_ASSI, '==': AIL_EQ, '===': AIL_AEQ,
+}
+
+# the order of groups is the order of the branches in Lex.lex
+_TOKEN_PATTERNS = (
+    ('NL', r'\n'),
+    ('WS', r'(?:[^\S\n]|[\x00-\x09\x0b-\x1f\x7f])+'),
+    ('COMMENT', r'//[^\n]*\n?'),
+    ('BLOCK_COMMENT', r'/\*'),
+    ('DOC', r'\#'),
+    ('STRING', r'"[^"\\\n]*"|\'[^\'\\\n]*\'|`[^`\\]*`'),
+    ('COMPLEX_STRING', r'r?["\'`]'),  # escape or error, use get_string
+    ('IDENT', r'(?:[^\W\d]|[%s])(?:\w|[%s])*' % (_EMOJI_CHARS, _EMOJI_CHARS)),
+    ('NUMBER', r'\.?[0-9]'),
+    ('INC_DEC', r'[-+*^%|&][-+]'),  # 'a*-b' is '**' here, same as Lex.lex
+    ('SHIFT_ERROR', r'<>=|><=?'),
+    ('EMPTY_ARG', r'<>'),
+    ('LINE_CONTINUE', r'\\\n'),
+    ('OP', '|'.join(
+        re.escape(op) for op in
+        sorted(_OPERATOR_TYPES, key=len, reverse=True))),
+    ('UNKNOWN', r'.'),
+)
+
+# leading blanks are skipped in the same match
+_MASTER_RE = re.compile('[ \t]*(?:%s)' % '|'.join(
+    '(?P<%s>%s)' % pair for pair in _TOKEN_PATTERNS))
+
+
 class Cursor:
     def __init__(self, value=0):
         self.value = value
 
 
 class Token:
+    __slots__ = ('value', 'ttype', 'ln', 'offset')
+
     def __init__(self, value: str, ttype: int, ln: int, offset: int):
         self.value = value
         self.ttype = ttype
@@ -459,21 +521,23 @@ class TokenStream:
         """
         将 tok 增加到尾部
         """ 
-        
-        if tok.ttype == AIL_IDENTIFIER and tok.value == 'in':
-            if self.__prev_is_not:  # not in
-                self.__prev_is_not = False
-                self.__tli.pop()
-                tok.ttype = AIL_NOT_IN
-                tok.value = 'not in'
-            else:
-                tok.ttype = AIL_IN
-            
-        if tok.ttype == AIL_IDENTIFIER and tok.value == 'not':
-            self.__prev_is_not = True
-        else:
-            self.__prev_is_not = False
 
+        if tok.ttype == AIL_IDENTIFIER:
+            value = tok.value
+            if value == 'not':
+                self.__prev_is_not = True
+                self.__tli.append(tok)
+                return
+
+            if value == 'in':
+                if self.__prev_is_not:  # not in
+                    self.__tli.pop()
+                    tok.ttype = AIL_NOT_IN
+                    tok.value = 'not in'
+                else:
+                    tok.ttype = AIL_IN
+
+        self.__prev_is_not = False
         self.__tli.append(tok)
 
     def __repr__(self):
@@ -482,12 +546,10 @@ class TokenStream:
     __str__ = __repr__
 
     def __getitem__(self, index):
-        if isinstance(index, slice):
+        try:
             return self.__tli[index]
-
-        return self.__tli[index] \
-            if len(self.__tli) > index \
-            else self.__tli[-1]  # EOF
+        except IndexError:
+            return self.__tli[-1]  # EOF
 
     def __len__(self):
         return len(self.__tli)
@@ -498,11 +560,21 @@ class TokenStream:
 
 
 class Lex:
-    def __init__(self):
+    """
+    the cursor and the token stream of a scan are kept in the instance,
+    the module level tables are read only. a Lex instance scans one source
+    at a time, use one instance for each thread.
+    """
+
+    def __init__(self, regex_mode: bool = True):
         """
         fp : 源码路径，当以'.$str:'开头且testmode=True时，则是分析.$str:以后的内容
+        :param regex_mode: scan tokens by _MASTER_RE instead of
+                           walking the source char by char.
         """
 
+        self.__regex_mode = regex_mode
+
         self.__filename = '<NO FILE>'
         self.__ln = 1  # 行号
         self.__offset = 0
@@ -593,6 +665,11 @@ class Lex:
         if not isinstance(editor_cursor, tuple):
             editor_cursor = ()
 
+        # the editor cursor may stand in the middle of blanks,
+        # so only the char by char mode can handle it.
+        if self.__regex_mode and filename is not None and not editor_cursor:
+            return self.__lex_regex()
+
         while self.__chp < len(self.__source):
             c = self.__chnow
 
@@ -940,7 +1017,7 @@ class Lex:
 
                 mov, buf = get_identifier(self.__source, self.__chp)
                 self.__stream.append(Token(
-                    buf,
+                    intern(buf),
                     AIL_IDENTIFIER,
                     self.__ln, self.__offset
                 ))
@@ -1026,6 +1103,148 @@ class Lex:
 
         return self.__stream
 
+    def __lex_regex(self) -> TokenStream:
+        source = self.__source
+        stream = self.__stream
+        append = stream.append
+        match = _MASTER_RE.match
+
+        srclen = len(source)
+        ln = 1
+        line_start = 0  # index of the first char of current line
+        pos = 0
+
+        def error(msg: str, offset: int):
+            self.__ln = ln
+            self.__offset = offset
+            self.__chp = pos
+            self.__error_msg(msg)
+
+        while pos < srclen:
+            m = match(source, pos)
+            kind = m.lastgroup
+            pos = m.start(kind)
+            end = m.end()
+            offset = pos - line_start
+
+            if kind == 'IDENT':
+                append(Token(intern(m.group(kind)), AIL_IDENTIFIER, ln, offset))
+
+            elif kind == 'WS':
+                pass
+
+            elif kind == 'NL':
+                ln += 1
+                line_start = end
+                append(Token('\n', AIL_ENTER, ln, 0))
+
+            elif kind == 'OP':
+                value = intern(m.group(kind))
+                append(Token(value, _OPERATOR_TYPES[value], ln, offset))
+
+            elif kind == 'NUMBER':
+                mov, value = get_number(source, pos)
+                if mov == -1:
+                    if source[pos] == '.':
+                        error_msg(
+                            ln, 'invalid number', self.__filename,
+                            source=source)
+                    error('SyntaxError', offset)
+                append(Token(value, AIL_NUMBER, ln, offset))
+                end = pos + mov
+
+            elif kind == 'STRING':
+                value = m.group(kind)
+                if value[0] == '`':
+                    lni = value.count('\n')
+                    if lni:
+                        ln += lni
+                        line_start = pos + value.rfind('\n') + 1
+                append(Token(value[1:-1], AIL_STRING, ln, end - line_start))
+
+            elif kind == 'COMPLEX_STRING':
+                r_str = source[pos] == 'r'
+                start = pos + 1 if r_str else pos
+                mov, lni, value, flag = get_string(source, start, r_str)
+                end = start + mov
+                stop = min(end, srclen)
+
+                ln += lni
+                last_nl = source.rfind('\n', start, stop)
+                if last_nl != -1:
+                    line_start = last_nl + 1
+
+                if flag == -1:
+                    error('unterminated string literal (detected at line %s)'
+                          % ln, stop - line_start)
+                elif flag == -2:
+                    error('cannot decode an escape character',
+                          stop - line_start)
+
+                append(Token(value, AIL_STRING, ln, stop - line_start))
+
+            elif kind == 'COMMENT':
+                if source[end - 1] == '\n':
+                    line_start = end
+                append(Token('\n', AIL_ENTER, ln, end - line_start))
+                ln += 1
+
+            elif kind == 'BLOCK_COMMENT':
+                close = source.find('*/', pos + 2)
+                if close == -1:
+                    error('EOL while scanning comment block', offset + 2)
+
+                lni = source.count('\n', pos + 2, close)
+                if lni:
+                    ln += lni
+                    line_start = source.rfind('\n', pos + 2, close) + 1
+                end = close + 2
+
+            elif kind == 'DOC':
+                mov, ln_inc, doc_string = get_doc_string(source, pos)
+                append(Token(doc_string, AIL_DOC_STRING, ln, offset))
+                end = pos + mov
+
+                ln += ln_inc
+                last_nl = source.rfind('\n', pos, min(end, srclen))
+                if last_nl != -1:
+                    line_start = last_nl + 1
+
+            elif kind == 'INC_DEC':
+                value = m.group(kind)
+                append(Token(
+                    value[0] * 2,
+                    AIL_PLUS_PLUS if value[1] == '+' else AIL_SUB_SUB,
+                    ln, offset))
+
+            elif kind == 'EMPTY_ARG':
+                append(Token('<', AIL_SMALER, ln, offset))
+                append(Token('>', AIL_LARGER, ln, offset))
+
+            elif kind == 'LINE_CONTINUE':
+                ln += 1
+                line_start = end
+
+            elif kind == 'SHIFT_ERROR':
+                error('Syntax error:{0}'.format(m.group(kind)), offset)
+
+            else:
+                error('Unknown character', pos)
+
+            pos = end
+
+        pos = min(pos, srclen)
+        offset = pos - line_start
+
+        self.__chp = pos
+        self.__ln = ln
+        self.__offset = offset
+
+        append(Token('\n', AIL_ENTER, ln, offset))
+        append(Token('<EOF>', AIL_EOF, ln, offset))
+
+        return stream
+
 
 def test_lex():
     import pprint
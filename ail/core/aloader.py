@@ -1,9 +1,16 @@
 # module loader
 
 import os.path
+import sys
+import zlib
+
+from importlib import import_module
+from importlib.machinery import SourceFileLoader
+from importlib.util import spec_from_file_location, module_from_spec
 
 from . import error
 from . import shared
+from .._config import BUILTINS_MODULE_PATH
 
 _ALLOW_FILE_TYPE = ('ail', 'py', 'ailp')
 
@@ -22,50 +29,206 @@ def _trim_path(path: str) -> str:
     return path
 
 
+class _AILPyLoader(SourceFileLoader):
+    def get_code(self, fullname):
+        # cache_from_source() only strips the last suffix, so 'x.ailp'
+        # would share __pycache__/x.*.pyc with 'x.py'. do not write
+        # bytecode file for .ailp.
+        if self.path.endswith('.ailp'):
+            return self.source_to_code(self.get_data(self.path), self.path)
+        return super().get_code(fullname)
+
+
+def _py_module_name(pypath: str) -> str:
+    dir_, fn = os.path.split(pypath)
+    stem, ext = os.path.splitext(fn)
+
+    if ext == '.py' and os.path.normcase(dir_) == os.path.normcase(
+            os.path.abspath(BUILTINS_MODULE_PATH)):
+        return 'ail.modules.%s' % stem
+
+    return '_ail_py_module_%08x_%s' % (
+        zlib.crc32(os.path.normcase(pypath).encode('UTF-8')), stem)
+
+
+def get_ail_namespace(module, path: str) -> dict:
+    """
+    :return: the AIL namespace of a python module
+    """
+    v = module.__dict__
+
+    is_mod = v.get('_IS_AIL_MODULE_', False)
+    is_mod = v.get('_AIL_MODULE_', False) if not is_mod else True
+    is_pyc_module = v.get('_AIL_PYC_MODULE_', False)
+    has_namespace = '_AIL_NAMESPACE_' in v
+
+    if not (is_mod or is_pyc_module) or not has_namespace:
+        raise ModuleNotFoundError(
+            '%s is not an AIL MODULE!' % path, 'LoadError')
+
+    # a new dict each time, the module itself is cached in sys.modules
+    return dict(v.get('_AIL_NAMESPACE_', {}))
+
+
+class _DirectoryIndex:
+    """
+    directory entries of a search path, refreshed when the mtime of
+    the directory changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = None
+        self.entries = frozenset()
+        self.version = 0  # increased each time the entries are reloaded
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime == self.mtime:
+            return
+
+        self.version += 1
+        self.mtime = mtime
+
+        if mtime is None:
+            self.entries = frozenset()
+            return
+
+        try:
+            self.entries = frozenset(os.listdir(self.path))
+        except OSError:
+            self.entries = frozenset()
+
+
 class ModuleLoader:
     def __init__(self):
         self.__loaded = {}
         self.__loading_paths = []
+
+        # name -> (path, versions of the directory indexes searched), valid
+        # while find path (and cwd) not change
+        self.__path_cache = {}
+        self.__find_path_key = None
+        self.__search_dirs = []
+        self.__dir_index = {}
     
     @property
     def __load_path(self):
         return shared.GLOBAL_SHARED_DATA.find_path
 
+    def __check_find_path(self):
+        load_path = self.__load_path
+
+        # relative path ('.') depends on cwd, and AILImporter changes cwd
+        # when loading a module.
+        if any(not os.path.isabs(p) for p in load_path):
+            key = (tuple(load_path), os.getcwd())
+        else:
+            key = (tuple(load_path), None)
+
+        if key == self.__find_path_key:
+            return
+
+        self.__find_path_key = key
+        self.__search_dirs = [_trim_path(os.path.abspath(p)) for p in load_path]
+        self.__path_cache.clear()
+
+    def __get_dir_index(self, path: str) -> _DirectoryIndex:
+        index = self.__dir_index.get(path)
+        if index is None:
+            index = _DirectoryIndex(path)
+            self.__dir_index[path] = index
+        return index
+
+    def invalidate_caches(self):
+        self.__find_path_key = None
+        self.__path_cache.clear()
+        self.__dir_index.clear()
+
     def __search_module(self, name: str) -> str:
         """
         :return: module path if found else None
         """
-        maybe_file = ['%s.%s' % (name, x) for x in _ALLOW_FILE_TYPE]
-
-        for mfp in maybe_file:
-            for sp in self.__load_path:
-                absfp = os.path.abspath(sp)
-                jfp = os.path.join(absfp, mfp)
-                jfp = _trim_path(jfp)
-                if os.path.exists(jfp) and os.path.isfile(jfp):
+        self.__check_find_path()
+
+        # name may contains sub directory, like 'demos/xxx'
+        sub_dir, name_part = os.path.split(_trim_path(name))
+
+        indexes = []
+        for sp in self.__search_dirs:
+            index = self.__get_dir_index(
+                os.path.normpath(os.path.join(sp, sub_dir)) if sub_dir else sp)
+            index.refresh()
+            indexes.append(index)
+        versions = tuple(index.version for index in indexes)
+
+        # the cached path is stale if it was removed, or a search directory
+        # changed (a new module may shadow it).
+        cached = self.__path_cache.get(name)
+        if cached is not None and cached[1] == versions and \
+                os.path.isfile(cached[0]):
+            return cached[0]
+
+        path = self.__find_in_indexes(name_part, indexes, True)
+        if path is None:
+            # the listings are compared exactly, but the file system may
+            # ignore case (Windows, macOS), probe the files like the old
+            # search to keep 'import "Foo"' finding 'foo.ail' there.
+            path = self.__find_in_indexes(name_part, indexes, False)
+
+        if path is None:
+            self.__path_cache.pop(name, None)
+        else:
+            self.__path_cache[name] = (path, versions)
+        return path
+
+    @staticmethod
+    def __find_in_indexes(
+            name: str, indexes: list, use_entries: bool) -> str:
+        # extension first, keep the order of the old search
+        for ext in _ALLOW_FILE_TYPE:
+            mfp = '%s.%s' % (name, ext)
+            for index in indexes:
+                if use_entries and mfp not in index.entries:
+                    continue
+                jfp = os.path.join(index.path, mfp)
+                if os.path.isfile(jfp):
                     return jfp
 
         return None
 
     search_module = __search_module
 
-    def __load_py_namespace(self, pypath):
-        v = {}
+    def __import_py_module(self, pypath: str):
+        name = _py_module_name(pypath)
 
-        cobj = compile(
-                    open(pypath, encoding='UTF-8').read(), pypath, 'exec')
-        exec(cobj, v)
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
 
-        is_mod = v.get('_IS_AIL_MODULE_', False)
-        is_mod = v.get('_AIL_MODULE_', False) if not is_mod else True
-        is_pyc_module = v.get('_AIL_PYC_MODULE_', False)
-        has_namespace = '_AIL_NAMESPACE_' in v
+        if name.startswith('ail.modules.'):
+            return import_module(name)
 
-        if not (is_mod or is_pyc_module) or not has_namespace:
-            raise ModuleNotFoundError(
-                '%s is not an AIL MODULE!' % pypath, 'LoadError')
+        spec = spec_from_file_location(
+            name, pypath, loader=_AILPyLoader(name, pypath))
+        module = module_from_spec(spec)
 
-        return v.get('_AIL_NAMESPACE_', {})
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(name, None)
+            raise
+
+        return module
+
+    def __load_py_namespace(self, pypath):
+        pypath = _trim_path(os.path.abspath(pypath))
+        return get_ail_namespace(self.__import_py_module(pypath), pypath)
 
     get_py_namespace = __load_py_namespace
 
@@ -0,0 +1,717 @@
+# AST optimizer
+#
+# 在转换为 Python AST (或编译为 code object) 之前对 AIL AST 做的优化:
+#   * 常量折叠: 60 * 60 * 24 -> 86400, -1, !true, 'a' + 'b' ...
+#   * 删除不可达分支: if false {...}, while false {...}, true ? a : b
+#   * 常量 match: match 1 { 1: 'a', 2: 'b' } -> 'a'
+#
+# 折叠的语义与 ASTConverter 保持一致 (例如二元表达式总是左结合)。
+
+import math
+import operator
+
+from ast import literal_eval
+
+from . import asts as ast
+from .tokentype import AIL_IDENTIFIER, AIL_NUMBER, AIL_STRING
+
+
+# the same limits as CPython's ast_opt.c
+_MAX_INT_SIZE = 128  # bits
+_MAX_STR_SIZE = 4096
+
+_NULL_NAMES = ('null', 'None')
+_TRUE_NAMES = ('true', 'True')
+_FALSE_NAMES = ('false', 'False')
+
+# names which are converted to True / False / None by ASTConverter even if
+# they are strings, a string constant like that can not be represented.
+_SPECIAL_NAMES = _NULL_NAMES + _TRUE_NAMES + _FALSE_NAMES
+
+_NOT_CONSTANT = object()
+
+
+def _safe_multiply(left, right):
+    if isinstance(left, int) and isinstance(right, int) and left and right:
+        if left.bit_length() + right.bit_length() > _MAX_INT_SIZE:
+            return _NOT_CONSTANT
+    elif isinstance(left, int) and isinstance(right, str):
+        if left > 0 and len(right) * left > _MAX_STR_SIZE:
+            return _NOT_CONSTANT
+    elif isinstance(left, str) and isinstance(right, int):
+        if right > 0 and len(left) * right > _MAX_STR_SIZE:
+            return _NOT_CONSTANT
+    return left * right
+
+
+def _safe_power(left, right):
+    if isinstance(left, int) and isinstance(right, int) and left and right > 0:
+        if left.bit_length() * right > _MAX_INT_SIZE:
+            return _NOT_CONSTANT
+    return left ** right
+
+
+def _safe_lshift(left, right):
+    if isinstance(left, int) and isinstance(right, int) and left and right > 0:
+        if left.bit_length() + right > _MAX_INT_SIZE:
+            return _NOT_CONSTANT
+    return left << right
+
+
+def _safe_add(left, right):
+    if isinstance(left, str) and isinstance(right, str) and \
+            len(left) + len(right) > _MAX_STR_SIZE:
+        return _NOT_CONSTANT
+    return left + right
+
+
+def _safe_mod(left, right):
+    if isinstance(left, str):  # string formatting
+        return _NOT_CONSTANT
+    return left % right
+
+
+_BIN_OPS = {
+    '**': _safe_power,
+    '+': _safe_add,
+    '-': operator.sub,
+    '*': _safe_multiply,
+    '/': operator.truediv,
+    'mod': _safe_mod,
+    '<<': _safe_lshift,
+    '>>': operator.rshift,
+    '|': operator.or_,
+    '&': operator.and_,
+    '^': operator.xor,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_UNARY_OPS = {
+    '+': operator.pos,
+    '-': operator.neg,
+    '~': operator.invert,
+    '!': operator.not_,
+}
+
+# nodes that bind names or change the kind of a function (generator),
+# a branch contains them can not be removed from a function.
+_SCOPE_EFFECT_NODES = (
+    ast.AssignExprAST,
+    ast.AnnAssignStmt,
+    ast.ReAssignStmt,
+    ast.DefineExprAST,
+    ast.InputStmtAST,
+    ast.FunctionDefineAST,
+    ast.ClassDefineAST,
+    ast.StructDefineAST,
+    ast.NamespaceStmt,
+    ast.ForeachStmt,
+    ast.WithStmt,
+    ast.TryCatchStmtAST,
+    ast.ImportStmtAST,
+    ast.LoadStmtAST,
+    ast.PyImportStmt,
+    ast.PyImportFromStmt,
+    ast.UsingStmt,
+    ast.GlobalStmtAST,
+    ast.NonlocalStmtAST,
+    ast.YieldExpr,
+    ast.YieldFromExpr,
+    ast.StaticAssign,
+    ast.AssignModifier,
+    ast.PropertyDefine,
+    ast.InstanceProperty,
+    ast.PyCodeBlock,
+    ast.PyASMExpr,
+    ast.PyASMGroupExpr,
+)
+
+# the target of match expression is assigned before the expression
+# by ASTConverter, so it is evaluated even if the match is not.
+_EXPR_EFFECT_NODES = _SCOPE_EFFECT_NODES + (ast.MatchExpr,)
+
+
+def _contains(node, types: tuple) -> bool:
+    if isinstance(node, types):
+        return True
+
+    if isinstance(node, (list, tuple)):
+        children = node
+    elif ast.is_node(node):
+        children = [value for _, value in ast.iter_fields(node)]
+    else:
+        return False
+
+    for child in children:
+        if (isinstance(child, (list, tuple)) or ast.is_node(child)) and \
+                _contains(child, types):
+            return True
+    return False
+
+
+def _constant_value(node):
+    """
+    :return: the python value of node as ASTConverter converts it,
+             or _NOT_CONSTANT
+    """
+    if not isinstance(node, ast.CellAST):
+        return _NOT_CONSTANT
+
+    value = node.value
+
+    if value in _SPECIAL_NAMES:
+        if node.type == AIL_STRING:
+            # the compilers disagree about this kind of string.
+            return _NOT_CONSTANT
+        if value in _NULL_NAMES:
+            return None
+        return value in _TRUE_NAMES
+
+    if node.type == AIL_STRING:
+        return value
+
+    if node.type == AIL_NUMBER:
+        try:
+            value = literal_eval(value)
+        except (ValueError, SyntaxError):
+            return _NOT_CONSTANT
+        if type(value) in (int, float):
+            return value
+
+    return _NOT_CONSTANT
+
+
+def _new_constant(value, ln: int):
+    """
+    :return: a CellAST represents value, or None if value can not be
+             represented.
+    """
+    if value is None:
+        return ast.CellAST('null', AIL_IDENTIFIER, ln)
+
+    if value is True or value is False:
+        return ast.CellAST('true' if value else 'false', AIL_IDENTIFIER, ln)
+
+    if type(value) is int or \
+            (type(value) is float and math.isfinite(value)):
+        return ast.CellAST(repr(value), AIL_NUMBER, ln)
+
+    if type(value) is str and value not in _SPECIAL_NAMES and \
+            len(value) <= _MAX_STR_SIZE:
+        return ast.CellAST(value, AIL_STRING, ln)
+
+    return None
+
+
+class ASTOptimizer:
+    def __init__(self):
+        self.__function_level = 0
+
+    def __can_remove_stmts(self, stmts: list) -> bool:
+        if self.__function_level == 0:
+            return True
+        return not _contains(stmts, _SCOPE_EFFECT_NODES)
+
+    def __can_remove_exprs(self, exprs: list) -> bool:
+        return not _contains(exprs, _EXPR_EFFECT_NODES)
+
+    def _visit_children(self, node):
+        for name, value in ast.iter_fields(node):
+            if ast.is_node(value):
+                setattr(node, name, self.visit(value))
+            elif isinstance(value, list):
+                setattr(node, name, [self.__visit_item(x) for x in value])
+
+    def __visit_item(self, item):
+        if ast.is_node(item):
+            return self.visit(item)
+
+        if isinstance(item, (list, tuple)):  # (op, expr) of binary expression
+            return type(item)(
+                self.visit(x) if ast.is_node(x) else x for x in item)
+
+        return item
+
+    def _optimize_block(self, block: ast.BlockAST) -> ast.BlockAST:
+        stmts = []
+
+        for stmt in block.stmts:
+            stmt = self.visit(stmt)
+
+            if isinstance(stmt, ast.IfStmtAST):
+                stmt = self._optimize_if_stmt(stmt)
+            elif isinstance(stmt, ast.WhileStmtAST):
+                stmt = self._optimize_while_stmt(stmt)
+
+            if isinstance(stmt, list):
+                stmts.extend(stmt)
+            else:
+                stmts.append(stmt)
+
+        block.stmts = stmts
+
+        if isinstance(block, ast.ProgramBlock) and \
+                block.stmt_token_index is not None and \
+                len(block.stmt_token_index) != len(stmts):
+            # statements do not match the token stream any more
+            block.stmt_token_index = None
+
+        return block
+
+    def _optimize_if_stmt(self, stmt: ast.IfStmtAST):
+        test = _constant_value(stmt.test)
+        if test is _NOT_CONSTANT or stmt.elif_list:
+            return stmt
+
+        else_stmts = [] if stmt.else_block is None else stmt.else_block.stmts
+
+        if test:
+            body, removed = stmt.block.stmts, else_stmts
+        else:
+            body, removed = else_stmts, stmt.block.stmts
+
+        if not self.__can_remove_stmts(removed):
+            return stmt
+
+        return body
+
+    def _optimize_while_stmt(self, stmt: ast.WhileStmtAST):
+        test = _constant_value(stmt.test)
+        if test is _NOT_CONSTANT or test:
+            return stmt
+
+        if not self.__can_remove_stmts(stmt.block.stmts):
+            return stmt
+
+        return []
+
+    def _fold_bin_op_expr(self, expr):
+        # right: [(op, right_expr), ...], always left associative
+        if isinstance(expr, ast.CmpTestAST) and len(expr.right) > 1:
+            # a < b < c is a < b and b < c, not (a < b) < c
+            return expr
+
+        value = _constant_value(expr.left)
+        if value is _NOT_CONSTANT:
+            return expr
+
+        folded = None
+        folded_count = 0
+
+        for index, (op, right) in enumerate(expr.right):
+            func = _BIN_OPS.get(op)
+            right = _constant_value(right)
+
+            if func is None or right is _NOT_CONSTANT:
+                break
+
+            try:
+                value = func(value, right)
+            except (ArithmeticError, TypeError, ValueError):
+                break
+
+            if value is _NOT_CONSTANT:
+                break
+
+            cell = _new_constant(value, expr.ln)
+            if cell is not None:
+                folded = cell
+                folded_count = index + 1
+
+        if folded is None:
+            return expr
+
+        if folded_count == len(expr.right):
+            return folded
+
+        expr.left = folded
+        expr.right = expr.right[folded_count:]
+
+        return expr
+
+    def _fold_unary_expr(self, expr):
+        op = '!' if isinstance(expr, ast.NotTestAST) else expr.op
+
+        value = _constant_value(expr.expr)
+        func = _UNARY_OPS.get(op)
+
+        if value is _NOT_CONSTANT or func is None:
+            return expr
+
+        try:
+            value = func(value)
+        except (ArithmeticError, TypeError):
+            return expr
+
+        cell = _new_constant(value, expr.ln)
+
+        return expr if cell is None else cell
+
+    def _fold_bool_expr(self, expr):
+        is_and = isinstance(expr, ast.AndTestAST)
+        values = [expr.left] + expr.right
+
+        # 'true and x' -> x, 'false or x' -> x
+        while len(values) > 1:
+            value = _constant_value(values[0])
+            if value is _NOT_CONSTANT:
+                break
+
+            if bool(value) == is_and:
+                values.pop(0)
+                continue
+
+            # 'false and x' -> false, 'true or x' -> true
+            if self.__can_remove_exprs(values[1:]):
+                values = values[:1]
+            break
+
+        if len(values) == 1:
+            return values[0]
+
+        expr.left = values[0]
+        expr.right = values[1:]
+
+        return expr
+
+    def _optimize_if_expr(self, expr: ast.IfExpr):
+        test = _constant_value(expr.test)
+        if test is _NOT_CONSTANT:
+            return expr
+
+        if test:
+            result, removed = expr.body, expr.orelse
+        else:
+            result, removed = expr.orelse, expr.body
+
+        if not self.__can_remove_exprs([removed]):
+            return expr
+
+        return result
+
+    def _optimize_match_expr(self, expr: ast.MatchExpr):
+        target = _constant_value(expr.target)
+        if target is _NOT_CONSTANT:
+            return expr
+
+        cases = []
+        removed = []
+
+        for index, case in enumerate(expr.cases):
+            if case.when_test is not None:
+                matched = _constant_value(case.when_test)
+                if matched is not _NOT_CONSTANT:
+                    matched = bool(matched)
+            elif not case.patterns:  # default case
+                matched = True
+            else:
+                patterns = [_constant_value(p) for p in case.patterns]
+                if _NOT_CONSTANT in patterns:
+                    matched = _NOT_CONSTANT
+                else:
+                    # the same as ail::match(target, patterns, True)
+                    matched = target in patterns
+
+            if matched is _NOT_CONSTANT:
+                cases.append(case)
+            elif matched:
+                removed.extend(expr.cases[index + 1:])
+                removed.extend(case.patterns)
+                removed.append(case.when_test)
+                cases.append(ast.MatchCase([], case.expr, case.ln))
+                break
+            else:
+                removed.append(case)
+        else:
+            # no case matches, keep the error
+            return expr
+
+        if not removed or not self.__can_remove_exprs(removed):
+            return expr
+
+        if len(cases) == 1:  # only the matched case left
+            return cases[0].expr
+
+        expr.cases = cases
+
+        return expr
+
+    def visit(self, node):
+        if isinstance(node, ast.BlockAST):
+            return self._optimize_block(node)
+
+        if isinstance(node, ast.FunctionDefineAST):
+            self.__function_level += 1
+            try:
+                self._visit_children(node)
+            finally:
+                self.__function_level -= 1
+            return node
+
+        self._visit_children(node)
+
+        if type(node) in ast.BIN_OP_AST:
+            return self._fold_bin_op_expr(node)
+
+        elif isinstance(node, (ast.UnaryExprAST, ast.NotTestAST)):
+            return self._fold_unary_expr(node)
+
+        elif isinstance(node, (ast.AndTestAST, ast.OrTestAST)):
+            return self._fold_bool_expr(node)
+
+        elif isinstance(node, ast.TestExprAST):
+            if isinstance(node.test, ast.CellAST):
+                return node.test
+
+        elif isinstance(node, ast.IfExpr):
+            return self._optimize_if_expr(node)
+
+        elif isinstance(node, ast.MatchExpr):
+            return self._optimize_match_expr(node)
+
+        return node
+
+    def optimize(self, tree):
+        return self.visit(tree)
+
+
+def optimize_ast(tree):
+    """
+    :return: optimized tree, tree is modified in place
+    """
+    return ASTOptimizer().optimize(tree)
+
+
+# loop analysis, used by ASTConverter and Compiler to lower
+# 'for (init; test; update)' loops.
+
+# statements which may bind any name
+_UNKNOWN_BINDING_NODES = (
+    ast.ImportStmtAST,
+    ast.LoadStmtAST,
+    ast.PyImportStmt,
+    ast.PyImportFromStmt,
+    ast.UsingStmt,
+    ast.PyCodeBlock,
+    ast.PyASMExpr,
+    ast.PyASMGroupExpr,
+)
+
+_RANGE_TEST_OPS = ('<', '<=', '>', '>=')
+
+
+class RangeLoop:
+    """
+    for (i = start; i < stop; i += step) {...} which can be run as
+    'for i in range(start, stop, step)', after the loop without break,
+    i is final (the first value which makes the test false).
+    """
+
+    def __init__(self, name: str, start: int, stop: int, step: int,
+                 final: int):
+        self.name = name
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.final = final
+
+
+def _int_value(node):
+    if isinstance(node, ast.UnaryExprAST) and node.op in ('+', '-'):
+        value = _int_value(node.expr)
+        if value is None:
+            return None
+        return -value if node.op == '-' else value
+
+    value = _constant_value(node)
+    return value if type(value) is int else None
+
+
+def _is_name(node, name: str = None) -> bool:
+    return isinstance(node, ast.CellAST) and \
+           node.type == AIL_IDENTIFIER and \
+           node.value not in _SPECIAL_NAMES and \
+           (name is None or node.value == name)
+
+
+def _target_names(target) -> list:
+    if isinstance(target, ast.CellAST):
+        return [target.value]
+    if isinstance(target, (ast.TupleAST, ast.ListAST)):
+        items = target.items
+        if isinstance(items, ast.ItemListAST):
+            items = items.item_list
+        names = []
+        for item in items:
+            names.extend(_target_names(item))
+        return names
+    if isinstance(target, ast.StarredExpr):
+        return _target_names(target.value)
+    return []
+
+
+def _binds_name(node, name: str) -> bool:
+    if isinstance(node, _UNKNOWN_BINDING_NODES):
+        return True
+
+    if isinstance(node, ast.AssignExprAST):
+        bound = _target_names(node.left)
+    elif isinstance(node, ast.AnnAssignStmt):
+        bound = _target_names(node.target)
+    elif isinstance(node, ast.ForeachStmt):
+        bound = _target_names(node.target)
+    elif isinstance(node, ast.WithItem):
+        bound = _target_names(node.optional_var)
+    elif isinstance(node, ast.InputStmtAST):
+        bound = node.value_list.value_list
+    elif isinstance(node, (ast.DefineExprAST, ast.ClassDefineAST,
+                           ast.StructDefineAST, ast.NamespaceStmt,
+                           ast.GlobalStmtAST, ast.NonlocalStmtAST)):
+        bound = [node.name]
+    elif isinstance(node, ast.FunctionDefineAST):
+        bound = [] if node.is_lambda else [node.name]
+    elif isinstance(node, ast.ReAssignStmt):
+        bound = [node.target]
+    elif isinstance(node, ast.CatchCase):
+        bound = [node.alias]
+    else:
+        bound = []
+
+    if name in bound:
+        return True
+
+    if isinstance(node, (list, tuple)):
+        children = node
+    elif ast.is_node(node):
+        children = [value for _, value in ast.iter_fields(node)]
+    else:
+        return False
+
+    for child in children:
+        if (isinstance(child, (list, tuple)) or ast.is_node(child)) and \
+                _binds_name(child, name):
+            return True
+    return False
+
+
+def analyse_range_loop(stmt: ast.ForStmtAST):
+    """
+    :return: RangeLoop if stmt is a counting loop like
+             'for (i = 0; i < 10; i += 1)' with integer constant bounds
+             and the body never rebinds i, else None
+    """
+    if stmt.init_list is None or stmt.test is None or \
+            stmt.update_list is None:
+        return None
+
+    init_list = stmt.init_list.expr_list
+    update_list = stmt.update_list.expr_list
+
+    if len(init_list) != 1 or len(update_list) != 1:
+        return None
+
+    # init: i = start
+    init = init_list[0]
+    if not isinstance(init, ast.AssignExprAST) or init.aug_assign or \
+            not _is_name(init.left):
+        return None
+
+    name = init.left.value
+    start = _int_value(init.right)
+
+    # test: i < stop
+    test = stmt.test
+    if isinstance(test, ast.TestExprAST):
+        test = test.test
+
+    if not isinstance(test, ast.CmpTestAST) or \
+            not _is_name(test.left, name) or len(test.right) != 1:
+        return None
+
+    op, stop = test.right[0]
+    stop = _int_value(stop)
+
+    # update: i += step | i -= step | i = i + step
+    update = update_list[0]
+    if not isinstance(update, ast.AssignExprAST) or \
+            not _is_name(update.left, name) or \
+            not isinstance(update.right, ast.AddSubExprAST) or \
+            not _is_name(update.right.left, name) or \
+            len(update.right.right) != 1:
+        return None
+
+    update_op, step = update.right.right[0]
+    step = _int_value(step)
+
+    if start is None or stop is None or step is None or \
+            op not in _RANGE_TEST_OPS:
+        return None
+
+    if update_op == '-':
+        step = -step
+
+    if op in ('<', '<='):
+        if step <= 0:
+            return None
+        if op == '<=':
+            stop += 1
+    else:
+        if step >= 0:
+            return None
+        if op == '>=':
+            stop -= 1
+
+    if _binds_name(stmt.block, name):
+        return None
+
+    final = start + len(range(start, stop, step)) * step
+
+    return RangeLoop(name, start, stop, step, final)
+
+
+def _pattern_value(node):
+    if isinstance(node, ast.UnaryExprAST) and node.op in ('+', '-'):
+        value = _pattern_value(node.expr)
+        if type(value) not in (int, float):
+            return _NOT_CONSTANT
+        return -value if node.op == '-' else value
+
+    return _constant_value(node)
+
+
+def match_table(cases: list):
+    """
+    :return: (table, patterns, default) if every case before the default
+             case only has constant patterns, else None.
+             table: {pattern: index of the first case contains it}
+             patterns: (patterns of case 0, patterns of case 1, ...)
+             default: index of the default case, or len(patterns) if
+                      there is no default case
+    """
+    table = {}
+    patterns = []
+
+    for index, case in enumerate(cases):
+        if case.when_test is not None:
+            return None
+
+        if not case.patterns:
+            break
+
+        values = tuple(_pattern_value(p) for p in case.patterns)
+        if any(v is _NOT_CONSTANT for v in values):
+            return None
+
+        patterns.append(values)
+        for value in values:
+            table.setdefault(value, index)
+
+    if not patterns:
+        return None
+
+    return table, tuple(patterns), len(patterns)
@@ -1,8 +1,7 @@
 import ast as pyast
-from logging.config import IDENTIFIER
 
 from os.path import split
-from typing import Union
+from typing import List, Optional, Union
 
 from ail.core.exceptions import print_py_traceback
 
@@ -13,7 +12,10 @@ from . import pyasm, pyopcode
 
 from .feature import FEATURE_CLASSICAL_BLOCK, parse_feature_flag
 from .alex import Token, TokenStream, Lex
-from . import asts as ast, test_utils
+from .aoptimizer import (
+    RangeLoop, analyse_range_loop, match_table
+)
+from . import asts as ast
 from .error import AILSyntaxError, error_msg, is_ail_syntax_error
 from .pyast import *
 from .tokentype import *
@@ -41,6 +43,8 @@ _end_signs_uc = ('WEND', 'END', 'ENDIF', 'ELSE', 'ELIF', 'CATCH')
 _keywords = tuple([x.lower() for x in _keywords_uc])
 _end_signs = tuple([x.lower() for x in _end_signs_uc])
 
+_keyword_set = frozenset(_keywords)
+
 _cmp_op = (
     AIL_EQ, AIL_LARGER, AIL_SMALER,
     AIL_LARGER_EQ, AIL_SMALER_EQ,
@@ -48,6 +52,47 @@ _cmp_op = (
     AIL_IN, AIL_NOT_IN,
 )
 
+# the binary operators, from the lowest precedence to the highest. a
+# level is parsed as a node of _binary_node_types[level] with a flat list
+# of the (operator, right operand) of the level, like
+#   a - b + c -> AddSubExprAST('-', a, [('-', b), ('+', c)])
+# the right operands of 'and' and 'or' have no operator. 'not' is a prefix
+# between 'and' and the comparisons.
+_OR_LEVEL, _AND_LEVEL, _NOT_LEVEL, _CMP_LEVEL = range(4)
+
+_binary_node_types = (
+    ast.OrTestAST, ast.AndTestAST, None, ast.CmpTestAST,
+    ast.BitOpExprAST, ast.BinXorExprAST, ast.BitShiftExprAST,
+    ast.AddSubExprAST, ast.MultDivExprAST, ast.ModExprAST,
+    ast.PowerExprAST,
+)
+
+# the nodes take the first operator of the list
+_binary_nodes_with_op = (
+    ast.BitOpExprAST, ast.BitShiftExprAST, ast.AddSubExprAST,
+    ast.MultDivExprAST,
+)
+
+# token type -> level
+_binary_op_levels = dict(
+    [(ttype, _CMP_LEVEL) for ttype in _cmp_op] + [
+        (AIL_BIN_OR, 4), (AIL_BIN_AND, 4),
+        (AIL_XOR, 5),
+        (AIL_LSHIFT, 6), (AIL_RSHIFT, 6),
+        (AIL_PLUS, 7), (AIL_SUB, 7),
+        (AIL_MULT, 8), (AIL_DIV, 8),
+        (AIL_MOD, 9),
+        (AIL_POW, 10),
+    ])
+
+# value of the other tokens (not strings) -> level
+_binary_word_levels = {
+    'or': _OR_LEVEL, 'and': _AND_LEVEL, '^': 5, 'mod': 9, '**': 10,
+}
+
+# level -> the operator in the node, if it is not the token value
+_binary_op_names = {9: 'mod'}
+
 _inplace_op_dict = {
     AIL_INP_BIN_AND: ('&', ast.BitOpExprAST, True),
     AIL_INP_BIN_OR: ('|', ast.BitOpExprAST, True),
@@ -67,8 +112,6 @@ _literal_names = ('null', 'true', 'false', 'True', 'False')
 _FROM_MAIN = 0
 _FROM_FUNC = 1
 
-_class_name_stack = list()
-
 _special_method_map = {
     'new': '__new__',
     'init': '__init__',
@@ -85,10 +128,6 @@ _special_method_map = {
 CONTINUE_WHEN_SYNTAX_ERROR = 1
 
 
-def _make_private_name(name):
-    return '$'.join(_class_name_stack)
-
-
 def _pyasm_check_and_get(
         opname: str, arg, effect: int,
         err_handler) -> int:
@@ -150,6 +189,15 @@ class ParserState:
 
 
 class Parser:
+    """
+    all the states of a parse are kept in the instance, so the parsers in
+    different threads can run at the same time. parse() resets the
+    instance, one instance parses one token stream at a time.
+
+    the parse changes the tokens in place (';' -> newline, the private
+    names), do not give one TokenStream to two parsers at the same time.
+    """
+
     def __init__(self):
         self.__filename = '<NO FILE>'
         self.__source = '\n'
@@ -166,6 +214,11 @@ class Parser:
         self.__flags = 0
         self.__feature_flag = 0
 
+        self.__stmt_token_index = []
+
+        # names of the classes being parsed, for the private names
+        self.__class_name_stack: List[str] = []
+
     def get_state(self) -> ParserState:
         return ParserState(self.__tc, self.__level, self.__parenthesis_level, self)
 
@@ -210,33 +263,42 @@ class Parser:
         if self.__parenthesis_level > 0:
             self.__skip_newlines()
 
-        return self.__tok_stream[self.__tc]
+        return self.__peek(0)
 
     def __is_name(self, tok: Token):
-        return tok.ttype == AIL_IDENTIFIER and tok.value not in _keywords
+        return tok.ttype == AIL_IDENTIFIER and tok.value not in _keyword_set
 
     def __skip_newlines(self):
         while self.__now_tok == '\n':
             self.__next_tok(just_next=True)
 
     def __peek(self, step=1) -> Token:
-        return self.__tok_stream[self.__tc + step]
+        try:
+            return self.__tok_list[self.__tc + step]
+        except IndexError:
+            return self.__tok_list[-1]  # EOF
 
     def __parse_bin_expr(self) -> ast.AddSubExprAST:
         pass
 
     @property
     def __now_tok(self) -> Token:
-        tok = self.__tok_stream[self.__tc]
+        try:
+            tok = self.__tok_list[self.__tc]
+        except IndexError:
+            tok = self.__tok_list[-1]  # EOF
 
-        if len(_class_name_stack) > 0 and tok.ttype == AIL_IDENTIFIER \
-                and tok.value not in _keywords:
+        if self.__class_name_stack and tok.ttype == AIL_IDENTIFIER \
+                and tok.value not in _keyword_set:
             val = tok.value
             if not self.__pyc_mode and \
-                    val[:2] == '__' and val[-2:] != '__' and len(_class_name_stack) > 0:
-                tok.value = '%s$%s' % (_make_private_name(val), val)
+                    val[:2] == '__' and val[-2:] != '__':
+                tok.value = '%s$%s' % (self.__make_private_name(val), val)
         return tok
 
+    def __make_private_name(self, name: str) -> str:
+        return '$'.join(self.__class_name_stack)
+
     @property
     def __now_ln(self) -> int:
         try:
@@ -983,26 +1045,27 @@ class Parser:
         return left
 
     def __parse_low_cell_expr(self) -> ast.Expression:
-        ln = self.__now_ln
+        nt = self.__now_tok
+        ln = nt.ln
 
-        if self.__now_tok == '%' :
+        if nt == '%' :
             return self.__parse_pyasm_group()
 
-        if self.__now_tok.ttype == AIL_MLBASKET:
+        if nt.ttype == AIL_MLBASKET:
             a = self.__parse_array_expr()
 
             if a is None:
                 self.__syntax_error()
 
             return a
-        elif self.__now_tok.ttype == AIL_LLBASKET:
+        elif nt.ttype == AIL_LLBASKET:
             a = self.__parse_dict_expr()
 
             if a is None:
                 self.__syntax_error()
 
             return a
-        elif self.__now_tok == 'fun' or self.__now_tok == 'func':
+        elif nt == 'fun' or nt == 'func':
             ph_lev = self.__parenthesis_level
             self.__parenthesis_level = 0
 
@@ -1013,7 +1076,7 @@ class Parser:
 
             return expr
 
-        if self.__now_tok == '(':
+        if nt == '(':
             p_ln = self.__now_ln
             p_ofs = self.__now_tok.offset
 
@@ -1083,22 +1146,19 @@ class Parser:
             a.scope_effect = False
             return a
 
-        nt = self.__now_tok
-
         if nt == 'match':
             return self.__parse_match_expr()
 
-        if self.__now_tok.ttype == AIL_ENTER:
+        if nt.ttype == AIL_ENTER:
             self.__syntax_error(ln=self.__now_ln - 1)
 
-        elif self.__now_tok.ttype not in (
+        elif nt.ttype not in (
                 AIL_NUMBER, AIL_STRING, AIL_IDENTIFIER, AIL_SUB) or \
-                nt in _keywords:
-            self.__syntax_error('unexcepted token %s' % repr(self.__now_tok.value))
+                (nt.ttype != AIL_STRING and nt.value in _keyword_set):
+            self.__syntax_error('unexcepted token %s' % repr(nt.value))
         name = nt.value  # it can be sub, string, number or identifier
 
-        if self.__now_tok.ttype == AIL_IDENTIFIER and \
-                self.__now_tok.value in _keywords:
+        if nt.ttype == AIL_IDENTIFIER and nt.value in _keyword_set:
             self.__syntax_error()
 
         self.__next_tok()  # eat NAME
@@ -1125,96 +1185,6 @@ class Parser:
 
         return self.__parse_member_access_expr()
 
-    def __parse_power_expr(self) -> ast.PowerExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_unary_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok != '**':
-            return left
-
-        rl = []
-
-        while self.__now_tok == '**':
-            self.__next_tok()
-            r = self.__parse_unary_expr()
-            if r is None:
-                self.__syntax_error()
-            rl.append(('**', r))
-        return ast.PowerExprAST(left, rl, ln)
-
-    def __parse_mod_expr(self) -> ast.ModExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_power_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok != 'mod' and self.__now_tok.ttype != AIL_MOD:
-            return left
-
-        rl = []
-
-        while self.__now_tok == 'mod' or self.__now_tok.ttype == AIL_MOD:
-            self.__next_tok()
-            r = self.__parse_power_expr()
-            if r is None:
-                self.__syntax_error()
-            rl.append(('mod', r))
-        return ast.ModExprAST(left, rl, ln)
-
-    def __parse_muit_div_expr(self) -> ast.MultDivExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_mod_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok.ttype not in (AIL_MULT, AIL_DIV):
-            return left
-
-        left_op = self.__now_tok.value
-
-        rl = []
-
-        while self.__now_tok.ttype in (AIL_MULT, AIL_DIV):
-            r_op = self.__now_tok.value
-            self.__next_tok()
-
-            r = self.__parse_mod_expr()
-            if r is None:
-                self.__syntax_error()
-
-            rl.append((r_op, r))
-
-        return ast.MultDivExprAST(left_op, left, rl, ln)
-
-    def __parse_bin_xor_expr(self) -> ast.BinXorExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_bit_shift_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok != '^':
-            return left
-
-        rl = []
-
-        while self.__now_tok == '^':
-            self.__next_tok()
-            r = self.__parse_bit_shift_expr()
-            if r is None:
-                self.__syntax_error()
-            rl.append(('^', r))
-        return ast.BinXorExprAST(left, rl, ln)
-
     def __parse_binary_expr(
             self, as_stmt: bool = False, do_tuple: bool = False,
             no_assign: bool = False, type_comment: bool = False,
@@ -1231,33 +1201,6 @@ class Parser:
 
         return expr
 
-    def __parse_bin_op_expr(self) -> ast.BitOpExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_bin_xor_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok.ttype not in (AIL_BIN_OR, AIL_BIN_AND):
-            return left
-
-        left_op = self.__now_tok.value
-
-        rl = []
-
-        while self.__now_tok.ttype in (AIL_BIN_OR, AIL_BIN_AND):
-            r_op = self.__now_tok.value
-            self.__next_tok()
-
-            r = self.__parse_bin_xor_expr()
-            if r is None:
-                self.__syntax_error()
-
-            rl.append((r_op, r))
-
-        return ast.BitOpExprAST(left_op, left, rl, ln)
-
     def __parse_tuple_expr(
             self, do_tuple: bool = False, do_star=False, name_list=False) -> ast.TupleAST:
         ln = self.__now_ln
@@ -1294,60 +1237,6 @@ class Parser:
 
         return ast.TupleAST(items, False, ln)
 
-    def __parse_bit_shift_expr(self) -> ast.BitShiftExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_add_sub_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok.ttype not in (AIL_LSHIFT, AIL_RSHIFT):
-            return left
-
-        left_op = self.__now_tok.value
-
-        rl = []
-
-        while self.__now_tok.ttype in (AIL_LSHIFT, AIL_RSHIFT):
-            r_op = self.__now_tok.value
-            self.__next_tok()
-
-            r = self.__parse_add_sub_expr()
-            if r is None:
-                self.__syntax_error()
-
-            rl.append((r_op, r))
-
-        return ast.BitShiftExprAST(left_op, left, rl, ln)
-
-    def __parse_add_sub_expr(self) -> ast.AddSubExprAST:
-        ln = self.__now_ln
-
-        left = self.__parse_muit_div_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok.ttype not in (AIL_PLUS, AIL_SUB):
-            return left
-
-        left_op = self.__now_tok.value
-
-        rl = []
-
-        while self.__now_tok.ttype in (AIL_PLUS, AIL_SUB):
-            r_op = self.__now_tok.value
-            self.__next_tok()
-
-            r = self.__parse_muit_div_expr()
-            if r is None:
-                self.__syntax_error()
-
-            rl.append((r_op, r))
-
-        return ast.AddSubExprAST(left_op, left, rl, ln)
-
     def __parse_print_stmt(self) -> ast.PrintStmtAST:
         ln = self.__now_ln
 
@@ -1557,86 +1446,62 @@ class Parser:
 
         return ast.DefineExprAST(n, v, self.__now_ln)
 
-    def __parse_comp_test_expr(self) -> ast.CmpTestAST:
-        ln = self.__now_ln
-
-        left = self.__parse_bin_op_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok.ttype not in _cmp_op:
-            return left
-
-        rl = []
-
-        while self.__now_tok.ttype in _cmp_op:
-            now_op = self.__now_tok.value
-            self.__next_tok()  # eat cmp op
-            r = self.__parse_bin_op_expr()
-
-            if r is None:
-                self.__syntax_error()
-
-            rl.append((now_op, r))
+    def __binary_level(self, tok: Token) -> int:
+        level = _binary_op_levels.get(tok.ttype)
+        if level is None and tok.ttype != AIL_STRING:
+            return _binary_word_levels.get(tok.value)
+        return level
 
-        return ast.CmpTestAST(left, rl, ln)
+    def __parse_binary_op_expr(
+            self, min_level: int = _OR_LEVEL) -> ast.Expression:
+        """
+        parse the binary operators whose level >= min_level by precedence
+        climbing. 'a + b' takes one call for each operand, the node of a
+        level is only made if the operator of the level presents.
+        """
+        ln = self.__now_ln
 
-    def __parse_not_test_expr(self) -> ast.NotTestAST:
-        if self.__now_tok == 'not':
+        if min_level <= _NOT_LEVEL and self.__now_tok == 'not':
             self.__next_tok()  # eat 'not'
-            expr = self.__parse_comp_test_expr()
-
-            return ast.NotTestAST(expr, self.__now_ln)
-        return self.__parse_comp_test_expr()
-
-    def __parse_and_test_expr(self) -> ast.AndTestAST:
-        left = self.__parse_not_test_expr()
+            expr = self.__parse_binary_op_expr(_CMP_LEVEL)
+            left = ast.NotTestAST(expr, self.__now_ln)
+        else:
+            left = self.__parse_unary_expr()
 
         if left is None:
             self.__syntax_error()
 
-        if self.__now_tok != 'and':
-            return left
-
-        rl = []
-
-        while self.__now_tok == 'and':
-            self.__next_tok()  # eat 'and'
-            r = self.__parse_not_test_expr()
-
-            if r is None:
-                self.__syntax_error()
-
-            rl.append(r)
+        level = self.__binary_level(self.__now_tok)
 
-        return ast.AndTestAST(left, rl, self.__now_ln)
+        while level is not None and level >= min_level:
+            op = first_op = _binary_op_names.get(level, self.__now_tok.value)
+            rl = []
 
-    def __parse_or_test_expr(self) -> ast.OrTestAST:
-        left = self.__parse_and_test_expr()
-
-        if left is None:
-            self.__syntax_error()
-
-        if self.__now_tok != 'or':
-            return left
+            while True:
+                self.__next_tok()  # eat op
+                r = self.__parse_binary_op_expr(level + 1)
+                rl.append(r if level <= _AND_LEVEL else (op, r))
 
-        rl = []
+                if self.__binary_level(self.__now_tok) != level:
+                    break
+                op = _binary_op_names.get(level, self.__now_tok.value)
 
-        while self.__now_tok == 'or':
-            self.__next_tok()  # eat 'or'
-            r = self.__parse_and_test_expr()
+            node_type = _binary_node_types[level]
 
-            if r is None:
-                self.__syntax_error()
+            if level <= _AND_LEVEL:
+                left = node_type(left, rl, self.__now_ln)
+            elif node_type in _binary_nodes_with_op:
+                left = node_type(first_op, left, rl, ln)
+            else:
+                left = node_type(left, rl, ln)
 
-            rl.append(r)
+            level = self.__binary_level(self.__now_tok)
 
-        return ast.OrTestAST(left, rl, self.__now_ln)
+        return left
 
     def __parse_test_expr(
             self, as_stmt: bool = True) -> ast.TestExprAST:
-        t = self.__parse_or_test_expr()
+        t = self.__parse_binary_op_expr()
 
         if type(t) not in (
                 ast.AndTestAST, ast.OrTestAST, ast.NotTestAST, ast.CmpTestAST):
@@ -3012,165 +2877,103 @@ class Parser:
 
         return func
 
+    def __check_stmt_context(self, in_loop: bool, msg: str):
+        try:
+            if (self.__loop_level if in_loop else self.__level) == 0:
+                self.__syntax_error(msg)
+        except SyntaxError as e:
+            if not self.__can_continue_when_syntax_error(e):
+                raise
+
+    def __parse_expr_stmt(self) -> ast.Expression:
+        a = self.__parse_binary_expr(True, True, False, True)
+        self.__expect_newline()
+        return a
+
+    # (token type, value) -> the method parses the statement starts with
+    # the token, the keywords are identifier tokens.
+    __stmt_parsers = {
+        (AIL_IDENTIFIER, 'print'): __parse_print_stmt,
+        (AIL_IDENTIFIER, 'input'): __parse_input_stmt,
+        (AIL_IDENTIFIER, 'if'): __parse_if_else_stmt,
+        (AIL_IDENTIFIER, 'while'): __parse_while_stmt,
+        (AIL_IDENTIFIER, 'for'): __parse_for_stmt,
+        (AIL_IDENTIFIER, 'do'): __parse_do_loop_stmt,
+        (AIL_IDENTIFIER, 'continue'): __parse_continue_stmt,
+        (AIL_IDENTIFIER, 'nonlocal'): __parse_nonlocal_stmt,
+        (AIL_IDENTIFIER, 'global'): __parse_global_stmt,
+        (AIL_IDENTIFIER, 'break'): __parse_break_stmt,
+        (AIL_IDENTIFIER, 'return'): __parse_return_stmt,
+        (AIL_IDENTIFIER, 'fun'): __parse_func_def_stmt,
+        (AIL_IDENTIFIER, 'func'): __parse_func_def_stmt,
+        (AIL_AT, '@'): __parse_def_with_decorator_stmt,
+        (AIL_IDENTIFIER, 'load'): __parse_load_stmt,
+        (AIL_IDENTIFIER, 'struct'): __parse_struct_def_stmt,
+        (AIL_IDENTIFIER, 'class'): __parse_class_def_stmt,
+        (AIL_IDENTIFIER, 'assert'): __parse_assert_stmt,
+        (AIL_IDENTIFIER, 'throw'): __parse_throw_stmt,
+        (AIL_IDENTIFIER, 'try'): __parse_try_catch_stmt,
+        (AIL_IDENTIFIER, 'import'): __parse_import_stmt,
+        (AIL_IDENTIFIER, 'foreach'): __parse_foreach_stmt,
+        (AIL_IDENTIFIER, 'match'): __parse_match_expr,
+        (AIL_IDENTIFIER, 'with'): __parse_with_stmt,
+        (AIL_IDENTIFIER, 'yield'): __parse_yield_or_yield_from_expr,
+        (AIL_IDENTIFIER, 'from'): __parse_py_import_from_stmt,
+        (AIL_IDENTIFIER, 'namespace'): __parse_namespace_stmt,
+        (AIL_IDENTIFIER, 'not'): __parse_expr_stmt,
+    }
+
+    # keyword -> (only in a loop, or only in a function; the error message)
+    __stmt_contexts = {
+        'continue': (True, '\'continue\' outside loop'),
+        'break': (True, '\'break\' outside loop'),
+        'nonlocal': (False, 'nonlocal declaration outside function'),
+        'global': (False, 'global declaration outside function'),
+        'return': (False, 'return outside function'),
+    }
+
     def __parse_stmt(
             self, limit: tuple = (), class_body: bool = False,
     ) -> ast.Expression:
         nt = self.__now_tok
+        value = nt.value
 
-        if nt == 'print':
-            a = self.__parse_print_stmt()
-
-        elif nt == 'input':
-            a = self.__parse_input_stmt()
-
-        elif nt == 'if':
-            a = self.__parse_if_else_stmt()
-
-        elif nt == 'while':
-            a = self.__parse_while_stmt()
-
-        elif nt == 'for':
-            a = self.__parse_for_stmt()
+        parse = self.__stmt_parsers.get((nt.ttype, value))
+        if parse is not None:
+            context = self.__stmt_contexts.get(value)
+            if context is not None:
+                self.__check_stmt_context(*context)
 
-        elif nt == 'do':
-            a = self.__parse_do_loop_stmt()
+            return parse(self)
 
-        elif nt == 'continue':
-            try:
-                if self.__loop_level == 0:
-                    self.__syntax_error('\'continue\' outside loop')
-            except SyntaxError as e:
-                if not self.__can_continue_when_syntax_error(e):
-                    raise
+        ttype = nt.ttype
 
-            a = self.__parse_continue_stmt()
+        if ttype == AIL_DOC_STRING:
+            return self.__parse_doc_string_object()
 
-        elif nt == 'nonlocal':
-            try:
-                if self.__level == 0:
-                    self.__syntax_error(
-                        'nonlocal declaration outside function')
-            except SyntaxError as e:
-                if not self.__can_continue_when_syntax_error(e):
-                    raise
+        is_string = ttype == AIL_STRING
+        is_keyword = value in _keyword_set or value in limit
 
-            a = self.__parse_nonlocal_stmt()
+        if class_body and not is_string and value in ('get', 'set'):
+            return self.__parse_property_define()
 
-        elif nt == 'global':
-            try:
-                if self.__level == 0:
-                    self.__syntax_error('global declaration outside function')
-            except SyntaxError as e:
-                if not self.__can_continue_when_syntax_error(e):
-                    raise
-
-            a = self.__parse_global_stmt()
-
-        elif nt == 'break':
-            try:
-                if self.__loop_level == 0:
-                    self.__syntax_error('\'break\' outside loop')
-            except SyntaxError as e:
-                if not self.__can_continue_when_syntax_error(e):
-                    raise
-
-            a = self.__parse_break_stmt()
-
-        elif nt == 'return':
-            try:
-                if self.__level == 0:
-                    self.__syntax_error('return outside function')
-            except SyntaxError as e:
-                if not self.__can_continue_when_syntax_error(e):
-                    raise
-
-            a = self.__parse_return_stmt()
-
-        elif nt == 'fun' or nt == 'func':
-            a = self.__parse_func_def_stmt()
-
-        elif nt.ttype == AIL_DOC_STRING:
-            a = self.__parse_doc_string_object()
-
-        elif nt == '@':
-            a = self.__parse_def_with_decorator_stmt()
-
-        elif nt == 'load':
-            a = self.__parse_load_stmt()
-
-        elif nt == 'struct':
-            a = self.__parse_struct_def_stmt()
-
-        elif nt == 'class':
-            a = self.__parse_class_def_stmt()
-
-        elif nt == 'assert':
-            a = self.__parse_assert_stmt()
-
-        elif nt == 'throw':
-            a = self.__parse_throw_stmt()
-
-        elif nt == 'try':
-            a = self.__parse_try_catch_stmt()
-
-        elif nt == 'import':
-            a = self.__parse_import_stmt()
-
-        elif nt == 'foreach':
-            a = self.__parse_foreach_stmt()
-
-        elif nt == 'match':
-            a = self.__parse_match_expr()
-
-        elif nt == 'with':
-            a = self.__parse_with_stmt()
-
-        elif nt == 'yield':
-            a = self.__parse_yield_or_yield_from_expr()
-
-        elif nt == 'from':
-            a = self.__parse_py_import_from_stmt()
-
-        elif nt == 'namespace':
-            a = self.__parse_namespace_stmt()
-
-        elif nt == 'not':
-            a = self.__parse_binary_expr(True, True, False, True)
-            self.__expect_newline()
+        elif class_body and not is_string and value in _special_method_map:
+            return self.__parse_special_method()
 
-        elif class_body and nt in ('get', 'set'):
-            a = self.__parse_property_define()
-
-        elif class_body and nt in tuple(_special_method_map.keys()):
-            a = self.__parse_special_method()
-
-        elif nt.value in (_keywords + limit) and nt.ttype != AIL_STRING:
+        elif is_keyword and not is_string:
             self.__syntax_error()
 
-        elif nt.ttype not in (AIL_ENTER, AIL_EOF) and \
-                nt.value not in (_keywords + limit):
-            a = self.__parse_binary_expr(True, True, False, True)
-            self.__expect_newline()
+        elif ttype not in (AIL_ENTER, AIL_EOF) and not is_keyword:
+            return self.__parse_expr_stmt()
 
-        elif nt.ttype == AIL_ENTER:
+        elif ttype == AIL_ENTER:
             self.__next_tok()
             return ast.NullLineAST(self.__now_ln)
 
-        elif nt.ttype == AIL_EOF or (
-                nt.value in _end_signs and nt.ttype != AIL_STRING):
+        elif ttype == AIL_EOF or (value in _end_signs and not is_string):
             return ast.EOFAST(self.__now_ln)
 
-        else:
-            self.__syntax_error()
-
-        # ** not use anymore (2021.3.21)
-        # if self.__now_tok.ttype != AIL_ENTER:
-        #     # a stmt should be end of ENTER
-        #     self.__syntax_error()
-        #
-        # self.__next_tok()  # eat enter
-
-        return a
+        self.__syntax_error()
 
     def __parse_new_block(self, class_body: bool = False) -> ast.BlockAST:
         if self.__now_tok.ttype != AIL_LLBASKET:
@@ -3246,6 +3049,7 @@ class Parser:
                     self.__next_tok()
                     return ast.BlockAST([], ln)
 
+            stmt_tc = self.__tc
             first = self.__parse_stmt((start, end), class_body=class_body)
 
             if first is None:
@@ -3258,12 +3062,15 @@ class Parser:
 
             if not isinstance(first, ast.NullLineAST):
                 stmtl.append(first)
+                if for_program:
+                    self.__stmt_token_index.append(stmt_tc)
 
             while self.__now_tok != end:
                 if for_if_else and self.__now_tok.value in (
                         'elif', 'else', 'endif'):
                     return ast.BlockAST(stmtl, ln)
 
+                stmt_tc = self.__tc
                 s = self.__parse_stmt((start, end), class_body=class_body)
 
                 if s is None:
@@ -3276,6 +3083,8 @@ class Parser:
 
                 if not isinstance(s, ast.NullLineAST):
                     stmtl.append(s)
+                    if for_program:
+                        self.__stmt_token_index.append(stmt_tc)
 
             self.__next_tok()  # eat end
 
@@ -3326,7 +3135,9 @@ class Parser:
                                    "A program should ends with 'end'",
                                    for_program=True, lsp_mode=lsp_mode)
 
-        prog_block = ast.ProgramBlock(block.stmts, block.ln, block.new)
+        prog_block = ast.ProgramBlock(
+            block.stmts, block.ln, block.new,
+            self.__stmt_token_index, self.__tc)
         return prog_block
 
     def test(self, ts, source):
@@ -3344,12 +3155,66 @@ class Parser:
 _PyTreeT = TypeVar('_PyTreeT')
 
 
+def _has_locations(pynode: pyast.AST) -> bool:
+    attributes = pynode._attributes
+    if not attributes:
+        return False
+
+    for attr in attributes:
+        if getattr(pynode, attr, None) is None:
+            return False
+    return True
+
+
+def _fix_missing_locations(pynode: pyast.AST):
+    """
+    the same as ast.fix_missing_locations, but the nodes which already have
+    all of their locations are not walked: their children are fixed when
+    they got the locations. so every node is walked only once during the
+    whole conversion, instead of once for each of its parents.
+    """
+    if _has_locations(pynode):
+        return
+
+    stack = [(pynode, 1, 0, 1, 0)]
+
+    while stack:
+        node, lineno, col_offset, end_lineno, end_col_offset = stack.pop()
+        attributes = node._attributes
+
+        if 'lineno' in attributes:
+            if not hasattr(node, 'lineno'):
+                node.lineno = lineno
+            else:
+                lineno = node.lineno
+        if 'end_lineno' in attributes:
+            if getattr(node, 'end_lineno', None) is None:
+                node.end_lineno = end_lineno
+            else:
+                end_lineno = node.end_lineno
+        if 'col_offset' in attributes:
+            if not hasattr(node, 'col_offset'):
+                node.col_offset = col_offset
+            else:
+                col_offset = node.col_offset
+        if 'end_col_offset' in attributes:
+            if getattr(node, 'end_col_offset', None) is None:
+                node.end_col_offset = end_col_offset
+            else:
+                end_col_offset = node.end_col_offset
+
+        for child in pyast.iter_child_nodes(node):
+            if not _has_locations(child):
+                stack.append(
+                    (child, lineno, col_offset, end_lineno, end_col_offset))
+
+
 def _set_lineno(pynode: _PyTreeT, lineno: int) -> _PyTreeT:
-    node = pyast.fix_missing_locations(pynode)
-    if hasattr(node, 'lineno'):
-        node.lineno = lineno
-        node.end_lineno = lineno
-    return node
+    _fix_missing_locations(pynode)
+    if hasattr(pynode, 'lineno'):
+        pynode.lineno = lineno
+        pynode.end_lineno = lineno
+    return pynode
 
 
 def _increase_all_lineno(start_lineno: int, node: _PyTreeT) -> _PyTreeT:
@@ -3383,9 +3248,24 @@ class PyTreeConvertException(Exception):
 
 
 class ASTConverter:
+    """
+    the states of a conversion are kept in the instance, use one converter
+    for each thread. the anonymous functions of the AIL tree are renamed
+    when they are converted, so one tree is converted by one converter at a
+    time.
+    """
+
     def __init__(self):
         self.__block_stmt_append_func_stack = []
 
+        # the update list of each loop being converted, None for the loops
+        # other than 'for (...;...;...)'. see _convert_continue_stmt.
+        self.__loop_update_stack: List[Optional[ast.BlockAST]] = []
+
+        # tables of constant match expressions, assigned at the head of
+        # module. None -> not converting a module, do not use tables.
+        self.__match_tables = None
+
     def __append_stmt_to_top_block(self, stmt: pyast.stmt):
         if self.__block_stmt_append_func_stack:
             self.__block_stmt_append_func_stack[-1](stmt)
@@ -3604,6 +3484,12 @@ class ASTConverter:
         """
 
         target = expr.target
+        table = match_table(expr.cases) \
+            if self.__match_tables is not None else None
+
+        if table is not None:
+            return self.__make_match_dispatch(expr, table)
+
         if isinstance(target, ast.AssignExprAST):
             assi = self._convert_assign_expr(target, as_stmt=True)
             name = self.convert(target.left)
@@ -3624,6 +3510,77 @@ class ASTConverter:
         return self.__make_if_expr_from_match_expr(
             target, expr.cases, 0, expr.ln)
 
+    def __make_match_dispatch(self, expr: ast.MatchExpr, table) -> pyast.expr:
+        """
+        every case of the match expression only has constant patterns,
+        look up the index of case in a dict which is built once.
+        e.g.
+            result = match x {
+                1, 2: 'a',
+                3: 'b',
+                4: 'c',
+            }
+            ---- python code ----
+            <match_table_0> = {1: 0, 2: 0, 3: 1, 4: 2}  # head of module
+            ...
+            <match_index> = ail::match_index(
+                <match_table_0>, ((1, 2), (3,), (4,)), x, 3)
+            result = ('a' if <match_index> < 1 else 'b') \
+                     if <match_index> < 2 else \
+                     ('c' if <match_index> < 3 else py::raise(...))
+        """
+        table, patterns, default = table
+        ln = expr.ln
+
+        target = expr.target
+        if isinstance(target, ast.AssignExprAST):
+            self.__append_stmt_to_top_block(
+                self._convert_assign_expr(target, as_stmt=True))
+            target = target.left
+
+        table_name = '<match_table_%s>' % len(self.__match_tables)
+        self.__match_tables.append(_set_lineno(
+            assign_stmt(
+                [self._new_name(table_name, ln, store_ctx())],
+                dict_expr(
+                    [self._new_constant(k, ln) for k in table],
+                    [self._new_constant(v, ln) for v in table.values()])),
+            ln))
+
+        index_name = '<match_index_%s-%s>' % (hash(expr), ln)
+        self.__append_stmt_to_top_block(_set_lineno(
+            assign_stmt(
+                [self._new_name(index_name, ln, store_ctx())],
+                self._new_call_name(
+                    'ail::match_index',
+                    [self._new_name(table_name, ln),
+                     self._new_constant(patterns, ln),
+                     self.convert(target),
+                     self._new_constant(default, ln)],
+                    ln)),
+            ln))
+
+        bodies = [self.convert(case.expr) for case in expr.cases[:default + 1]]
+        if len(bodies) == default:  # no default case
+            bodies.append(self.__make_if_expr_from_match_expr(None, [], 0, ln))
+
+        def _dispatch(lo: int, hi: int) -> pyast.expr:
+            if hi - lo == 1:
+                return bodies[lo]
+
+            mid = (lo + hi) // 2
+            return _set_lineno(
+                if_expr(
+                    _set_lineno(compare_expr(
+                        self._new_name(index_name, ln),
+                        [pyast.Lt()],
+                        [self._new_constant(mid, ln)]), ln),
+                    _dispatch(lo, mid),
+                    _dispatch(mid, hi)),
+                ln)
+
+        return _dispatch(0, len(bodies))
+
     def _convert_with_stmt(self, stmt: ast.WithStmt) -> pyast.With:
         items = []
         for item in stmt.items:
@@ -3777,7 +3734,7 @@ class ASTConverter:
         finally:
             self.__block_stmt_append_func_stack.pop()
 
-        block = self._convert_block(stmt.block, True)
+        block = self._convert_loop_body(stmt.block)
         if necessary_stmts:
             block = _set_lineno(
                 try_stmt(block, [], necessary_stmts),
@@ -3792,7 +3749,7 @@ class ASTConverter:
         def _necessary_stmt_hook(stmt):
             necessary_stmts.append(stmt)
 
-        body = self._convert_block(stmt.block, True)
+        body = self._convert_loop_body(stmt.block)
 
         try:
             self.__block_stmt_append_func_stack.append(_necessary_stmt_hook)
@@ -3828,11 +3785,44 @@ class ASTConverter:
             for_stmt(
                 target,
                 self.convert(stmt.iter),
-                self._convert_block(stmt.body),
+                self._convert_loop_body(stmt.body),
             ), stmt.ln,
         )
 
+    def _convert_range_for_stmt(
+            self, stmt: ast.ForStmtAST, loop: RangeLoop) -> pyast.For:
+        """
+        for (i = 0; i < 10; i += 1) {...}
+            ---- python code ----
+            for i in py::range(0, 10, 1):
+                ...
+            else:
+                i = 10
+        """
+        ln = stmt.ln
+
+        target = self._new_name(loop.name, ln, store_ctx())
+        iter_ = self._new_call_name(
+            'py::range',
+            [self._new_constant(loop.start, ln),
+             self._new_constant(loop.stop, ln),
+             self._new_constant(loop.step, ln)],
+            ln)
+
+        for_stmt_ = for_stmt(
+            target, iter_, self._convert_loop_body(stmt.block))
+        for_stmt_.orelse = [_set_lineno(
+            assign_stmt(
+                [self._new_name(loop.name, ln, store_ctx())],
+                self._new_constant(loop.final, ln)),
+            ln)]
+
+        return _set_lineno(for_stmt_, ln)
+
     def _convert_for_stmt(self, stmt: ast.ForStmtAST) -> pyast.While:
+        loop = analyse_range_loop(stmt)
+        if loop is not None:
+            return self._convert_range_for_stmt(stmt, loop)
 
         top_hook = self.__block_stmt_append_func_stack[-1]
         necessary_stmts = []
@@ -3857,18 +3847,42 @@ class ASTConverter:
         update_block = ast.BlockAST(
             stmt.update_list.expr_list + necessary_stmts, stmt.update_list.ln
         )
-        body = self._convert_block(stmt.block)
 
-        body_with_try = body
         if update_block.stmts:
-            body_with_try = [_set_lineno(
-                try_stmt(
-                    body, [], self._convert_block(update_block, True)), stmt.block.ln)]
+            # each 'continue' runs the update list before it, so 'break'
+            # and exceptions leave the loop without running it.
+            body = self._convert_loop_body(stmt.block, update_block)
+            body += self._convert_block(update_block, True)
+        else:
+            body = self._convert_loop_body(stmt.block)
 
-        while_stmt_ = _set_lineno(while_stmt(test, body_with_try), stmt.ln)
+        while_stmt_ = _set_lineno(while_stmt(test, body), stmt.ln)
 
         return while_stmt_
 
+    def _convert_loop_body(
+            self, block: ast.BlockAST,
+            update_block: ast.BlockAST = None) -> List[pyast.stmt]:
+        """
+        :param update_block: the update list of 'for (...;...;...)'
+        """
+        self.__loop_update_stack.append(update_block)
+        try:
+            return self._convert_block(block, True)
+        finally:
+            self.__loop_update_stack.pop()
+
+    def _convert_continue_stmt(
+            self, stmt: ast.ContinueStmtAST) -> Union[pyast.stmt, list]:
+        continue_ = _set_lineno(continue_stmt(), stmt.ln)
+
+        update_block = self.__loop_update_stack[-1] \
+            if self.__loop_update_stack else None
+        if update_block is None:
+            return continue_
+
+        return self._convert_block(update_block, True) + [continue_]
+
     def _convert_if_stmt(self, stmt: ast.IfStmtAST) -> pyast.If:
         test = self.convert(stmt.test)
         body = self._convert_block(stmt.block, True)
@@ -4246,7 +4260,7 @@ class ASTConverter:
             return _set_lineno(break_stmt(), a.ln)
 
         elif isinstance(a, ast.ContinueStmtAST):
-            return _set_lineno(continue_stmt(), a.ln)
+            return self._convert_continue_stmt(a)
 
         elif isinstance(a, ast.GlobalStmtAST):
             return _set_lineno(global_stmt([a.name]), a.ln)
@@ -4365,13 +4379,33 @@ class ASTConverter:
 
         return a
 
+    def __convert_module_body(self, block: ast.BlockAST) -> List[pyast.stmt]:
+        self.__match_tables = []
+        try:
+            body = self.convert(block, True)
+            tables = self.__match_tables
+        finally:
+            self.__match_tables = None
+
+        if not tables:
+            return body
+
+        # keep the doc string at the first
+        index = 0
+        if body and isinstance(body[0], pyast.Expr) and \
+                isinstance(body[0].value, pyast.Constant) and \
+                isinstance(body[0].value.value, str):
+            index = 1
+
+        return body[:index] + tables + body[index:]
+
     def convert_module(self, block: ast.BlockAST) -> pyast.Module:
-        body = self.convert(block, True)
+        body = self.__convert_module_body(block)
 
         return _set_lineno(module(body), block.ln)
 
     def convert_single(self, block: ast.BlockAST) -> pyast.Interactive:
-        body = self.convert(block, True)
+        body = self.__convert_module_body(block)
 
         return _set_lineno(interactive(body), block.ln)
 
@@ -4391,6 +4425,7 @@ class ASTConverter:
 
 def test_parse():
     import pprint
+    from . import test_utils
     from .symbol import SymbolAnalyzer
     from sys import argv
 
@@ -4420,6 +4455,7 @@ def test_parse():
 
 def test_parsing_recovery():
     import pprint
+    from . import test_utils
 
     source = open('./tests/test.ail').read()
 
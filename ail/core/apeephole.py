@@ -0,0 +1,231 @@
+"""
+peephole optimizer for the native compile mode (CP_PY_CODE).
+
+it works on the basic block CFG made by acompile.Compiler, before the CFG
+is assembled to a code object.
+"""
+
+from typing import Callable, List, Tuple
+
+from .pyopcode import *
+
+
+PEEPHOLE_CONST_TUPLE = 0x1
+PEEPHOLE_CONST_POP = 0x2
+PEEPHOLE_JUMP_THREADING = 0x4
+PEEPHOLE_DEAD_CODE = 0x8
+
+PEEPHOLE_ALL = (
+    PEEPHOLE_CONST_TUPLE | PEEPHOLE_CONST_POP |
+    PEEPHOLE_JUMP_THREADING | PEEPHOLE_DEAD_CODE
+)
+
+_UNCONDITIONAL_JUMP = (JUMP_ABSOLUTE, JUMP_FORWARD)
+
+_THREADABLE_JUMP = (
+    JUMP_ABSOLUTE,
+    JUMP_FORWARD,
+    POP_JUMP_IF_FALSE,
+    POP_JUMP_IF_TRUE,
+    JUMP_IF_FALSE_OR_POP,
+    JUMP_IF_TRUE_OR_POP,
+)
+
+
+def _iter_blocks(block):
+    while block is not None:
+        yield block
+        block = block.next_block
+
+
+def _count_instructions(block) -> int:
+    return sum(len(b.instructions) for b in _iter_blocks(block))
+
+
+def _skip_empty(block):
+    while block is not None and not block.instructions:
+        block = block.next_block
+    return block
+
+
+def _falls_through(block) -> bool:
+    return not block.instructions or \
+        block.instructions[-1].opcode not in OPCODE_TERMINATOR
+
+
+class PeepholeOptimizer:
+    """
+    :param passes: the PEEPHOLE_* flags of the enabled passes
+    """
+
+    def __init__(self, passes: int = PEEPHOLE_ALL):
+        self._passes = passes
+        self._consts: List[object] = None
+        self._add_const: Callable[[object], int] = None
+
+    def _fold_const_tuple(self, top_block):
+        # LOAD_CONST a; LOAD_CONST b; BUILD_TUPLE 2 -> LOAD_CONST (a, b)
+        for block in _iter_blocks(top_block):
+            instructions = []
+
+            for instr in block.instructions:
+                size = instr.arg
+                if instr.opcode == BUILD_TUPLE and \
+                        len(instructions) >= size and \
+                        all(i.opcode == LOAD_CONST
+                            for i in instructions[len(instructions) - size:]):
+                    items = instructions[len(instructions) - size:]
+                    value = tuple(self._consts[i.arg] for i in items)
+                    del instructions[len(instructions) - size:]
+
+                    instr.opcode = LOAD_CONST
+                    instr.arg = self._add_const(value)
+                    instr.stack_effect = 1
+
+                instructions.append(instr)
+
+            block.instructions = instructions
+
+    def _remove_const_pop(self, top_block):
+        # LOAD_CONST a; POP_TOP -> (nothing)
+        for block in _iter_blocks(top_block):
+            instructions = []
+
+            for instr in block.instructions:
+                if instr.opcode == POP_TOP and instructions and \
+                        instructions[-1].opcode == LOAD_CONST:
+                    instructions.pop()
+                    continue
+
+                instructions.append(instr)
+
+            block.instructions = instructions
+
+    def _thread_target(self, target):
+        seen = set()
+
+        while target not in seen:
+            seen.add(target)
+
+            first = _skip_empty(target)
+            if first is None:
+                break
+
+            instr = first.instructions[0]
+            if instr.opcode not in _UNCONDITIONAL_JUMP:
+                break
+
+            target = instr.target
+
+        return target
+
+    def _thread_jumps(self, top_block):
+        # a jump to an unconditional jump goes to the final target directly
+        for block in _iter_blocks(top_block):
+            for instr in block.instructions:
+                if instr.opcode not in _THREADABLE_JUMP:
+                    continue
+
+                target = self._thread_target(instr.target)
+                if target is instr.target:
+                    continue
+
+                instr.target = target
+                if instr.opcode == JUMP_FORWARD:
+                    # the new target may be in front of this jump
+                    instr.opcode = JUMP_ABSOLUTE
+                    instr.is_jabs = True
+                    instr.is_jrel = False
+
+    def _remove_jump_to_next(self, top_block):
+        for block in _iter_blocks(top_block):
+            instructions = block.instructions
+            if not instructions or \
+                    instructions[-1].opcode not in _UNCONDITIONAL_JUMP:
+                continue
+
+            target = _skip_empty(instructions[-1].target)
+            if target is _skip_empty(block.next_block):
+                instructions.pop()
+
+    def _remove_dead_code(self, top_block):
+        for block in _iter_blocks(top_block):
+            for index, instr in enumerate(block.instructions):
+                if instr.opcode in OPCODE_TERMINATOR:
+                    del block.instructions[index + 1:]
+                    break
+
+        reachable = {top_block}
+        stack = [top_block]
+
+        while stack:
+            block = stack.pop()
+            successors = [instr.target for instr in block.instructions
+                          if instr.target is not None]
+            if _falls_through(block) and block.next_block is not None:
+                successors.append(block.next_block)
+
+            for succ in successors:
+                if succ not in reachable:
+                    reachable.add(succ)
+                    stack.append(succ)
+
+        # a reachable block never falls through to an unreachable one,
+        # so skipping the unreachable blocks keeps the fall through edges.
+        block = top_block
+        while block is not None:
+            next_block = block.next_block
+            while next_block is not None and next_block not in reachable:
+                next_block = next_block.next_block
+            block.next_block = next_block
+            block = next_block
+
+    def optimize(
+            self, top_block, consts: List[object],
+            add_const: Callable[[object], int]) -> Tuple[int, int]:
+        """
+        optimize the CFG starts from top_block in place.
+
+        :param consts: the constant table of the compile unit
+        :param add_const: the function to add a constant to consts
+        :return: the instruction count before and after the optimization
+        """
+        before = _count_instructions(top_block)
+
+        if not self._passes:
+            return before, before
+
+        self._consts = consts
+        self._add_const = add_const
+
+        passes = self._passes
+
+        if passes & PEEPHOLE_CONST_TUPLE:
+            self._fold_const_tuple(top_block)
+        if passes & PEEPHOLE_CONST_POP:
+            self._remove_const_pop(top_block)
+        if passes & PEEPHOLE_JUMP_THREADING:
+            self._thread_jumps(top_block)
+        if passes & PEEPHOLE_DEAD_CODE:
+            self._remove_dead_code(top_block)
+        if passes & PEEPHOLE_JUMP_THREADING:
+            self._remove_jump_to_next(top_block)
+
+        return before, _count_instructions(top_block)
+
+
+def format_peephole_report(stats: List[Tuple[str, int, int]]) -> str:
+    """
+    :param stats: (code name, instructions before, instructions after) list
+    """
+    lines = ['%-30s %8s %8s' % ('code', 'before', 'after')]
+    total_before = total_after = 0
+
+    for name, before, after in stats:
+        lines.append('%-30s %8d %8d' % (name, before, after))
+        total_before += before
+        total_after += after
+
+    lines.append('%-30s %8d %8d' % ('<total>', total_before, total_after))
+
+    return '\n'.join(lines)
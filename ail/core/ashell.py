@@ -57,9 +57,6 @@ def try_get_commit_id():
         return
 
 
-commit_id = try_get_commit_id()
-commit_id = None if not commit_id or len(commit_id) > 50 else commit_id
-
 error.ERR_NOT_EXIT = True
 error.THROW_ERROR_TO_PYTHON = True
 
@@ -78,7 +75,15 @@ _VER_STR = '%s [%s]' % (
 _WELCOME_STR = \
     '''AIL %s %s(Python %s)
 Type 'help(...)', '$help', 'copyright()', 'python_copyright()' to get more information, 'exit()' or '.exit' to exit.
-''' % (
+'''
+
+
+def _get_welcome_str() -> str:
+    # try_get_commit_id may run git, only do it when the shell starts
+    commit_id = try_get_commit_id()
+    commit_id = None if not commit_id or len(commit_id) > 50 else commit_id
+
+    return _WELCOME_STR % (
         _VER_STR,
         ('(%s) ' % commit_id) if commit_id else '',
         sys.version,
@@ -179,7 +184,7 @@ class Shell:
 
     @staticmethod
     def __print_welcome_text():
-        print(_WELCOME_STR)
+        print(_get_welcome_str())
 
     def __run_single_line_pyc(self, line: str, block: bool = False):
         try:
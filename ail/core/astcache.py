@@ -0,0 +1,257 @@
+# serialized AIL AST
+#
+# the tree of a source file can be saved to __ailcache__ beside the
+# source, so the tools which only need the AIL AST (the symbol analyzer,
+# the '-s' source dump, the bundle builder ...) load it instead of lexing
+# and parsing the file again. file format (little endian):
+#
+#   magic       4 bytes   b'AILT'
+#   format      4 bytes   AST_FORMAT
+#   version     4 bytes   AIL_VERSION_NUMBER
+#   flags       4 bytes   pyc_mode of the parser
+#   hash        8 bytes   importlib.util.source_hash(source)
+#   tree        ...       marshalled (types, root)
+#
+# types is a tuple of (class name, field names), root is the encoded tree,
+# each value in it is one of:
+#
+#   None, bool, int, float, complex, str, bytes
+#   (type index, field ...)    a node, ... for the fields not set
+#   (_LIST, item ...)          a list
+#   (_TUPLE, item ...)         a tuple
+#   (_REF, node index)         a node already encoded, the nodes are
+#                              numbered in the order of appearance
+
+import marshal
+import os
+import os.path
+
+from importlib.util import source_hash as _source_hash
+from typing import Optional
+
+from . import asts as ast
+from .aconfig import BYTECODE_CACHE, BYTECODE_CACHE_DIR
+from .version import AIL_VERSION_NUMBER
+
+
+AST_MAGIC = b'AILT'
+AST_FORMAT = 1
+AST_CACHE_SUFFIX = '.ast'
+
+_HEADER_SIZE = 24
+_CHECK_SIZE = 16  # the header without the source hash
+
+_LIST = -1
+_TUPLE = -2
+_REF = -3
+
+_SCALAR_TYPES = frozenset((
+    type(None), type(...), bool, int, float, complex, str, bytes))
+
+
+class ASTCacheError(Exception):
+    pass
+
+
+class _Encoder:
+    def __init__(self):
+        self.types = {}  # class -> type index
+        self.type_table = []
+        self.nodes = {}  # id(node) -> node index
+
+    def encode(self, value):
+        vtype = type(value)
+
+        if vtype in _SCALAR_TYPES:
+            return value
+        if vtype is list:
+            return (_LIST,) + tuple(map(self.encode, value))
+        if vtype is tuple:
+            return (_TUPLE,) + tuple(map(self.encode, value))
+        if vtype.__module__ != ast.__name__:
+            raise ASTCacheError(
+                'cannot serialize %s object' % vtype.__name__)
+
+        index = self.nodes.get(id(value))
+        if index is not None:
+            return _REF, index
+        self.nodes[id(value)] = len(self.nodes)
+
+        fields = ast.node_fields(vtype)
+        type_index = self.types.get(vtype)
+        if type_index is None:
+            type_index = self.types[vtype] = len(self.type_table)
+            self.type_table.append((vtype.__name__, fields))
+
+        return (type_index,) + tuple(
+            self.encode(getattr(value, name, ...)) for name in fields)
+
+
+class _Decoder:
+    def __init__(self, type_table: tuple):
+        self.types = []  # [(class, field names)]
+        self.nodes = []
+
+        for name, fields in type_table:
+            cls = getattr(ast, name, None)
+            if not isinstance(cls, type) or \
+                    cls.__module__ != ast.__name__ or \
+                    ast.node_fields(cls) != fields:
+                raise ASTCacheError('node %s has changed' % name)
+            self.types.append((cls, fields))
+
+    def decode(self, value):
+        if type(value) is not tuple:
+            return value
+
+        tag = value[0]
+        if tag == _LIST:
+            return [self.decode(v) for v in value[1:]]
+        if tag == _TUPLE:
+            return tuple(self.decode(v) for v in value[1:])
+        if tag == _REF:
+            return self.nodes[value[1]]
+
+        cls, fields = self.types[tag]
+        node = cls.__new__(cls)
+        self.nodes.append(node)
+
+        for name, field in zip(fields, value[1:]):
+            if field is not ...:
+                setattr(node, name, self.decode(field))
+
+        return node
+
+
+def _make_header(source: str, pyc_mode: bool) -> bytes:
+    return b''.join((
+        AST_MAGIC,
+        AST_FORMAT.to_bytes(4, 'little'),
+        AIL_VERSION_NUMBER.to_bytes(4, 'little'),
+        int(pyc_mode).to_bytes(4, 'little'),
+        _source_hash(source.encode('UTF-8')),
+    ))
+
+
+def dump_ast(tree: ast.AST, source: str, pyc_mode: bool = True) -> bytes:
+    """
+    :param source: the source of tree
+    :param pyc_mode: the pyc_mode of Parser.parse when tree is parsed
+    """
+    encoder = _Encoder()
+
+    try:
+        root = encoder.encode(tree)
+        data = marshal.dumps((tuple(encoder.type_table), root))
+    except (ValueError, RecursionError) as e:
+        raise ASTCacheError('cannot serialize the tree: %s' % e)
+
+    return _make_header(source, pyc_mode) + data
+
+
+def load_ast(data: bytes, source: str = None,
+             pyc_mode: bool = True) -> ast.AST:
+    """
+    :param source: the source of the tree, the source hash is not checked
+                   if it is None
+    :return: the tree dumped by dump_ast
+    """
+    header = _make_header('' if source is None else source, pyc_mode)
+    check_size = _CHECK_SIZE if source is None else _HEADER_SIZE
+
+    if data[:4] != AST_MAGIC:
+        raise ASTCacheError('not a serialized AIL AST')
+    if data[:12] != header[:12]:
+        raise ASTCacheError('the AST is dumped by another version of AIL')
+    if data[:check_size] != header[:check_size]:
+        raise ASTCacheError('the AST does not match the source')
+
+    try:
+        type_table, root = marshal.loads(data[_HEADER_SIZE:])
+        return _Decoder(type_table).decode(root)
+    except ASTCacheError:
+        raise
+    except (EOFError, ValueError, TypeError, IndexError) as e:
+        raise ASTCacheError('bad serialized AST: %s' % e)
+
+
+def ast_cache_path_from_source(path: str) -> str:
+    """
+    :return: <dir>/__ailcache__/<name>.ail-<version>.ast
+    """
+    head, tail = os.path.split(path)
+    name = '%s.ail-%s%s' % (
+        os.path.splitext(tail)[0], AIL_VERSION_NUMBER, AST_CACHE_SUFFIX)
+    return os.path.join(head, BYTECODE_CACHE_DIR, name)
+
+
+def load_cached_ast(
+        path: str, source: str, pyc_mode: bool = True) -> Optional[ast.AST]:
+    """
+    :return: cached tree of path if the cache is valid else None
+    """
+    if not BYTECODE_CACHE:
+        return None
+
+    try:
+        with open(ast_cache_path_from_source(path), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        return load_ast(data, source, pyc_mode)
+    except ASTCacheError:
+        return None
+
+
+def write_cached_ast(
+        path: str, source: str, tree: ast.AST,
+        pyc_mode: bool = True) -> bool:
+    """
+    :return: True if the cache file was written
+    """
+    if not BYTECODE_CACHE or not os.path.isfile(path):
+        return False
+
+    try:
+        data = dump_ast(tree, source, pyc_mode)
+    except ASTCacheError:
+        return False
+
+    cache_path = ast_cache_path_from_source(path)
+    tmp_path = '%s.%s.tmp' % (cache_path, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # cache directory not writable, just skip it
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+    return True
+
+
+def parse_cached(
+        source: str, path: str, pyc_mode: bool = True) -> ast.AST:
+    """
+    parse source like Parser().parse, load the tree from the cache if it
+    is valid, or parse it and write the cache.
+    """
+    tree = load_cached_ast(path, source, pyc_mode)
+    if tree is not None:
+        return tree
+
+    from .alex import Lex
+    from .aparser import Parser
+
+    tree = Parser().parse(Lex().lex(source, path), source, path, pyc_mode)
+    write_cached_ast(path, source, tree, pyc_mode)
+
+    return tree
@@ -4,18 +4,20 @@ from typing import List, Tuple
 
 
 class AST:
-    pass
+    __slots__ = ()
 
 
 class Expression(AST):
-    pass
+    __slots__ = ()
 
 
 class Statement(AST):
-    pass
+    __slots__ = ()
 
 
 class ArgItemAST:
+    __slots__ = ('expr', 'star', 'kw_star', 'default', 'ln', 'type_comment')
+
     def __init__(
             self, expr: 'Expression', star: bool, ln: int,
             default=None, kw_star=None):
@@ -31,6 +33,8 @@ class ArgItemAST:
 
 
 class ArgListAST:
+    __slots__ = ('arg_list', 'may_tuple', 'ln')
+
     def __init__(self, item_list: List[ArgItemAST], ln: int):
         self.arg_list = item_list
         self.may_tuple = False
@@ -38,6 +42,8 @@ class ArgListAST:
 
 
 class CellAST(Expression):
+    __slots__ = ('value', 'type', 'ln', 'symbol')
+
     def __init__(self,
                  value: object, _type: int, ln: int,
                  symbol=None):
@@ -53,6 +59,8 @@ class CellAST(Expression):
 
 
 class MemberAccessAST(Expression):
+    __slots__ = ('left', 'member', 'call_method', 'ln')
+
     def __init__(self, left: CellAST, member: CellAST, ln: int):
         self.left = left
         self.member = member
@@ -61,6 +69,8 @@ class MemberAccessAST(Expression):
 
 
 class UnaryExprAST(Expression):
+    __slots__ = ('op', 'expr', 'ln')
+
     def __init__(self, op: str, expr: MemberAccessAST, ln: int):
         self.op = op
         self.expr = expr
@@ -68,6 +78,8 @@ class UnaryExprAST(Expression):
 
 
 class PowerExprAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left: UnaryExprAST, right: List[UnaryExprAST], ln: int):
         self.left = left
         self.right = right
@@ -75,6 +87,8 @@ class PowerExprAST(Expression):
 
 
 class ModExprAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left: PowerExprAST, right: List[PowerExprAST], ln: int):
         self.left = left
         self.right = right
@@ -82,6 +96,8 @@ class ModExprAST(Expression):
 
 
 class MultDivExprAST(Expression):
+    __slots__ = ('op', 'left', 'right', 'ln')
+
     def __init__(self, op: str, left: ModExprAST, right: List[ModExprAST], ln: int):
         self.op = op
         self.left = left
@@ -90,6 +106,8 @@ class MultDivExprAST(Expression):
 
 
 class AddSubExprAST(Expression):
+    __slots__ = ('op', 'left', 'right', 'ln')
+
     def __init__(self, op: str,
                  left: MultDivExprAST,
                  right: List[Tuple[str, MultDivExprAST]], ln: int):
@@ -100,6 +118,8 @@ class AddSubExprAST(Expression):
 
 
 class GenericBinaryExprAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left, right: list, ln: int):
         self.left = left
         self.right = right
@@ -107,6 +127,8 @@ class GenericBinaryExprAST(Expression):
 
 
 class BitShiftExprAST(Expression):
+    __slots__ = ('op', 'left', 'right', 'ln')
+
     def __init__(self, op: str,
                  left: AddSubExprAST,
                  right: List[Tuple[str, AddSubExprAST]], ln: int):
@@ -117,6 +139,8 @@ class BitShiftExprAST(Expression):
 
 
 class BinXorExprAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self,
                  left: BitShiftExprAST,
                  right: List[Tuple[str, BitShiftExprAST]], ln: int):
@@ -126,6 +150,8 @@ class BinXorExprAST(Expression):
 
 
 class BitOpExprAST(Expression):
+    __slots__ = ('op', 'left', 'right', 'ln')
+
     def __init__(self, op: str,
                  left: BinXorExprAST,
                  right: List[Tuple[str, BinXorExprAST]], ln: int):
@@ -136,6 +162,8 @@ class BitOpExprAST(Expression):
 
 
 class CallExprAST(Expression):
+    __slots__ = ('left', 'arg_list', 'ln')
+
     def __init__(self, left: AddSubExprAST, arg_list: ArgListAST, ln: int):
         self.left = left
         self.arg_list = arg_list
@@ -143,6 +171,8 @@ class CallExprAST(Expression):
 
 
 class ValueListAST(AST):
+    __slots__ = ('value_list', 'ln')
+
     def __init__(self, v_list: list, ln: int):
         self.value_list = v_list
         self.ln = ln
@@ -152,6 +182,8 @@ class ValueListAST(AST):
 
 
 class AssignExprAST(Expression):
+    __slots__ = ('right', 'left', 'aug_assign', 'type_comment', 'ln')
+
     def __init__(self, left: Expression, right: Expression, ln: int,
                  aug_assign: bool = False):
         self.right = right
@@ -162,6 +194,8 @@ class AssignExprAST(Expression):
 
 
 class AnnAssignStmt(Statement):
+    __slots__ = ('target', 'annotation', 'value', 'ln')
+
     def __init__(self, 
             target: Expression, annotation: Expression, value: Expression,
             ln: int):
@@ -172,6 +206,8 @@ class AnnAssignStmt(Statement):
 
 
 class ReAssignStmt(Statement):
+    __slots__ = ('target', 'value', 'ln')
+
     def __init__(self, target: str, value: Expression, ln: int):
         self.target = target
         self.value = value
@@ -179,6 +215,8 @@ class ReAssignStmt(Statement):
 
 
 class DefineExprAST(Expression):
+    __slots__ = ('value', 'name', 'ln')
+
     def __init__(self, name: str, value: Expression, ln: int):
         self.value = value
         self.name = name
@@ -186,12 +224,16 @@ class DefineExprAST(Expression):
 
 
 class PrintStmtAST(Expression):
+    __slots__ = ('value_list', 'ln')
+
     def __init__(self, value_list: list, ln: int):
         self.value_list = value_list
         self.ln = ln
 
 
 class InputStmtAST(Expression):
+    __slots__ = ('msg', 'value_list', 'ln')
+
     def __init__(self, msg: Expression, val_list: ValueListAST, ln: int):
         self.msg = msg
         self.value_list = val_list
@@ -199,6 +241,8 @@ class InputStmtAST(Expression):
 
 
 class CmpTestAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left: Expression, right: list, ln: int):
         self.left = left
         self.right = right
@@ -206,6 +250,8 @@ class CmpTestAST(Expression):
 
 
 class AndTestAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left: CmpTestAST, right: list, ln: int):
         self.left = left
         self.right = right
@@ -213,6 +259,8 @@ class AndTestAST(Expression):
 
 
 class OrTestAST(Expression):
+    __slots__ = ('left', 'right', 'ln')
+
     def __init__(self, left: AndTestAST, right: list, ln: int):
         self.left = left
         self.right = right
@@ -220,12 +268,16 @@ class OrTestAST(Expression):
 
 
 class TestExprAST(Expression):
+    __slots__ = ('test', 'ln')
+
     def __init__(self, test: OrTestAST, ln: int):
         self.test = test
         self.ln = ln
 
 
 class BlockAST(AST):
+    __slots__ = ('stmts', 'ln', 'new')
+
     def __init__(self, stmts: list, ln: int, new: bool = False):
         self.stmts = stmts
         self.ln = ln
@@ -233,10 +285,21 @@ class BlockAST(AST):
 
 
 class ProgramBlock(BlockAST):
-    pass
+    __slots__ = ('stmt_token_index', 'end_token_index')
+
+    def __init__(self, stmts: list, ln: int, new: bool = False,
+                 stmt_token_index: list = None, end_token_index: int = -1):
+        super().__init__(stmts, ln, new)
+
+        # index of the first token of each statement in the token stream,
+        # used by incremental parsing.
+        self.stmt_token_index = stmt_token_index
+        self.end_token_index = end_token_index
 
 
 class IfStmtAST(Statement):
+    __slots__ = ('test', 'block', 'elif_list', 'else_block', 'ln')
+
     def __init__(self, test: TestExprAST,
                  block: BlockAST, elif_list: list, else_block: BlockAST, ln: int):
         self.test = test
@@ -247,6 +310,8 @@ class IfStmtAST(Statement):
 
 
 class WhileStmtAST(Statement):
+    __slots__ = ('test', 'block', 'ln')
+
     def __init__(self, test: TestExprAST, block: BlockAST, ln: int):
         self.test = test
         self.block = block
@@ -254,6 +319,8 @@ class WhileStmtAST(Statement):
 
 
 class DoLoopStmtAST(Statement):
+    __slots__ = ('test', 'block', 'ln')
+
     def __init__(self, test: TestExprAST, block: BlockAST, ln: int):
         self.test = test
         self.block = block
@@ -261,6 +328,12 @@ class DoLoopStmtAST(Statement):
 
 
 class FunctionDefineAST(Statement, Expression):
+    __slots__ = (
+        'name', 'param_list', 'block', 'bindto', 'decorator', 'ln', 'doc_str',
+        'is_lambda', 'lambda_return', 'type_comment', 'scope_effect', 'symbol',
+        'namespace_body',
+    )
+
     def __init__(self, name: str, param_list: ArgListAST,
                  block: BlockAST, bindto: str, ln: int,
                  doc_str='', symbol=None):
@@ -280,6 +353,11 @@ class FunctionDefineAST(Statement, Expression):
 
 
 class ClassDefineAST(Statement):
+    __slots__ = (
+        'name', 'func', 'bases', 'meta', 'doc_str', 'decorator', 'symbol',
+        'ln',
+    )
+
     def __init__(self,
                  name: str, func: FunctionDefineAST,
                  bases: List[Expression], meta: Expression, ln: int,
@@ -299,18 +377,24 @@ class ReturnStmtAST(Statement):
     return_stmt := 'return' expr
     """
 
+    __slots__ = ('expr', 'ln')
+
     def __init__(self, expr: Expression, ln: int):
         self.expr = expr
         self.ln = ln
 
 
 class GlobalStmtAST(Statement):
+    __slots__ = ('name', 'ln')
+
     def __init__(self, name: str, ln: int):
         self.name = name
         self.ln = ln
 
 
 class NonlocalStmtAST(Statement):
+    __slots__ = ('name', 'ln')
+
     def __init__(self, name: str, ln: int):
         self.name = name
         self.ln = ln
@@ -321,6 +405,8 @@ class ContinueStmtAST(Statement):
     continue_stmt := 'continue'
     """
 
+    __slots__ = ('ln',)
+
     def __init__(self, ln: int):
         self.ln = ln
 
@@ -330,6 +416,8 @@ class BreakStmtAST(Statement):
     break_stmt := 'break'
     """
 
+    __slots__ = ('ln',)
+
     def __init__(self, ln: int):
         self.ln = ln
 
@@ -339,28 +427,38 @@ class NullLineAST(Statement):
     null_line := NEWLINE
     """
 
+    __slots__ = ('ln',)
+
     def __init__(self, ln: int):
         self.ln = ln
 
 
 class EOFAST(AST):
+    __slots__ = ('ln',)
+
     def __init__(self, ln: int):
         self.ln = ln
 
 
 class ItemListAST(AST):
+    __slots__ = ('item_list', 'ln')
+
     def __init__(self, item_list: list, ln: int):
         self.item_list = item_list
         self.ln = ln
 
 
 class ListAST(Expression):
+    __slots__ = ('items', 'ln')
+
     def __init__(self, items: ItemListAST, ln: int):
         self.items = items
         self.ln = ln
 
 
 class TupleAST(Expression):
+    __slots__ = ('items', 'ln', 'store')
+
     def __init__(self, items: list, store: bool, ln: int):
         self.items = items
         self.ln = ln
@@ -368,6 +466,8 @@ class TupleAST(Expression):
 
 
 class DictAST(Expression):
+    __slots__ = ('keys', 'values', 'ln')
+
     def __init__(self, keys: list, values: list, ln :int):
         self.keys = keys
         self.values = values
@@ -375,6 +475,8 @@ class DictAST(Expression):
 
 
 class SubscriptExprAST(Expression):
+    __slots__ = ('expr', 'left', 'ln')
+
     def __init__(self, left: AddSubExprAST, expr: AddSubExprAST, ln: int):
         self.expr = expr
         self.left = left
@@ -382,12 +484,16 @@ class SubscriptExprAST(Expression):
 
 
 class LoadStmtAST(Statement):
+    __slots__ = ('path', 'ln')
+
     def __init__(self, path: str, ln: int):
         self.path = path
         self.ln = ln
 
 
 class ImportStmtAST(Statement):
+    __slots__ = ('path', 'name', 'ln', 'members', 'member_symbols', 'symbol')
+
     def __init__(self, path: str, name: str, ln: int, members: List[str] = None):
         self.path = path
         self.name = name
@@ -398,6 +504,8 @@ class ImportStmtAST(Statement):
 
 
 class StructDefineAST(Statement):
+    __slots__ = ('name', 'name_list', 'protected_list', 'ln')
+
     def __init__(self, name: str, name_list: list, protected_list: list, ln: int):
         self.name = name
         self.name_list = name_list
@@ -406,24 +514,32 @@ class StructDefineAST(Statement):
 
 
 class NotTestAST(Expression):
+    __slots__ = ('expr', 'ln')
+
     def __init__(self, expr: CmpTestAST, ln):
         self.expr = expr
         self.ln = ln
 
 
 class AssignExprListAST(AST):
+    __slots__ = ('expr_list', 'ln')
+
     def __init__(self, expr_list: list, ln):
         self.expr_list = expr_list
         self.ln = ln
 
 
 class BinaryExprListAST(AST):
+    __slots__ = ('expr_list', 'ln')
+
     def __init__(self, expr_list: list, ln):
         self.expr_list = expr_list
         self.ln = ln
 
 
 class ForStmtAST(Statement):
+    __slots__ = ('init_list', 'test', 'update_list', 'block', 'ln')
+
     def __init__(self, init_list: AssignExprListAST,
                  test: TestExprAST, update_list: BinaryExprListAST,
                  block: BlockAST, ln):
@@ -435,6 +551,8 @@ class ForStmtAST(Statement):
 
 
 class ThrowStmtAST(Statement):
+    __slots__ = ('expr', 'from_', 'ln')
+
     def __init__(self, expr: Expression, from_: Expression, ln: int):
         self.expr = expr
         self.from_ = from_
@@ -442,6 +560,8 @@ class ThrowStmtAST(Statement):
 
 
 class AssertStmtAST(Statement):
+    __slots__ = ('expr', 'msg', 'ln')
+
     def __init__(self, expr: TestExprAST, msg, ln: int):
         self.expr = expr
         self.msg = msg
@@ -449,6 +569,8 @@ class AssertStmtAST(Statement):
 
 
 class CatchCase(AST):
+    __slots__ = ('exc_expr', 'alias', 'block', 'alias_expr', 'ln')
+
     def __init__(self, exc_expr, alias, block, alias_expr, ln: int):
         self.exc_expr = exc_expr
         self.alias = alias
@@ -458,6 +580,8 @@ class CatchCase(AST):
 
 
 class TryCatchStmtAST(Statement):
+    __slots__ = ('try_block', 'catch_cases', 'finally_block', 'ln')
+
     def __init__(self, try_block: BlockAST,
                  catch_cases: List[CatchCase],
                  finally_block: BlockAST, ln: int):
@@ -468,18 +592,24 @@ class TryCatchStmtAST(Statement):
 
 
 class PyCodeBlock(AST):
+    __slots__ = ('code', 'ln')
+
     def __init__(self, code: str, ln: int):
         self.code = code
         self.ln = ln
 
 
 class StaticAssign(AST):
+    __slots__ = ('assign', 'ln')
+
     def __init__(self, assign: AssignExprAST, ln: int):
         self.assign = assign
         self.ln = ln
 
 
 class AssignModifier(AST):
+    __slots__ = ('assign', 'context', 'static', 'ln')
+
     def __init__(self, assign: AssignExprAST, static: bool, context: str, ln: int):
         self.assign = assign
         self.context = context
@@ -488,6 +618,8 @@ class AssignModifier(AST):
 
 
 class PropertyDefine(AST):
+    __slots__ = ('func', 'action', 'ln')
+
     def __init__(self, func: FunctionDefineAST, action: str, ln: int):
         self.func = func
         self.action = action
@@ -495,12 +627,16 @@ class PropertyDefine(AST):
 
 
 class InstanceProperty(AST):
+    __slots__ = ('assign', 'ln')
+
     def __init__(self, assign: AssignExprAST, ln: int):
         self.assign = assign
         self.ln = ln
 
 
 class MatchCase(AST):
+    __slots__ = ('patterns', 'expr', 'when_test', 'ln')
+
     def __init__(
             self, patterns: list, expr, ln: int, when_test: Expression = None):
         self.patterns = patterns
@@ -510,6 +646,8 @@ class MatchCase(AST):
 
 
 class MatchExpr(Expression):
+    __slots__ = ('target', 'cases', 'ln')
+
     def __init__(self, target, cases: List[MatchCase], ln: int):
         self.target = target
         self.cases = cases
@@ -517,6 +655,8 @@ class MatchExpr(Expression):
 
 
 class ObjectPatternExpr(Expression):
+    __slots__ = ('left', 'keys', 'values', 'ln')
+
     def __init__(self, left, keys: list, values: list, ln: int):
         self.left = left
         self.keys = keys
@@ -525,6 +665,8 @@ class ObjectPatternExpr(Expression):
 
 
 class NamespaceStmt(Statement):
+    __slots__ = ('block', 'ln', 'name', 'symbol')
+
     def __init__(self, name, block: BlockAST, ln: int):
         self.block = block
         self.ln = ln
@@ -533,12 +675,16 @@ class NamespaceStmt(Statement):
 
 
 class UsingStmt(Statement):
+    __slots__ = ('target', 'ln')
+
     def __init__(self, target, ln: int):
         self.target = target
         self.ln = ln
 
 
 class ForeachStmt(Statement):
+    __slots__ = ('target', 'iter', 'body', 'ln')
+
     def __init__(self, target, iter, body, ln: int):
         self.target = target
         self.iter = iter
@@ -547,6 +693,8 @@ class ForeachStmt(Statement):
 
 
 class SliceExpr(Expression):
+    __slots__ = ('start', 'stop', 'step', 'ln')
+
     def __init__(self, start, stop, step, ln: int):
         self.start = start
         self.stop = stop
@@ -555,6 +703,8 @@ class SliceExpr(Expression):
 
 
 class StarredExpr(Expression):
+    __slots__ = ('value', 'ln', 'store')
+
     def __init__(self, value, store: bool, ln: int):
         self.value = value
         self.ln = ln
@@ -562,6 +712,8 @@ class StarredExpr(Expression):
 
 
 class WithItem(Statement):
+    __slots__ = ('context_expr', 'optional_var', 'ln')
+
     def __init__(self, context_expr: Expression, optional_var: Expression, ln: int):
         self.context_expr = context_expr
         self.optional_var = optional_var
@@ -569,6 +721,8 @@ class WithItem(Statement):
 
 
 class WithStmt(Statement):
+    __slots__ = ('items', 'body', 'ln')
+
     def __init__(self, items: List[WithItem], body: BlockAST, ln: int):
         self.items = items
         self.body = body
@@ -576,6 +730,8 @@ class WithStmt(Statement):
 
 
 class IfExpr(Expression):
+    __slots__ = ('test', 'body', 'orelse', 'ln')
+
     def __init__(self,
                  test: Expression, body: Expression, orelse: Expression, ln: int):
         self.test = test
@@ -585,18 +741,24 @@ class IfExpr(Expression):
 
 
 class YieldExpr(Expression):
+    __slots__ = ('value', 'ln')
+
     def __init__(self, value: Expression, ln: int):
         self.value = value
         self.ln = ln
 
 
 class YieldFromExpr(Expression):
+    __slots__ = ('value', 'ln')
+
     def __init__(self, value: Expression, ln: int):
         self.value = value
         self.ln = ln
 
 
 class PyImportAlias(AST):
+    __slots__ = ('name', 'alias', 'symbol', 'ln')
+
     def __init__(self, name: str, alias: str, ln: int):
         self.name = name
         self.alias = alias
@@ -605,6 +767,8 @@ class PyImportAlias(AST):
 
 
 class PyImportFromStmt(Statement):
+    __slots__ = ('module', 'names', 'level', 'ln')
+
     def __init__(self, 
             module: str, names: List[PyImportAlias], level: int, ln: int):
         self.module = module
@@ -614,12 +778,16 @@ class PyImportFromStmt(Statement):
 
 
 class PyImportStmt(Statement):
+    __slots__ = ('names', 'ln')
+
     def __init__(self, names: List[PyImportAlias], ln: int):
         self.names = names
         self.ln = ln
 
 
 class PyASMExpr(Expression):
+    __slots__ = ('op', 'arg', 'effect', 'ln')
+
     def __init__(self, op: int, arg, effect: int, ln: int):
         self.op = op
         self.arg = arg
@@ -628,12 +796,16 @@ class PyASMExpr(Expression):
 
 
 class PyASMGroupExpr(Expression):
+    __slots__ = ('stmts', 'ln')
+
     def __init__(self, stmts: List[PyASMExpr], ln: int):
         self.stmts = stmts
         self.ln = ln
 
 
 class BlankNode(AST):
+    __slots__ = ('ln',)
+
     def __init__(self, ln: int):
         self.ln = ln
 
@@ -676,3 +848,53 @@ UNARY_EXPR_ASTS = (
     NotTestAST,
     UnaryExprAST,
 )
+
+
+_fields_cache = {}
+
+
+def node_fields(cls) -> tuple:
+    """
+    :return: the field names of the node class cls, in the order of
+             __slots__, the base classes first
+    """
+    fields = _fields_cache.get(cls)
+    if fields is None:
+        fields = _fields_cache[cls] = tuple(
+            name for c in reversed(cls.__mro__)
+            for name in c.__dict__.get('__slots__', ()))
+    return fields
+
+
+def iter_fields(node):
+    """
+    yield (name, value) of the fields of node, like ast.iter_fields. the
+    fields not set are skipped.
+    """
+    for name in node_fields(type(node)):
+        try:
+            yield name, getattr(node, name)
+        except AttributeError:  # not set
+            pass
+
+
+def is_node(obj) -> bool:
+    # not all nodes are subclass of AST (ArgListAST, CatchCase ...)
+    return type(obj).__module__ == __name__
+
+
+def _iter_nodes(value):
+    if is_node(value):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_nodes(item)
+
+
+def iter_child_nodes(node):
+    """
+    yield the direct child nodes of node, like ast.iter_child_nodes. the
+    lists and tuples in the fields are flattened.
+    """
+    for _, value in iter_fields(node):
+        yield from _iter_nodes(value)
@@ -1,7 +1,7 @@
 
 from copy import copy
 from os.path import split
-from inspect import isfunction, isbuiltin
+from types import BuiltinFunctionType, FunctionType
 from typing import List, Dict, Union
 
 from .objects import AILImporter as _AILImporter, AILStruct as _AILStruct, Namespace
@@ -9,6 +9,17 @@ from .objects import AILImporter as _AILImporter, AILStruct as _AILStruct, Names
 _IMPORTER = _AILImporter()
 
 
+def set_importer(importer: _AILImporter) -> _AILImporter:
+    """
+    set the importer used by ail_import.
+
+    :return: the old importer
+    """
+    global _IMPORTER
+    old, _IMPORTER = _IMPORTER, importer
+    return old
+
+
 def raise_exception(err_obj):
     raise err_obj
 
@@ -70,6 +81,26 @@ def ail_match(target, patterns: list, only_constant: bool = False) -> bool:
     return False
 
 
+# the types whose hash agrees with '==' on constant patterns
+_MATCH_TABLE_TYPES = frozenset((int, float, bool, str, bytes, type(None)))
+
+
+def ail_match_index(
+        table: dict, cases: tuple, target, default: int) -> int:
+    """
+    table: {pattern: case index}, cases: (patterns of case 0, ...)
+    :return: index of the first case which contains target, or default
+    """
+    if type(target) in _MATCH_TABLE_TYPES:
+        return table.get(target, default)
+
+    for index, patterns in enumerate(cases):
+        if target in patterns:
+            return index
+
+    return default
+
+
 def ail_input(prompt: str, value_count: int):
     m = input(prompt)
     if value_count == 1:
@@ -124,7 +155,7 @@ def bind_function(name: str, struct: _AILStruct):
         if not isinstance(struct, _AILStruct) or (
                 struct.__ail_as_instance__ or struct.__ail_as_object__):
             raise TypeError('function must bind on a struct')
-        elif not (isfunction(func) or isbuiltin(func)):
+        elif not isinstance(func, (FunctionType, BuiltinFunctionType)):
             raise TypeError('only function can be bound')
         struct.__bound_functions__[name] = func
         return func
@@ -0,0 +1,317 @@
+# incremental lexing & parsing for edited buffers
+#
+# 编辑器每次按键只修改源码的一小部分。给出上一次的 TokenStream, ProgramBlock
+# 和修改的行范围，只重新词法分析受影响的行，只重新语法分析包含这些行的
+# 顶层语句，其余语句 (和单词) 直接复用，行号按增加/删除的行数平移。
+#
+# 任何无法安全复用的情况 (多行字符串/注释跨越边界, 语法错误, feature
+# flag 改变 ...) 都会退回到完整的重新分析。
+
+from bisect import bisect_right
+from typing import List, Tuple
+
+from . import asts as ast
+from .alex import Lex, Token, TokenStream
+from .aparser import Parser
+from .feature import parse_feature_flag
+from .tokentype import (
+    AIL_DOC_STRING, AIL_ENTER, AIL_EOF, AIL_SEMI, AIL_STRING
+)
+
+
+_WIDEN_LIMIT = 3
+
+
+class _Fallback(Exception):
+    pass
+
+
+def parse_source(
+        source: str,
+        filename: str = '<string>') -> Tuple[TokenStream, ast.ProgramBlock]:
+    ts = Lex().lex(source, filename)
+    return ts, Parser().parse(ts, source, filename)
+
+
+def _line_starts(source: str) -> List[int]:
+    starts = [0]
+    index = source.find('\n')
+    while index != -1:
+        starts.append(index + 1)
+        index = source.find('\n', index + 1)
+    return starts
+
+
+def _token_key(tok: Token) -> tuple:
+    # the parser converts ';' to ENTER in place
+    ttype = AIL_ENTER if tok.ttype == AIL_SEMI else tok.ttype
+    return tok.value, ttype, tok.ln, tok.offset
+
+
+def _lex_region(text: str, filename: str, first_ln: int) -> List[Token]:
+    tokens = Lex().lex(text, filename).token_list
+
+    if len(tokens) == 1 and tokens[0].ttype == AIL_EOF:  # empty text
+        return []
+
+    for tok in tokens:
+        tok.ln += first_ln - 1
+
+    return tokens
+
+
+def _shift_lineno(node, delta: int, visited: set):
+    if id(node) in visited:
+        return
+    visited.add(id(node))
+
+    ln = getattr(node, 'ln', None)
+    if isinstance(ln, int) and ln > 0:
+        node.ln = ln + delta
+
+    for child in ast.iter_child_nodes(node):
+        _shift_lineno(child, delta, visited)
+
+
+class _Region:
+    def __init__(self, first: int, last: int, start_ln: int, end_ln: int):
+        self.first = first  # first statement
+        self.last = last  # last statement
+        self.start_ln = start_ln
+        self.end_ln = end_ln
+
+
+class _IncrementalParser:
+    def __init__(self, ts: TokenStream, tree: ast.ProgramBlock,
+                 old_source: str, new_source: str, filename: str):
+        if not isinstance(tree, ast.ProgramBlock) or \
+                tree.stmt_token_index is None or \
+                len(tree.stmt_token_index) != len(tree.stmts) or \
+                len(tree.stmts) == 0:
+            raise _Fallback
+
+        if parse_feature_flag(old_source) != parse_feature_flag(new_source):
+            raise _Fallback
+
+        self.tokens = ts.token_list
+        self.tree = tree
+        self.old_source = old_source
+        self.new_source = new_source
+        self.filename = filename
+
+        self.index = tree.stmt_token_index
+        self.nstmt = len(tree.stmts)
+        self.first_lines = [self.tokens[i].ln for i in self.index]
+
+        self.old_starts = _line_starts(old_source)
+        self.new_starts = _line_starts(new_source)
+
+    def __stmt_end(self, i: int) -> int:
+        """
+        :return: index after the last token (not ENTER) of statement i
+        """
+        tokens = self.tokens
+        start = self.index[i]
+        end = self.index[i + 1] if i + 1 < self.nstmt else len(tokens)
+
+        while end > start and tokens[end - 1].ttype in (AIL_ENTER, AIL_EOF):
+            end -= 1
+        return end
+
+    def __stmt_last_line(self, i: int) -> int:
+        tok = self.tokens[self.__stmt_end(i) - 1]
+        if tok.ttype == AIL_DOC_STRING:
+            return tok.ln + tok.value.rstrip('\n').count('\n')
+        return tok.ln
+
+    def __stmt_first_line(self, i: int) -> int:
+        tok = self.tokens[self.index[i]]
+        if tok.ttype == AIL_STRING:  # ln of string is the line it ends
+            return tok.ln - tok.value.count('\n')
+        return tok.ln
+
+    def __make_region(self, first: int, last: int) -> _Region:
+        start_ln = 1 if first == 0 else self.__stmt_last_line(first - 1) + 1
+        end_ln = len(self.old_starts) if last == self.nstmt - 1 \
+            else self.__stmt_first_line(last + 1) - 1
+        return _Region(first, last, start_ln, end_ln)
+
+    def __text(self, source: str, starts: List[int],
+               start_ln: int, end_ln: int, to_end: bool) -> str:
+        begin = starts[start_ln - 1]
+        if to_end or end_ln >= len(starts):
+            return source[begin:]
+        return source[begin:starts[end_ln]]
+
+    def __match_old_region(self, region: _Region) -> Tuple[int, int]:
+        """
+        :return: (index of the first token, token count) of region
+                 in the old token stream
+        """
+        at_end = region.last == self.nstmt - 1
+        text = self.__text(
+            self.old_source, self.old_starts,
+            region.start_ln, region.end_ln, at_end)
+
+        old = _lex_region(text, self.filename, region.start_ln)
+        if not at_end:
+            old = old[:-2]  # ENTER and EOF added by Lex
+        keys = [_token_key(tok) for tok in old]
+        count = len(keys)
+
+        tokens = self.tokens
+        p = self.index[region.first - 1] if region.first > 0 else 0
+        while p < len(tokens) and tokens[p].ln < region.start_ln:
+            p += 1
+
+        # the ENTER of the previous line may be counted to the prefix
+        for k in (p, p + 1):
+            if [_token_key(tok) for tok in tokens[k:k + count]] != keys:
+                continue
+
+            if region.first > 0 and not (
+                    self.__stmt_end(region.first - 1) <= k
+                    <= self.index[region.first]):
+                continue
+            if at_end:
+                if k + count != len(tokens):
+                    continue
+            elif not (self.__stmt_end(region.last) <= k + count
+                      <= self.index[region.last + 1]):
+                continue
+
+            return k, count
+
+        raise _Fallback
+
+    def __find_region(self, start_ln: int, end_ln: int) -> Tuple[_Region, int, int]:
+        first = max(bisect_right(self.first_lines, start_ln) - 1, 0)
+        last = max(bisect_right(self.first_lines, end_ln) - 1, first)
+
+        # one more statement at both side, for decorators and doc strings
+        for _ in range(_WIDEN_LIMIT):
+            first = max(first - 1, 0)
+            last = min(last + 1, self.nstmt - 1)
+
+            region = self.__make_region(first, last)
+            if region.start_ln > start_ln or region.end_ln < end_ln:
+                continue
+
+            try:
+                k, count = self.__match_old_region(region)
+            except _Fallback:
+                continue
+
+            return region, k, count
+
+        raise _Fallback
+
+    def reparse(self, start_ln: int, end_ln: int) -> Tuple[TokenStream, ast.ProgramBlock]:
+        region, k, count = self.__find_region(start_ln, end_ln)
+
+        delta = len(self.new_starts) - len(self.old_starts)
+        new_end_ln = region.end_ln + delta
+        at_end = region.last == self.nstmt - 1
+
+        if new_end_ln < region.start_ln - 1:
+            raise _Fallback
+
+        text = self.__text(
+            self.new_source, self.new_starts,
+            region.start_ln, new_end_ln, at_end)
+
+        # the lexer must be in the same state at the both side of region
+        if k > 0 and self.tokens[k - 1].ttype == AIL_DOC_STRING and \
+                text[:1] == '#':
+            raise _Fallback
+        if not at_end and (
+                text.endswith('\\\n') or
+                self.tokens[k + count].ttype == AIL_DOC_STRING):
+            raise _Fallback
+
+        new_tokens = _lex_region(text, self.filename, region.start_ln)
+        if not new_tokens:
+            raise _Fallback
+
+        first_tok = next(
+            (tok for tok in new_tokens if tok.ttype != AIL_ENTER), None)
+        if region.first > 0 and first_tok is not None and (
+                first_tok == 'begin' or
+                (first_tok.ttype == AIL_DOC_STRING and
+                 first_tok.value[:1] == '!')):
+            raise _Fallback
+
+        region_ts = TokenStream()
+        region_ts.token_list.extend(new_tokens)
+        region_tree = Parser().parse(
+            region_ts, self.new_source, self.filename)
+
+        if isinstance(region_tree, ast.ProgramBlock):
+            if region_tree.end_token_index < len(new_tokens) - 1:
+                raise _Fallback  # stopped by 'end'
+            region_stmts = region_tree.stmts
+            region_index = region_tree.stmt_token_index
+        else:
+            region_stmts = []
+            region_index = []
+
+        if not at_end:
+            new_tokens = new_tokens[:-2]  # ENTER and EOF
+
+        tokens = self.tokens
+        tree = self.tree
+        suffix = tokens[k + count:]
+
+        if delta:
+            for tok in suffix:
+                tok.ln += delta
+
+            visited = set()
+            for stmt in tree.stmts[region.last + 1:]:
+                _shift_lineno(stmt, delta, visited)
+
+        ts = TokenStream()
+        ts.token_list.extend(tokens[:k])
+        ts.token_list.extend(new_tokens)
+        ts.token_list.extend(suffix)
+
+        moved = len(new_tokens) - count
+        stmt_index = self.index[:region.first] + \
+            [k + i for i in region_index] + \
+            [i + moved for i in self.index[region.last + 1:]]
+
+        if at_end:
+            end_index = k + region_tree.end_token_index \
+                if isinstance(region_tree, ast.ProgramBlock) else len(ts) - 1
+        else:
+            end_index = tree.end_token_index + moved
+
+        stmts = tree.stmts[:region.first] + region_stmts + \
+            tree.stmts[region.last + 1:]
+
+        new_tree = ast.ProgramBlock(
+            stmts,
+            region_tree.ln if region.first == 0 else tree.ln,
+            tree.new, stmt_index, end_index)
+
+        return ts, new_tree
+
+
+def reparse(ts: TokenStream, tree: ast.ProgramBlock,
+            old_source: str, new_source: str,
+            start_ln: int, end_ln: int,
+            filename: str = '<string>') -> Tuple[TokenStream, ast.ProgramBlock]:
+    """
+    re-lex and re-parse new_source after lines start_ln ~ end_ln (1-based,
+    inclusive, in old_source) were replaced.
+
+    ts and tree are the result of parsing old_source, and they are reused
+    (and modified) by this function, do not use them after calling.
+
+    :return: (token stream, program block) of new_source
+    """
+    try:
+        parser = _IncrementalParser(ts, tree, old_source, new_source, filename)
+        return parser.reparse(start_ln, end_ln)
+    except (_Fallback, SyntaxError):
+        return parse_source(new_source, filename)
@@ -1,7 +1,6 @@
-from inspect import isfunction, isbuiltin
 from os import getcwd, chdir
 from os.path import dirname
-from types import MethodType
+from types import BuiltinFunctionType, FunctionType, MethodType
 from typing import List
 
 from ail.core import exceptions as _exceptions
@@ -41,6 +40,58 @@ class AILModule:
     __repr__ = __str__
 
 
+class LazyAILModule(AILModule):
+    """
+    a module that is executed on the first access of its attributes.
+
+    :param loader: a function returns the namespace of the module
+    """
+
+    def __init__(self, name: str, path: str, loader):
+        super().__init__(name, path, {})
+        self.__dict__['_$_loader'] = loader
+
+    def __getattr__(self, name: str):
+        # only called when the attribute not found
+        if '_$_loader' not in self.__dict__:
+            raise AttributeError(
+                'module \'%s\' has no attribute \'%s\'' %
+                (getattr(self, '_$_name'), name))
+
+        load_lazy_module(self)
+        return getattr(self, name)
+
+    def __setattr__(self, name: str, value):
+        if '_$_loader' in self.__dict__:
+            load_lazy_module(self)
+        super().__setattr__(name, value)
+
+    def __str__(self):
+        state = ' (not loaded)' if '_$_loader' in self.__dict__ else ''
+        return '<AILModule \'%s\' from \'%s\'%s>' % (
+            getattr(self, '_$_name'), getattr(self, '_$_path'), state
+        )
+
+    __repr__ = __str__
+
+
+def load_lazy_module(module: AILModule) -> AILModule:
+    """
+    execute a LazyAILModule if it is not loaded.
+    """
+    d = module.__dict__
+    loader = d.get('_$_loader')
+    if loader is None:
+        return module
+
+    ns = loader()
+    ns['_$_name'] = d['_$_name']
+    ns['_$_path'] = d['_$_path']
+    object.__setattr__(module, '__dict__', ns)
+
+    return module
+
+
 class AILImporter:
     def __init__(self):
         self.__loading_modules = []
@@ -71,6 +122,20 @@ class AILImporter:
             except TypeError:
                 raise ImportError('__export__ must be a dict or a iterable object')
 
+    def _load_module_namespace(self, name: str, path: str) -> dict:
+        # used by LazyAILModule, checks circular import like import_module
+        if path in self.__loading_modules:
+            raise ImportError('Cannot import module \'%s\' ' % name +
+                              '(may caused circular import)')
+
+        self.__loading_modules.append(path)
+
+        try:
+            ns = self.get_namespace(path, self.get_source(path))
+            return self.get_export(ns, ns.get('__export__', None))
+        finally:
+            self.__loading_modules.remove(path)
+
     def import_module(self,
                       mode: int, name: str, namespace: dict,
                       alias: str, members: List[str]):
@@ -81,6 +146,24 @@ class AILImporter:
             raise ImportError('Cannot import module \'%s\' ' % name +
                               '(may caused circular import)')
 
+        module_obj = _shared.loaded_modules.get(path)
+
+        if mode == 1 and not members and \
+                _shared.GLOBAL_SHARED_DATA.lazy_import:
+            # import 'x' -> a proxy, the module runs on the first access
+            if not isinstance(module_obj, AILModule):
+                module_obj = LazyAILModule(
+                    name, path,
+                    lambda: self._load_module_namespace(name, path))
+                _shared.loaded_modules[path] = module_obj
+
+            namespace[name] = module_obj
+            return
+
+        if isinstance(module_obj, LazyAILModule):
+            # imported lazily before, the members are needed now
+            load_lazy_module(module_obj)
+
         self.__loading_modules.append(path)
 
         try:
@@ -153,7 +236,7 @@ class AILImporter:
 
             chdir(module_work_dir)
 
-            status = _exec(source, path, module_globals, False)
+            status = _exec(source, path, module_globals, False, use_cache=True)
 
             return module_globals
         except FileNotFoundError as e:
@@ -180,7 +263,7 @@ class AILStruct:
         self.__init_members__()
 
     def __ail_check_bound__(self, instance, target, try_bound: bool = False):
-        is_func = isfunction(target) or isbuiltin(target)
+        is_func = isinstance(target, (FunctionType, BuiltinFunctionType))
         if not is_func:
             if try_bound:
                 return target
@@ -286,7 +369,7 @@ class Namespace:
         cell_dict = {}
         for k, v in ns.items():
             closure = getattr(v, '__closure__', None)
-            if isfunction(v) and closure is not None and \
+            if isinstance(v, FunctionType) and closure is not None and \
                     isinstance(closure, tuple):
                 free_vars = v.__code__.co_freevars
                 for i, cell in enumerate(closure):
@@ -1,11 +1,9 @@
 # python compatible
-import dis
 from sys import stderr
 
-from .acompile import Compiler, Assembler
-from .alex import Lex
-from .aparser import ASTConverter, Parser
+from .acache import load_cached_code, write_cached_code
 from .error import AILSyntaxError
+from .shared import GLOBAL_SHARED_DATA
 
 from . import AIL_PY_GLOBAL
 from ail.core.namespace import fill_namespace
@@ -31,6 +29,9 @@ class StopExec(BaseException):
 
 
 def _test_run():
+    from .alex import Lex
+    from .aparser import ASTConverter, Parser
+
     source = open('./tests/test.ail').read()
     l = Lex()
     ts = l.lex(source)
@@ -46,12 +47,16 @@ def _test_run():
 
 def _ail_exec(
         source: str, filename: str, globals: dict, main: bool = True,
-        compiler=CP_PY_AST) -> int:
+        compiler=CP_PY_AST, use_cache: bool = False) -> int:
     """
+    :param use_cache: filename is a real file, read & write __ailcache__
     :return: code: 0 -> ok | 1 -> exception occurred | 2 -> system exit
     """
 
-    code = ail_compile(source, filename, 'exec', compiler=compiler)
+    if use_cache:
+        code = ail_compile_cached(source, filename, 'exec', compiler=compiler)
+    else:
+        code = ail_compile(source, filename, 'exec', compiler=compiler)
 
     name = '__main__'
 
@@ -68,9 +73,12 @@ def _ail_exec(
     return 0
 
 
-def ail_exec(source: str, filename: str, globals: dict, compiler=CP_PY_AST) -> int:
+def ail_exec(
+        source: str, filename: str, globals: dict, compiler=CP_PY_AST,
+        use_cache: bool = False) -> int:
     try:
-        return _ail_exec(source, filename, globals, compiler=compiler)
+        return _ail_exec(
+            source, filename, globals, compiler=compiler, use_cache=use_cache)
     except Exception:
         print_py_traceback()
         return 1
@@ -80,6 +88,9 @@ def ail_exec(source: str, filename: str, globals: dict, compiler=CP_PY_AST) -> i
 
 
 def ail_parse_ail_ast(source: str, filename: str, mode: str, flags: int):
+    from .alex import Lex
+    from .aparser import Parser
+
     if mode not in AIL_CP_MODES:
         raise ValueError('compile mode must in (%s, %s %s)' %
                          tuple((repr(x) for x in AIL_CP_MODES)))
@@ -89,6 +100,8 @@ def ail_parse_ail_ast(source: str, filename: str, mode: str, flags: int):
 
 
 def ail_parse_pyast(source: str, filename: str, mode: str, flags: int):
+    from .aparser import ASTConverter
+
     converter = ASTConverter()
     conv_func = {
         'eval': converter.convert_eval,
@@ -100,6 +113,9 @@ def ail_parse_pyast(source: str, filename: str, mode: str, flags: int):
 
 
 def ail_eval(source, globals=None, locals=None):
+    from .alex import Lex
+    from .aparser import ASTConverter, Parser
+
     l = Lex()
     ts = l.lex(source, '<eval>')
 
@@ -117,8 +133,25 @@ def ail_eval(source, globals=None, locals=None):
     return eval(code, globals, locals)
 
 
+def _get_optimize_level(optimize: int) -> int:
+    if optimize < 0:
+        return GLOBAL_SHARED_DATA.optimize
+    return optimize
+
+
 def ail_compile(
-        source: str, filename: str, mode: str, flags: int = 0, compiler: int = CP_PY_AST):
+        source: str, filename: str, mode: str, flags: int = 0,
+        compiler: int = CP_PY_AST, optimize: int = -1):
+    """
+    :param optimize: AST optimization level, -1 -> the level set by '-O'.
+                     the native compile mode also runs the peephole
+                     optimizer when it > 0
+    """
+    # the front end is imported on demand, a run that loads the code
+    # from __ailcache__ does not need it.
+    from .alex import Lex
+    from .aoptimizer import optimize_ast
+    from .aparser import ASTConverter, Parser
 
     if compiler == CP_PY_CODE:
         from sys import version_info
@@ -136,6 +169,10 @@ def ail_compile(
     ts = Lex().lex(source, filename)
     node = Parser().parse(ts, source, filename, flags & CP_PY_AST == 1, eval_mode)
 
+    optimize = _get_optimize_level(optimize)
+    if optimize > 0:
+        node = optimize_ast(node)
+
     if compiler == CP_PY_AST:
         converter = ASTConverter()
         if single_mode:
@@ -147,7 +184,10 @@ def ail_compile(
                 converter.convert_module(node),
                 filename, 'eval' if eval_mode else 'exec')
     elif compiler == CP_PY_CODE:
-        compiler = Compiler()
+        from .acompile import Compiler, Assembler
+        from .apeephole import PEEPHOLE_ALL
+
+        compiler = Compiler(PEEPHOLE_ALL if optimize > 0 else 0)
         compiler.compile(node, source, filename, mode=mode)
         code = Assembler().assemble(compiler.unit.top_block, compiler)
     else:
@@ -156,6 +196,26 @@ def ail_compile(
     return code
 
 
+def ail_compile_cached(
+        source: str, filename: str, mode: str = 'exec', flags: int = 0,
+        compiler: int = CP_PY_AST, optimize: int = -1):
+    """
+    like ail_compile, but load / store the code object from __ailcache__
+    next to filename.
+    """
+
+    optimize = _get_optimize_level(optimize)
+
+    code = load_cached_code(filename, source, flags, compiler, optimize)
+    if code is not None:
+        return code
+
+    code = ail_compile(source, filename, mode, flags, compiler, optimize)
+    write_cached_code(filename, source, code, flags, compiler, optimize)
+
+    return code
+
+
 class PythonVersionError(Exception):
     pass
 
@@ -159,6 +159,14 @@ OPCODE_JUMP_REL = (
     SETUP_WITH,
 )
 
+# the next instruction of them is not reached by falling through
+OPCODE_TERMINATOR = (
+    RETURN_VALUE,
+    RAISE_VARARGS,
+    JUMP_ABSOLUTE,
+    JUMP_FORWARD,
+)
+
 OP_NAME = (
     LOAD_NAME,
     LOAD_GLOBAL
@@ -182,4 +190,102 @@ OP_JMP = (
     SETUP_FINALLY,
 )
 
+# the stack effects of Python 3.8, the same as compile.c: stack_effect().
+# OPCODE_STACK_EFFECT is the effect which compiler assumed, and it is not
+# accurate enough to compute co_stacksize.
+_FIXED_STACK_EFFECT = {
+    NOP: 0, EXTENDED_ARG: 0,
+    POP_TOP: -1, ROT_TWO: 0, ROT_THREE: 0, ROT_FOUR: 0,
+    DUP_TOP: 1, DUP_TOP_TWO: 2,
+    UNARY_POSITIVE: 0, UNARY_NEGATIVE: 0, UNARY_NOT: 0, UNARY_INVERT: 0,
+    SET_ADD: -1, LIST_APPEND: -1, MAP_ADD: -2,
+    BINARY_POWER: -1, BINARY_MULTIPLY: -1, BINARY_MATRIX_MULTIPLY: -1,
+    BINARY_MODULO: -1, BINARY_ADD: -1, BINARY_SUBTRACT: -1,
+    BINARY_SUBSCR: -1, BINARY_FLOOR_DIVIDE: -1, BINARY_TRUE_DIVIDE: -1,
+    INPLACE_FLOOR_DIVIDE: -1, INPLACE_TRUE_DIVIDE: -1,
+    INPLACE_ADD: -1, INPLACE_SUBTRACT: -1, INPLACE_MULTIPLY: -1,
+    INPLACE_MATRIX_MULTIPLY: -1, INPLACE_MODULO: -1,
+    STORE_SUBSCR: -3, DELETE_SUBSCR: -2,
+    BINARY_LSHIFT: -1, BINARY_RSHIFT: -1, BINARY_AND: -1,
+    BINARY_XOR: -1, BINARY_OR: -1, INPLACE_POWER: -1,
+    GET_ITER: 0, PRINT_EXPR: -1, LOAD_BUILD_CLASS: 1,
+    INPLACE_LSHIFT: -1, INPLACE_RSHIFT: -1, INPLACE_AND: -1,
+    INPLACE_XOR: -1, INPLACE_OR: -1,
+    WITH_CLEANUP_START: 2, WITH_CLEANUP_FINISH: -3,
+    RETURN_VALUE: -1, IMPORT_STAR: -1, SETUP_ANNOTATIONS: 0,
+    YIELD_VALUE: 0, YIELD_FROM: -1,
+    POP_BLOCK: 0, POP_EXCEPT: -3, END_FINALLY: -6,
+    STORE_NAME: -1, DELETE_NAME: 0,
+    STORE_ATTR: -2, DELETE_ATTR: -1, STORE_GLOBAL: -1, DELETE_GLOBAL: 0,
+    LOAD_CONST: 1, LOAD_NAME: 1, LOAD_ATTR: 0,
+    COMPARE_OP: -1, IMPORT_NAME: -1, IMPORT_FROM: 1,
+    JUMP_FORWARD: 0, JUMP_ABSOLUTE: 0,
+    POP_JUMP_IF_FALSE: -1, POP_JUMP_IF_TRUE: -1,
+    LOAD_GLOBAL: 1, BEGIN_FINALLY: 6, POP_FINALLY: -6,
+    LOAD_FAST: 1, STORE_FAST: -1, DELETE_FAST: 0,
+    LOAD_CLOSURE: 1, LOAD_DEREF: 1, LOAD_CLASSDEREF: 1,
+    STORE_DEREF: -1, DELETE_DEREF: 0,
+    GET_AWAITABLE: 0, BEFORE_ASYNC_WITH: 1,
+    GET_AITER: 0, GET_ANEXT: 1, GET_YIELD_FROM_ITER: 0,
+    END_ASYNC_FOR: -7, LOAD_METHOD: 1,
+}
+
+# (effect if not jump, effect if jump)
+_JUMP_STACK_EFFECT = {
+    SETUP_WITH: (1, 6),
+    FOR_ITER: (1, -1),
+    JUMP_IF_TRUE_OR_POP: (-1, 0),
+    JUMP_IF_FALSE_OR_POP: (-1, 0),
+    SETUP_FINALLY: (0, 6),
+    CALL_FINALLY: (0, 1),
+    SETUP_ASYNC_WITH: (0, 5),
+}
+
+_BUILD_OPCODES = (
+    BUILD_TUPLE, BUILD_LIST, BUILD_SET, BUILD_STRING,
+    BUILD_LIST_UNPACK, BUILD_TUPLE_UNPACK, BUILD_TUPLE_UNPACK_WITH_CALL,
+    BUILD_SET_UNPACK, BUILD_MAP_UNPACK, BUILD_MAP_UNPACK_WITH_CALL,
+)
+
+
+def stack_effect(opcode: int, oparg: int = 0, jump: bool = None) -> int:
+    """
+    like dis.stack_effect() of Python 3.8, but works on any Python.
+
+    :param jump: True -> the effect if jump, False -> if not jump,
+                 None -> the maximal effect of both cases
+    """
+    if opcode in _FIXED_STACK_EFFECT:
+        return _FIXED_STACK_EFFECT[opcode]
+
+    if opcode in _JUMP_STACK_EFFECT:
+        not_jump, do_jump = _JUMP_STACK_EFFECT[opcode]
+        if jump is None:
+            return max(not_jump, do_jump)
+        return do_jump if jump else not_jump
+
+    if opcode in _BUILD_OPCODES:
+        return 1 - oparg
+    if opcode == UNPACK_SEQUENCE:
+        return oparg - 1
+    if opcode == UNPACK_EX:
+        return (oparg & 0xff) + (oparg >> 8)
+    if opcode == BUILD_MAP:
+        return 1 - 2 * oparg
+    if opcode in (BUILD_CONST_KEY_MAP, RAISE_VARARGS, CALL_FUNCTION):
+        return -oparg
+    if opcode in (CALL_METHOD, CALL_FUNCTION_KW):
+        return -oparg - 1
+    if opcode == CALL_FUNCTION_EX:
+        return -1 - (oparg & 0x01)
+    if opcode == MAKE_FUNCTION:
+        return -1 - bin(oparg & 0x0f).count('1')
+    if opcode == BUILD_SLICE:
+        return -2 if oparg == 3 else -1
+    if opcode == FORMAT_VALUE:
+        return -1 if oparg & 0x04 else 0
+
+    raise ValueError('invalid opcode or oparg: %s %s' % (opcode, oparg))
+
+
 del _register_opcode
@@ -14,6 +14,8 @@ class _ShardData:
     ail_path: str = None
     boot_dir: str = None
     file_dir: str = None
+    optimize: int = 0  # AST optimization level, set by '-O'
+    lazy_import: bool = False  # import 'x' returns a lazy module
     prog_argv: _List[str] = list()
 
 
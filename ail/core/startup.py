@@ -0,0 +1,91 @@
+# startup profile of the AIL launcher: 'ail --startup-profile ...'
+#
+# runs the launcher again in 'python -X importtime' and reports the
+# modules that cost the most. the output of the program itself is kept.
+
+import os
+import subprocess
+import sys
+
+from time import perf_counter
+from typing import List, Tuple
+
+from .._config import AIL_DIR_PATH
+
+
+_IMPORT_TIME_PREFIX = 'import time:'
+
+
+def parse_import_time(lines: List[str]) -> List[Tuple[str, int, int, int]]:
+    """
+    :return: [(module name, depth, self time (us), cumulative time (us))]
+    """
+    result = []
+
+    for line in lines:
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+
+        fields = line[len(_IMPORT_TIME_PREFIX):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        result.append(
+            (name.strip(), depth, int(fields[0]), int(fields[1])))
+
+    return result
+
+
+def format_startup_report(
+        imports: List[Tuple[str, int, int, int]], wall_time: float,
+        top: int = 20) -> str:
+    total = sum(self_time for _, _, self_time, _ in imports)
+    ail_modules = [i for i in imports if i[0].split('.')[0] == 'ail']
+
+    lines = [
+        'startup profile',
+        '  run            %8.2f ms' % (wall_time * 1000),
+        '  imports        %8.2f ms  (%d modules)' % (
+            total / 1000, len(imports)),
+        '  ail modules    %8.2f ms  (%d modules)' % (
+            sum(i[2] for i in ail_modules) / 1000, len(ail_modules)),
+        '',
+        '  %10s %10s  module' % ('self [ms]', 'cum [ms]'),
+    ]
+
+    for name, _, self_time, cumulative in sorted(
+            imports, key=lambda i: i[3], reverse=True)[:top]:
+        lines.append('  %10.2f %10.2f  %s' % (
+            self_time / 1000, cumulative / 1000, name))
+
+    return '\n'.join(lines)
+
+
+def run_startup_profile(argv: List[str]) -> int:
+    """
+    run 'ail argv' with -X importtime and print the report to stderr.
+
+    :return: the exit code of the run
+    """
+    env = dict(os.environ)
+    package_dir = os.path.dirname(AIL_DIR_PATH)
+    env['PYTHONPATH'] = os.pathsep.join(
+        p for p in (package_dir, env.get('PYTHONPATH')) if p)
+
+    start = perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'ail'] + argv,
+        stderr=subprocess.PIPE, universal_newlines=True, env=env)
+    wall_time = perf_counter() - start
+
+    lines = proc.stderr.splitlines()
+    for line in lines:
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            print(line, file=sys.stderr)
+
+    print(format_startup_report(parse_import_time(lines), wall_time),
+          file=sys.stderr)
+
+    return proc.returncode
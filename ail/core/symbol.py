@@ -1,4 +1,4 @@
-from typing import List, Set, Union
+from typing import Dict, List, Set, Union
 
 from . import asts as ast
 
@@ -51,7 +51,7 @@ def _visit_param_list(
         symbol.from_flag = FROM_PARAMETER
         symbol_table.add_symbol(symbol)
         param.expr.symbol = symbol
-        symbol_table.store_symbols.append(symbol)
+        symbol_table.add_store_symbol(symbol)
         symbol_table.local_maybe.add(param.expr.value)
 
         if not param.star and not param.kw_star:
@@ -79,8 +79,11 @@ class Symbol:
 
 class SymbolTable:
     def __init__(self, name: str = 'top'):
-        self.store_symbols: List[Symbol] = []
-        self.symbols: List[Symbol] = []
+        # name -> symbol, in the order of insertion
+        self._store_symbols: Dict[str, Symbol] = {}
+        self._symbols: Dict[str, Symbol] = {}
+        # name -> result of _check_free
+        self._free_cache: Dict[str, bool] = {}
         self.global_directives: Set[str] = set()
         self.nonlocal_directives: Set[str] = set()
         self.prev_table: 'SymbolTable' = None
@@ -91,30 +94,48 @@ class SymbolTable:
         self.argcount = 0
         self.local_maybe: Set[str] = set()
 
+    @property
+    def store_symbols(self) -> List[Symbol]:
+        """
+        :return: the stored symbols, the latest one first
+        """
+        return list(self._store_symbols.values())[::-1]
+
+    @property
+    def symbols(self) -> List[Symbol]:
+        """
+        :return: the loaded symbols, the latest one first
+        """
+        return list(self._symbols.values())[::-1]
+
+    def get_symbol(self, name: str) -> Symbol:
+        return self._symbols.get(name)
+
     def is_local(self, symbol: Symbol) -> bool:
-        for s in self.store_symbols:
-            if s.name == symbol.name:
-                return True
-        return False
+        return symbol.name in self._store_symbols
 
     def is_global(self, symbol: Symbol) -> bool:
-        if self.prev_table is None:
-            # so this is the symbol table for global scope
-            for s in self.store_symbols:
-                if s.name == symbol.name:
-                    return True
-            return False
-        return self.prev_table.is_global(symbol)
+        table = self
+        while table.prev_table is not None:
+            table = table.prev_table
+        # so this is the symbol table for global scope
+        return symbol.name in table._store_symbols
 
     def _check_free(self, symbol: Symbol):
         if self.prev_table is None:
             # the global scope cannot check free variable
             return False
 
-        for s in self.store_symbols:
-            if s.name == symbol.name:
-                return True
-        return self.prev_table._check_free(symbol)
+        name = symbol.name
+        result = self._free_cache.get(name)
+        if result is None:
+            # an enclosing scope is visited completely before the scopes
+            # in it, so the result does not change after that.
+            result = name in self._store_symbols or \
+                self.prev_table._check_free(symbol)
+            self._free_cache[name] = result
+
+        return result
 
     def is_free(self, symbol: Symbol) -> int:
         assert self.prev_table is not None
@@ -122,19 +143,13 @@ class SymbolTable:
             return self.prev_table._check_free(symbol)
 
     def add_store_symbol(self, symbol: Symbol):
-        for sym in self.store_symbols:
-            if sym.name == symbol.name:
-                return
-        self.store_symbols.insert(0, symbol)
+        if symbol.name in self._store_symbols:
+            return
+        self._store_symbols[symbol.name] = symbol
+        self._free_cache.pop(symbol.name, None)
 
     def add_symbol(self, symbol: Symbol):
-        symbols = self.symbols
-
-        for sym in symbols:
-            if sym.name == symbol.name:
-                return
-
-        symbols.insert(0, symbol)
+        self._symbols.setdefault(symbol.name, symbol)
 
     def mangle(self, symbol: Symbol):
         name = symbol.name
@@ -217,14 +232,10 @@ class SymbolAnalyzer:
 
         assert ctx == CTX_LOAD
 
-        sym_name = symbol.name
-
-        for sym in self.__symbol_table.symbols:
-            if sym.name == sym_name:
-                if ignore_nonlocal and sym.flag & SYM_NONLOCAL:
-                    pass
-                else:
-                    return sym
+        sym = self.__symbol_table.get_symbol(symbol.name)
+        if sym is not None and \
+                not (ignore_nonlocal and sym.flag & SYM_NONLOCAL):
+            return sym
 
         if type(self.__symbol_table) is not SymbolTable and \
                 (self.__symbol_table.is_free(symbol) or
@@ -280,6 +291,12 @@ class SymbolAnalyzer:
                     Symbol(name.value), CTX_STORE, ignore_nonlocal)
                 name.symbol = s
                 self.__add_store_symbol(s)
+
+                # the names in the subscripts are loaded
+                if not isinstance(target.left, ast.CellAST):
+                    self._visit(target.left)
+                if isinstance(target, ast.SubscriptExprAST):
+                    self._visit(target.expr)
             else:
                 raise TypeError('invalid target type: %s' % type(target))
 
@@ -689,12 +706,13 @@ class SymbolAnalyzer:
         cellvars = self.__symbol_table.cellvars
         local_maybe = self.__symbol_table.local_maybe
 
-        for symbol in self.__symbol_table.store_symbols:
+        store_symbols = self.__symbol_table._store_symbols
+
+        for symbol in store_symbols.values():
             if symbol.namespace is not None:
                 assert type(symbol.namespace) is not SymbolTable
                 for var in symbol.namespace.freevars:
-                    if var in [
-                            sym.name for sym in self.__symbol_table.store_symbols]:
+                    if var in store_symbols:
                         cellvars.add(var)
                     else:
                         freevars.add(var)
@@ -725,10 +743,9 @@ class SymbolAnalyzer:
 
 
 def symtable(source, filename) -> SymbolTable:
-    from ail.core import aparser, alex
+    from ail.core.astcache import parse_cached
 
-    ts = alex.Lex().lex(source)
-    tree = aparser.Parser().parse(ts, source, filename)
+    tree = parse_cached(source, filename)
     analyzer = SymbolAnalyzer()
     return analyzer.visit_and_make_symbol_table(
             source, filename, tree)
@@ -0,0 +1,77 @@
+"""
+Benchmark of the serialized AST.
+
+Usage: python tests/benchmark/bench_ast_cache.py [repeat]
+
+Gets the trees of the .ail files under tests/ and ail/lib by lexing and
+parsing them, and by loading them with astcache.load_ast (the source hash
+is checked), and reports the time of both and the size of the dumps.
+"""
+
+import glob
+import os.path
+import sys
+
+from time import perf_counter
+
+from ail.core import astcache
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+CORPORA = ('tests', os.path.join('ail', 'lib'))
+
+
+def load_corpus() -> list:
+    """
+    :return: [(path, source, dumped tree)] of the files can be parsed
+    """
+    corpus = []
+
+    for directory in CORPORA:
+        for path in sorted(glob.glob(
+                os.path.join(_ROOT, directory, '**', '*.ail'),
+                recursive=True)):
+            with open(path, encoding='UTF-8') as f:
+                source = f.read()
+
+            try:
+                tree = Parser().parse(Lex().lex(source, path), source, path)
+            except (Exception, SystemExit):
+                continue
+
+            corpus.append((path, source, astcache.dump_ast(tree, source)))
+
+    return corpus
+
+
+def main(repeat: int = 5):
+    corpus = load_corpus()
+
+    parse_time = load_time = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        for path, source, _ in corpus:
+            Parser().parse(Lex().lex(source, path), source, path)
+        parse_time = min(parse_time, perf_counter() - start)
+
+        start = perf_counter()
+        for _, source, data in corpus:
+            astcache.load_ast(data, source)
+        load_time = min(load_time, perf_counter() - start)
+
+    size = sum(len(source.encode('UTF-8')) for _, source, _ in corpus)
+    dumped = sum(len(data) for _, _, data in corpus)
+
+    print('%d files, %d bytes of source, %d bytes dumped' % (
+        len(corpus), size, dumped))
+    print('lex + parse  %8.2f ms' % (parse_time * 1000))
+    print('load_ast     %8.2f ms  (%.1fx)' % (
+        load_time * 1000, parse_time / load_time))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,102 @@
+"""
+Benchmark of the memory of the AIL AST.
+
+Usage: python tests/benchmark/bench_ast_memory.py [n]
+
+Parses the n largest .ail files under tests/ and ail/lib (5 of each by
+default, the files can't be parsed are skipped) and reports the memory
+held by each tree in bytes per node. The files are lexed before tracing,
+only the tree is measured.
+"""
+
+import glob
+import os.path
+import sys
+import tracemalloc
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+CORPORA = ('tests', os.path.join('ail', 'lib'))
+
+
+def largest_files(directory: str) -> list:
+    paths = glob.glob(
+        os.path.join(_ROOT, directory, '**', '*.ail'), recursive=True)
+    return sorted(paths, key=os.path.getsize, reverse=True)
+
+
+def count_nodes(tree) -> int:
+    count = 0
+    seen = set()
+    stack = [tree]
+
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        count += 1
+
+        stack.extend(ast.iter_child_nodes(node))
+
+    return count
+
+
+def measure(path: str):
+    """
+    :return: (nodes, bytes) of the tree of path, None if it can't be parsed
+    """
+    with open(path, encoding='UTF-8') as f:
+        source = f.read()
+
+    try:
+        ts = Lex().lex(source, path)
+    except (Exception, SystemExit):
+        return None
+
+    tracemalloc.start()
+    try:
+        tree = Parser().parse(ts, source, path)
+        size = tracemalloc.get_traced_memory()[0]
+    except (Exception, SystemExit):
+        return None
+    finally:
+        tracemalloc.stop()
+
+    return count_nodes(tree), size
+
+
+def main(n: int = 5):
+    total_nodes = total_size = 0
+
+    for directory in CORPORA:
+        measured = 0
+
+        for path in largest_files(directory):
+            if measured == n:
+                break
+
+            result = measure(path)
+            if result is None:
+                continue
+            measured += 1
+
+            nodes, size = result
+            total_nodes += nodes
+            total_size += size
+            print('%-40s %6d nodes %9d bytes %7.1f bytes/node' % (
+                os.path.relpath(path, _ROOT), nodes, size, size / nodes))
+
+    print('%-40s %6d nodes %9d bytes %7.1f bytes/node' % (
+        '<total>', total_nodes, total_size, total_size / total_nodes))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
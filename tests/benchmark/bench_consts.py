@@ -0,0 +1,48 @@
+"""
+Benchmark of the constant table of the native compiler.
+
+Usage: python tests/benchmark/bench_consts.py [max_size]
+
+Compiling a data table with n different literal constants should take
+linear time.
+"""
+
+import sys
+
+from time import perf_counter
+
+from ail.core.acompile import Compiler
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+def data_table_source(n: int) -> str:
+    rows = ('    [%d, %d.5, "k%d"],\n' % (i, i, i) for i in range(n))
+    return 'table = [\n%s]\n' % ''.join(rows)
+
+
+def time_compile(source: str, repeat: int = 3) -> float:
+    tree = Parser().parse(Lex().lex(source, '<bench>'), source, '<bench>')
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        Compiler().compile(tree, source, '<bench>')
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def main(max_size: int = 8000):
+    last = None
+    size = max_size // 8
+    while size <= max_size:
+        t = time_compile(data_table_source(size))
+        ratio = '' if last is None else '(x%.2f)' % (t / last)
+        print('%6d rows: %8.2f ms %s' % (size, t * 1000, ratio))
+        last = t
+        size *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
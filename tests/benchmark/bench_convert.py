@@ -0,0 +1,63 @@
+"""
+Benchmark of the AIL AST -> Python AST conversion.
+
+Usage: python tests/benchmark/bench_convert.py [max_size]
+
+The conversion time should grow linearly with the size of the source,
+for both deeply nested expressions and long blocks.
+"""
+
+import sys
+
+from time import perf_counter
+
+from ail.core.alex import Lex
+from ail.core.aparser import Parser, ASTConverter
+
+
+def nested_expr_source(n: int) -> str:
+    # x = (1 + (1 + (1 + ... 1)))
+    return 'x = %s1%s\n' % ('(1 + ' * n, ')' * n)
+
+
+def nested_call_source(n: int) -> str:
+    # x = f(f(f(... 1)))
+    return 'x = %s1%s\n' % ('f(' * n, ')' * n)
+
+
+def long_block_source(n: int) -> str:
+    return ''.join('a%d = [%d, b + %d]\n' % (i, i, i) for i in range(n))
+
+
+def time_convert(source: str, repeat: int = 3) -> float:
+    tree = Parser().parse(Lex().lex(source, '<bench>'), source, '<bench>')
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        ASTConverter().convert_module(tree)
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def main(max_size: int = 400):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max_size * 80))
+
+    for name, make_source, scale in (
+            ('nested expression', nested_expr_source, 1),
+            ('nested call', nested_call_source, 1),
+            ('long block', long_block_source, 10)):
+        print(name)
+        last = None
+        size = max_size // 8
+        while size <= max_size:
+            t = time_convert(make_source(size * scale))
+            ratio = '' if last is None else '(x%.2f)' % (t / last)
+            print('  %6d: %8.2f ms %s' % (size * scale, t * 1000, ratio))
+            last = t
+            size *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
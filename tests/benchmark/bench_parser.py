@@ -0,0 +1,107 @@
+"""
+Benchmark of the parser.
+
+Usage: python tests/benchmark/bench_parser.py [repeat]
+
+Parses the .ail files under tests/ and ail/lib, and a generated file of
+long binary expressions, and reports the statements parsed per second.
+The files are lexed once, only the parse is timed.
+"""
+
+import glob
+import os.path
+import sys
+
+from time import perf_counter
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+CORPORA = ('tests', os.path.join('ail', 'lib'))
+
+
+def load_corpus(directory: str) -> list:
+    """
+    :return: [(path, source, token stream)] of the files can be parsed
+    """
+    corpus = []
+
+    for path in sorted(glob.glob(
+            os.path.join(_ROOT, directory, '**', '*.ail'), recursive=True)):
+        with open(path, encoding='UTF-8') as f:
+            source = f.read()
+
+        try:
+            ts = Lex().lex(source, path)
+            Parser().parse(ts, source, path)
+        except (Exception, SystemExit):
+            continue
+
+        corpus.append((path, source, ts))
+
+    return corpus
+
+
+def expression_corpus(n: int = 2000) -> list:
+    ops = ('+', '-', '*', '/', 'mod', '**', '<', '==', 'and', 'or', '|', '<<')
+    operands = ('b', 'c[1]', 'f(x)', '2', 'o.p')
+
+    lines = []
+    for i in range(n):
+        expr = ['a%d' % i]
+        for j in range(i % 6):
+            expr.append(ops[(i + j) % len(ops)])
+            expr.append(operands[(i * j) % len(operands)])
+        lines.append('x = %s\n' % ' '.join(expr))
+
+    source = ''.join(lines)
+    return [('<expressions>', source, Lex().lex(source, '<expressions>'))]
+
+
+def count_stmts(tree) -> int:
+    count = 0
+    stack = [tree]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.BlockAST):
+            count += sum(
+                1 for s in node.stmts
+                if not isinstance(s, (ast.NullLineAST, ast.EOFAST)))
+
+        stack.extend(ast.iter_child_nodes(node))
+
+    return count
+
+
+def time_parse(corpus: list, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        for path, source, ts in corpus:
+            Parser().parse(ts, source, path)
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def main(repeat: int = 5):
+    corpora = [(d, load_corpus(d)) for d in CORPORA]
+    corpora.append(('<expr>', expression_corpus()))
+
+    for name, corpus in corpora:
+        stmts = sum(count_stmts(Parser().parse(ts, source, path))
+                    for path, source, ts in corpus)
+
+        t = time_parse(corpus, repeat)
+        print('%-8s %4d files %6d stmts: %8.2f ms  %9.0f stmts/s' % (
+            name, len(corpus), stmts, t * 1000, stmts / t))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
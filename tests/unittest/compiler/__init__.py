@@ -0,0 +1,14 @@
+import os
+import os.path
+
+
+def write_tree(root: str, sources: dict):
+    """
+    write the files of sources ({path relative to root: source}) under
+    root, the directories are created if needed.
+    """
+    for name, source in sources.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='UTF-8') as f:
+            f.write(source)
@@ -0,0 +1,107 @@
+import os
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core import astcache
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+from ail.core.astcache import ASTCacheError
+
+
+S_MODULE = '''x = 1
+x += 2
+f = (a) -> a * 2
+
+fun g(a, b=[1, 2], *c) {
+    try {
+        return f(a) + b[0]
+    } catch Exception e {
+        print e
+    }
+}
+
+class C {
+    fun __private(self) {
+        return (1, 'a', 2.5)
+    }
+}
+'''
+
+
+def _parse(source: str, pyc_mode: bool = True):
+    return Parser().parse(
+        Lex().lex(source, '<test>'), source, '<test>', pyc_mode)
+
+
+class TestASTCache(TestCase):
+    def __assert_tree_equal(self, a, b, nodes: dict):
+        self.assertIs(type(a), type(b))
+
+        if isinstance(a, (list, tuple)):
+            self.assertEqual(len(a), len(b))
+            for x, y in zip(a, b):
+                self.__assert_tree_equal(x, y, nodes)
+        elif type(a).__module__ == ast.__name__:
+            if id(a) in nodes:
+                self.assertIs(nodes[id(a)], b)
+                return
+            nodes[id(a)] = b
+
+            fields_a = list(ast.iter_fields(a))
+            fields_b = list(ast.iter_fields(b))
+            self.assertEqual([name for name, _ in fields_a],
+                             [name for name, _ in fields_b])
+            for (_, x), (_, y) in zip(fields_a, fields_b):
+                self.__assert_tree_equal(x, y, nodes)
+        else:
+            self.assertEqual(a, b)
+
+    def test_round_trip(self):
+        for pyc_mode in (True, False):
+            tree = _parse(S_MODULE, pyc_mode)
+            data = astcache.dump_ast(tree, S_MODULE, pyc_mode)
+            self.__assert_tree_equal(
+                tree, astcache.load_ast(data, S_MODULE, pyc_mode), {})
+
+    def test_shared_node(self):
+        # the target of 'x += 2' is also the left of the binary expression
+        tree = astcache.load_ast(
+            astcache.dump_ast(_parse(S_MODULE), S_MODULE), S_MODULE)
+        assign = tree.stmts[1]
+        self.assertIs(assign.left, assign.right.left)
+
+    def test_check(self):
+        data = astcache.dump_ast(_parse(S_MODULE), S_MODULE)
+
+        self.assertRaises(
+            ASTCacheError, astcache.load_ast, data, S_MODULE + '\n')
+        self.assertRaises(
+            ASTCacheError, astcache.load_ast, data, S_MODULE, False)
+        self.assertRaises(
+            ASTCacheError, astcache.load_ast, b'AILC' + data[4:], S_MODULE)
+        self.assertRaises(
+            ASTCacheError, astcache.load_ast, data[:-10], S_MODULE)
+
+        # the source hash is not checked without source
+        self.assertIsInstance(astcache.load_ast(data), ast.ProgramBlock)
+
+    def test_cache_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'mod.ail')
+            with open(path, 'w', encoding='UTF-8') as f:
+                f.write(S_MODULE)
+
+            self.assertIsNone(astcache.load_cached_ast(path, S_MODULE))
+
+            tree = astcache.parse_cached(S_MODULE, path)
+            self.assertTrue(os.path.isfile(
+                astcache.ast_cache_path_from_source(path)))
+
+            cached = astcache.load_cached_ast(path, S_MODULE)
+            self.__assert_tree_equal(tree, cached, {})
+
+            self.assertIsNone(
+                astcache.load_cached_ast(path, S_MODULE + 'y = 1\n'))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+SOURCE = '''x = 1
+fun f(a, b=2) {
+    while a < b {
+        a += 1
+        break
+    }
+    return [a, b]
+}
+class C {
+    fun m(self) {
+        return self
+    }
+}
+'''
+
+
+class TestASTSlots(TestCase):
+    def test_no_dict(self):
+        tree = Parser().parse(Lex().lex(SOURCE, '<test>'), SOURCE, '<test>')
+        stack = [tree]
+
+        while stack:
+            node = stack.pop()
+            self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+            stack.extend(ast.iter_child_nodes(node))
+
+    def test_slots_are_tuples(self):
+        for name, value in vars(ast).items():
+            if isinstance(value, type) and value.__module__ == ast.__name__:
+                self.assertIsInstance(
+                    value.__dict__.get('__slots__'), tuple, name)
+
+    def test_iter_fields(self):
+        node = ast.AssignExprAST(
+            ast.CellAST('a', 0, 1), ast.CellAST(1, 1, 1), 1)
+        self.assertEqual(
+            [name for name, _ in ast.iter_fields(node)],
+            ['right', 'left', 'aug_assign', 'type_comment', 'ln'])
+
+        # the fields not set are skipped
+        del node.type_comment
+        self.assertNotIn(
+            'type_comment', dict(ast.iter_fields(node)))
+
+    def test_iter_child_nodes(self):
+        # the (op, node) tuples of a binary expression are flattened
+        tree = Parser().parse(Lex().lex(SOURCE, '<test>'), SOURCE, '<test>')
+        compare = tree.stmts[1].block.stmts[0].test.test
+        self.assertEqual(
+            [type(node).__name__ for node in ast.iter_child_nodes(compare)],
+            ['CellAST', 'CellAST'])
+        self.assertFalse(ast.is_node([compare]))
@@ -0,0 +1,100 @@
+import os
+import os.path
+import shutil
+import tempfile
+import zipfile
+
+from unittest import TestCase
+
+from ail.core.abundle import (
+    BundleError, BundleImporter, build_bundle, MANIFEST_NAME
+)
+from ail.core.functions import set_importer
+
+from tests.unittest.compiler import write_tree
+
+
+S_SOURCES = {
+    'main.ail': '''
+import 'lib/shape'
+load 'lib/consts'
+
+fun area(r) {
+    return shape.circle_area(r)
+}
+
+result = area(2)
+''',
+    'lib/shape.ail': '''
+import 'consts'
+
+fun circle_area(r) {
+    return consts.PI * r * r
+}
+''',
+    'lib/consts.ail': '''
+PI = 3
+E = 2
+''',
+    'cycle.ail': '''
+import 'cycle2'
+''',
+    'cycle2.ail': '''
+import 'cycle'
+''',
+}
+
+
+class TestBundle(TestCase):
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.__dir.name, 'app')
+        self.bundle = os.path.join(self.__dir.name, 'app.ailz')
+        write_tree(self.root, S_SOURCES)
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def _run(self, bundle: str) -> dict:
+        importer = BundleImporter(bundle)
+        old = set_importer(importer)
+        try:
+            ns = {}
+            importer.run_entry(ns)
+            return ns
+        finally:
+            set_importer(old)
+            importer.close()
+
+    def test_manifest(self):
+        builder = build_bundle(
+            os.path.join(self.root, 'main.ail'), self.bundle)
+
+        self.assertEqual(builder.unresolved, [])
+        self.assertEqual(
+            builder.modules['main.ail']['imports'],
+            {'lib/shape': 'lib/shape.ail', 'lib/consts': 'lib/consts.ail'})
+        self.assertEqual(
+            builder.modules['lib/shape.ail']['imports'],
+            {'consts': 'lib/consts.ail'})
+
+        with zipfile.ZipFile(self.bundle) as zf:
+            self.assertIn(MANIFEST_NAME, zf.namelist())
+            self.assertEqual(len(zf.namelist()), 4)
+
+    def test_run_without_sources(self):
+        build_bundle(os.path.join(self.root, 'main.ail'), self.bundle)
+        shutil.rmtree(self.root)
+
+        ns = self._run(self.bundle)
+        self.assertEqual(ns['result'], 12)
+        self.assertEqual(ns['E'], 2)
+
+    def test_circular_import(self):
+        build_bundle(os.path.join(self.root, 'cycle.ail'), self.bundle)
+        self.assertRaises(ImportError, self._run, self.bundle)
+
+    def test_bad_bundle(self):
+        with zipfile.ZipFile(self.bundle, 'w') as zf:
+            zf.writestr('x', 'y')
+        self.assertRaises(BundleError, BundleImporter, self.bundle)
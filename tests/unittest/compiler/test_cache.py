@@ -0,0 +1,95 @@
+import os
+import os.path
+import tempfile
+import traceback
+
+from unittest import TestCase
+
+from ail.core import acache, shared
+from ail.core.aloader import MAIN_LOADER
+from ail.core.objects import AILImporter
+from ail.core.pyexec import ail_compile_cached
+
+from tests.unittest.compiler import write_tree
+
+
+S_MODULE = '''
+a = 1 + 2
+'''
+
+S_RAISE = '''fun f() {
+    return 1 / 0
+}
+'''
+
+
+class TestBytecodeCache(TestCase):
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.__dir.name, 'mod.ail')
+        with open(self.path, 'w', encoding='UTF-8') as f:
+            f.write(S_MODULE)
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def test_write_and_load(self):
+        code = ail_compile_cached(S_MODULE, self.path)
+        cache_path = acache.cache_path_from_source(self.path, 1)
+        self.assertTrue(os.path.isfile(cache_path))
+
+        cached = acache.load_cached_code(self.path, S_MODULE)
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.co_code, code.co_code)
+
+        ns = {}
+        exec(cached, ns)
+        self.assertEqual(ns['a'], 3)
+
+    def test_stale_source(self):
+        ail_compile_cached(S_MODULE, self.path)
+
+        source = S_MODULE + 'b = 2\n'
+        with open(self.path, 'w', encoding='UTF-8') as f:
+            f.write(source)
+
+        self.assertIsNone(acache.load_cached_code(self.path, source))
+        self.assertIsNone(acache.load_cached_code(self.path, S_MODULE, 1))
+
+    def test_filename_of_cached_module(self):
+        root = self.__dir.name
+        path = os.path.join(root, 'sub', 'm.ail')
+        write_tree(root, {'sub/m.ail': S_RAISE})
+
+        # 'ail m.ail' in the directory of m.ail caches the code of 'm.ail'
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(path))
+        try:
+            ail_compile_cached(S_RAISE, 'm.ail')
+        finally:
+            os.chdir(cwd)
+
+        # then "load 'sub/m'" reads the cache from another directory
+        data = shared.GLOBAL_SHARED_DATA
+        old_find_path = data.find_path
+        data.find_path = [root]
+        MAIN_LOADER.invalidate_caches()
+        try:
+            ns = {}
+            AILImporter().import_module(0, 'sub/m', ns, None, [])
+            try:
+                ns['f']()
+            except ZeroDivisionError as e:
+                tb = e.__traceback__
+            else:
+                self.fail('ZeroDivisionError not raised')
+        finally:
+            data.find_path = old_find_path
+            MAIN_LOADER.invalidate_caches()
+            for loaded in list(shared.loaded_modules):
+                if loaded.startswith(root):
+                    del shared.loaded_modules[loaded]
+
+        frame = traceback.extract_tb(tb)[-1]
+        self.assertEqual(frame.filename, os.path.normpath(path))
+        self.assertEqual(frame.line, 'return 1 / 0')
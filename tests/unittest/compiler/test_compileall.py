@@ -0,0 +1,60 @@
+import os
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from ail.core import acache
+from ail.core.acompileall import (
+    compile_files, find_source_files, format_compile_report
+)
+
+from tests.unittest.compiler import write_tree
+
+
+S_SOURCES = {
+    'a.ail': 'a = 1 + 2\n',
+    'pkg/b.ail': 'fun f(x) {\n    return x * 2\n}\n',
+    'pkg/bad.ail': 'a = (1 + \n',
+    'pkg/readme.txt': 'not a source file\n',
+}
+
+
+class TestCompileAll(TestCase):
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.root = self.__dir.name
+        write_tree(self.root, S_SOURCES)
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def test_find(self):
+        names = ('a.ail', 'pkg/b.ail', 'pkg/bad.ail')
+        self.assertEqual(
+            find_source_files([self.root]), [self._path(n) for n in names])
+
+    def test_compile(self):
+        for workers in (1, 2):
+            results = compile_files(
+                find_source_files([self.root]), 1, force=True,
+                workers=workers)
+
+            self.assertEqual(
+                [r.error is None for r in results], [True, True, False])
+            self.assertIn('line', results[2].error)
+            self.assertTrue(os.path.isfile(
+                acache.cache_path_from_source(self._path('pkg/b.ail'), 1)))
+
+    def test_up_to_date(self):
+        files = find_source_files([self.root])
+        compile_files(files, 1, workers=1)
+        results = compile_files(files, 1, workers=1)
+
+        self.assertEqual([r.cached for r in results], [True, True, False])
+        self.assertIn(
+            '3 files, 0 compiled, 2 up to date, 1 errors',
+            format_compile_report(results))
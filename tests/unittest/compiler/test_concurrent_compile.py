@@ -0,0 +1,77 @@
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipUnless
+
+from ail.core.pyexec import ail_compile, CP_PY_AST, CP_PY_CODE
+
+
+_TEMPLATE = '''\
+class C%(i)d {
+    init(self, x) {
+        self.__x = x
+    }
+
+    fun get(self) {
+        return self.__x * %(i)d
+    }
+}
+
+fun f%(i)d(n) {
+    s = 0
+    for (i = 0; i < n; i += 1) {
+        if i mod 2 == 0 and not i > %(i)d {
+            s += i ** 2 - (i << 1)
+        } else {
+            s -= [i, %(i)d][1]
+        }
+    }
+    fun g(a) {
+        return a + s
+    }
+    return g(C%(i)d(n).get())
+}
+
+r = f%(i)d(%(n)d)
+'''
+
+
+def _source(i: int) -> str:
+    return _TEMPLATE % {'i': i, 'n': i % 7}
+
+
+class TestConcurrentCompile(TestCase):
+    def setUp(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible
+
+    def tearDown(self):
+        sys.setswitchinterval(self._switch_interval)
+
+    def _stress(self, compiler: int):
+        sources = [_source(i) for i in range(120)]
+        expected = [ail_compile(s, '<%d>' % i, 'exec', compiler=compiler)
+                    for i, s in enumerate(sources)]
+
+        def compile_one(i):
+            return ail_compile(
+                sources[i], '<%d>' % i, 'exec', compiler=compiler)
+
+        indexes = list(range(len(sources))) * 4
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(compile_one, indexes))
+
+        for i, code in zip(indexes, results):
+            self.assertEqual(code, expected[i])
+
+        ns = {}
+        exec(results[5], ns)
+        self.assertEqual(ns['r'], 23)  # s = -2, C5(5).get() = 25
+
+    def test_stress(self):
+        self._stress(CP_PY_AST)
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_stress_native(self):
+        self._stress(CP_PY_CODE)
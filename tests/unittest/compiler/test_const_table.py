@@ -0,0 +1,55 @@
+import sys
+
+from unittest import TestCase, skipUnless
+
+from ail.core.acompile import Assembler, CodeObjectBuffer, Compiler
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+def _compile(source: str) -> Compiler:
+    ts = Lex().lex(source, '<test>')
+    compiler = Compiler()
+    compiler.compile(
+        Parser().parse(ts, source, '<test>'), source, '<test>')
+    return compiler
+
+
+class TestConstTable(TestCase):
+    def test_equal_consts(self):
+        compiler = _compile(
+            'a = 1\nb = 1.0\nc = true\nd = 0.0\ne = -0.0\nf = 1\n')
+
+        self.assertEqual(
+            [repr(c) for c in compiler.unit.consts],
+            ['1', '1.0', 'True', '0.0', '-0.0', 'None'])
+
+    def test_names(self):
+        compiler = _compile('a = b\nb = a\na = c + b\n')
+        unit = compiler.unit
+
+        self.assertEqual(unit.names, ['b', 'a', 'c'])
+        self.assertEqual(
+            unit.name_index, {name: i for i, name in enumerate(unit.names)})
+
+    def test_buffer(self):
+        buf = CodeObjectBuffer()
+        indexes = [buf.add_const(c)
+                   for c in (1, True, 1.0, (1,), (True,), 1, [1], (1,))]
+
+        self.assertEqual(indexes, [0, 1, 2, 3, 4, 0, 5, 3])
+        self.assertEqual(buf.add_varname('x'), 0)
+        self.assertEqual(buf.add_varname('y'), 1)
+        self.assertEqual(buf.add_varname('x'), 0)
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_run(self):
+        source = 'fun f() {\n    return [1, 1.0, true, 0.0, -0.0]\n}\n'
+        compiler = _compile(source)
+        code = Assembler().assemble(compiler.unit.top_block, compiler)
+
+        ns = {}
+        exec(code, ns)
+        self.assertEqual(
+            [repr(v) for v in ns['f']()],
+            ['1', '1.0', 'True', '0.0', '-0.0'])
@@ -0,0 +1,59 @@
+import ast as pyast
+import sys
+
+from unittest import TestCase
+
+from ail.core.alex import Lex
+from ail.core.aparser import Parser, ASTConverter, _fix_missing_locations
+
+
+def _convert(source: str) -> pyast.Module:
+    ts = Lex().lex(source, '<test>')
+    return ASTConverter().convert_module(Parser().parse(ts, source, '<test>'))
+
+
+def _new_tree() -> pyast.Module:
+    call = pyast.Call(
+        func=pyast.Name(id='f', ctx=pyast.Load()),
+        args=[pyast.Constant(value=1), pyast.Name(id='a', ctx=pyast.Load())],
+        keywords=[])
+    call.args[1].lineno = 3
+    call.args[1].col_offset = 4
+    return pyast.Module(body=[pyast.Expr(value=call)], type_ignores=[])
+
+
+class TestConvertLocation(TestCase):
+    def test_fix_missing_locations(self):
+        expected = pyast.fix_missing_locations(_new_tree())
+        tree = _new_tree()
+        _fix_missing_locations(tree)
+
+        self.assertEqual(
+            pyast.dump(tree, include_attributes=True),
+            pyast.dump(expected, include_attributes=True))
+
+    def test_deep_nesting(self):
+        depth = 100
+        source = 'x = %s1%s\n' % ('(1 + ' * depth, ')' * depth)
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, depth * 80))
+        try:
+            tree = _convert(source)
+        finally:
+            sys.setrecursionlimit(limit)
+
+        for node in pyast.walk(tree):
+            if 'lineno' in node._attributes:
+                self.assertEqual(node.lineno, 1)
+                self.assertEqual(node.col_offset, 0)
+
+        ns = {}
+        exec(compile(tree, '<test>', 'exec'), ns)
+        self.assertEqual(ns['x'], depth + 1)
+
+    def test_lineno(self):
+        tree = _convert('a = 1\n\nb = [a, (a, 2)]\n')
+
+        self.assertEqual(tree.body[1].lineno, 3)
+        self.assertEqual(tree.body[1].value.lineno, 3)
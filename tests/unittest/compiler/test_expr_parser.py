@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+def _parse_expr(expr: str) -> ast.Expression:
+    source = 'x = %s\n' % expr
+    tree = Parser().parse(Lex().lex(source, '<test>'), source, '<test>')
+    return tree.stmts[0].right
+
+
+def _shape(node):
+    """
+    :return: the node as nested tuples, a name is its value
+    """
+    if isinstance(node, ast.CellAST):
+        return node.value
+    if isinstance(node, ast.UnaryExprAST):
+        return node.op, _shape(node.expr)
+    if isinstance(node, ast.NotTestAST):
+        return 'not', _shape(node.expr)
+    if isinstance(node, ast.TestExprAST):
+        return _shape(node.test)
+    if isinstance(node, (ast.AndTestAST, ast.OrTestAST)):
+        return (type(node).__name__, _shape(node.left),
+                [_shape(r) for r in node.right])
+    return (type(node).__name__, _shape(node.left),
+            [(op, _shape(r)) for op, r in node.right])
+
+
+class TestExprParser(TestCase):
+    def test_no_operator(self):
+        self.assertIsInstance(_parse_expr('a'), ast.CellAST)
+        self.assertIsInstance(_parse_expr('-a'), ast.UnaryExprAST)
+
+    def test_precedence(self):
+        cases = [
+            ('a + b * c',
+             ('AddSubExprAST', 'a', [('+', ('MultDivExprAST', 'b', [('*', 'c')]))])),
+            ('a * b + c',
+             ('AddSubExprAST', ('MultDivExprAST', 'a', [('*', 'b')]), [('+', 'c')])),
+            ('a - b + c - d',
+             ('AddSubExprAST', 'a', [('-', 'b'), ('+', 'c'), ('-', 'd')])),
+            ('a % b mod c ** d',
+             ('ModExprAST', 'a', [('mod', 'b'),
+                                  ('mod', ('PowerExprAST', 'c', [('**', 'd')]))])),
+            ('-a ** 2',
+             ('PowerExprAST', ('-', 'a'), [('**', '2')])),
+            ('a | b ^ c << d',
+             ('BitOpExprAST', 'a', [('|', ('BinXorExprAST', 'b', [
+                 ('^', ('BitShiftExprAST', 'c', [('<<', 'd')]))]))])),
+            ('a < b + 1 == c',
+             ('CmpTestAST', 'a', [('<', ('AddSubExprAST', 'b', [('+', '1')])),
+                                  ('==', 'c')])),
+            ('not a and b or c',
+             ('OrTestAST', ('AndTestAST', ('not', 'a'), ['b']), ['c'])),
+            ('a or not b < c and d',
+             ('OrTestAST', 'a', [('AndTestAST', ('not', (
+                 'CmpTestAST', 'b', [('<', 'c')])), ['d'])])),
+        ]
+
+        for expr, shape in cases:
+            self.assertEqual(_shape(_parse_expr(expr)), shape, expr)
+
+    def test_left_op(self):
+        expr = _parse_expr('a * b / c')
+        self.assertEqual(expr.op, '*')
+        self.assertEqual([op for op, _ in expr.right], ['*', '/'])
+
+    def test_error(self):
+        for expr in ('a +', 'a < < b', 'a and', 'a + not b'):
+            self.assertRaises(SyntaxError, _parse_expr, expr)
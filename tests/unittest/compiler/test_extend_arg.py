@@ -1,8 +1,71 @@
+import sys
 
-from unittest import TestCase
+from unittest import TestCase, skipUnless
 
-from ail.core.acompile import CodeObjectBuffer
-from ail.core.pyopcode import EXTENDED_ARG
+from ail.core.acompile import (
+    Assembler, BasicBlock, CodeObjectBuffer, Compiler, Instruction
+)
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+from ail.core.pyexec import CP_PY_CODE, ail_compile
+from ail.core.pyopcode import *
+
+
+def _compile(source: str) -> Compiler:
+    ts = Lex().lex(source, '<test>')
+    compiler = Compiler()
+    compiler.compile(
+        Parser().parse(ts, source, '<test>'), source, '<test>')
+    return compiler
+
+
+def _run(source: str) -> dict:
+    compiler = _compile(source)
+    code = Assembler().assemble(compiler.unit.top_block, compiler)
+
+    ns = {}
+    exec(code, ns)
+    return ns
+
+
+def _decode(code: bytes) -> list:
+    """
+    :return: [(offset of the first prefix, opcode, full argument)]
+    """
+    result = []
+    start = None
+    arg = 0
+
+    for offset in range(0, len(code), 2):
+        op, oparg = code[offset], code[offset + 1]
+        if start is None:
+            start = offset
+
+        arg = arg << 8 | oparg
+        if op == EXTENDED_ARG:
+            continue
+
+        result.append((start, op, arg))
+        start = None
+        arg = 0
+
+    return result
+
+
+def _line_starts(lnotab: bytes, line: int) -> list:
+    result = []
+    offset = 0
+
+    for ofs_inc, line_inc in zip(lnotab[::2], lnotab[1::2]):
+        if ofs_inc:
+            result.append((offset, line))
+            offset += ofs_inc
+        if line_inc >= 0x80:
+            line_inc -= 0x100
+        line += line_inc
+    result.append((offset, line))
+
+    return result
 
 
 class TestExtendedArg(TestCase):
@@ -10,3 +73,141 @@ class TestExtendedArg(TestCase):
         buf = CodeObjectBuffer()
         buf.add_bytecode(7, 280, 0)
         self.assertListEqual(buf.code, [EXTENDED_ARG, 280 >> 8, 7, 280 & 0xff])
+
+        buf = CodeObjectBuffer()
+        buf.add_bytecode(7, 0x12345, 0)
+        self.assertListEqual(
+            buf.code, [EXTENDED_ARG, 0x1, EXTENDED_ARG, 0x23, 7, 0x45])
+
+
+class TestAssembler(TestCase):
+    def _check_jumps(self, compiler: Compiler) -> list:
+        code, _ = Assembler().assemble_code_string(
+            compiler.unit.top_block, compiler)
+        decoded = _decode(code)
+
+        instructions = []
+        block = compiler.unit.top_block
+        while block is not None:
+            instructions.extend(block.instructions)
+            block = block.next_block
+
+        self.assertEqual(len(decoded), len(instructions))
+
+        starts = [offset for offset, _, _ in decoded] + [len(code)]
+        for index, instr in enumerate(instructions):
+            offset, op, arg = decoded[index]
+            self.assertEqual((op, arg), (instr.opcode, instr.arg))
+
+            if instr.target is None:
+                continue
+
+            target = starts[index + 1] + arg if instr.is_jrel else arg
+            self.assertIn(target, starts)
+            self.assertEqual(target, instr.target.offset)
+
+        return decoded
+
+    def test_many_consts(self):
+        source = ''.join('a%d = %d\n' % (i, i) for i in range(300))
+        decoded = self._check_jumps(_compile(source))
+
+        args = [arg for _, op, arg in decoded if op == LOAD_CONST]
+        self.assertEqual(args[-2], 299)
+
+    def test_long_jump(self):
+        body = ''.join('    a = %d\n' % i for i in range(400))
+        source = 'x = 0\nwhile x < 2 {\n%s    x += 1\n}\n' % body
+        decoded = self._check_jumps(_compile(source))
+
+        self.assertGreater(
+            max(arg for _, op, arg in decoded if op == POP_JUMP_IF_FALSE), 255)
+
+    def test_relaxation(self):
+        # growing the jump to 'u' moves 't' from 254 to 256, then the
+        # jump to 't' needs an EXTENDED_ARG as well.
+        compiler = _compile('')
+        top, t, u = BasicBlock(), BasicBlock(), BasicBlock()
+        top.next_block = t
+        t.next_block = u
+
+        top.add_instruction(
+            Instruction(JUMP_ABSOLUTE, is_jabs=True, target=t))
+        top.add_instruction(
+            Instruction(POP_JUMP_IF_FALSE, is_jabs=True, target=u))
+        for _ in range(125):
+            top.add_instruction(Instruction(NOP))
+        for _ in range(11):
+            t.add_instruction(Instruction(NOP))
+        u.add_instruction(Instruction(RETURN_VALUE))
+
+        code, _ = Assembler().assemble_code_string(top, compiler)
+        decoded = _decode(code)
+
+        self.assertEqual(decoded[0], (0, JUMP_ABSOLUTE, 258))
+        self.assertEqual(decoded[1], (4, POP_JUMP_IF_FALSE, 280))
+        self.assertEqual((t.offset, u.offset), (258, 280))
+        self.assertEqual(decoded[-1], (280, RETURN_VALUE, 0))
+
+    def test_lnotab(self):
+        items = ', '.join(str(i) for i in range(200))
+        source = 'a = [%s]\n%sb = 1\n' % (items, '\n' * 300)
+        compiler = _compile(source)
+
+        code, lnotab = Assembler().assemble_code_string(
+            compiler.unit.top_block, compiler)
+        starts = dict(_line_starts(lnotab, 1))
+
+        store_b = [offset for offset, op, arg in _decode(code)
+                   if op == STORE_NAME][1]
+        self.assertEqual(starts[store_b - 2], 302)
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_large_function(self):
+        body = ''.join(
+            '        s += %d\n        s -= %d.5\n' % (i, i) for i in range(600))
+        source = 'fun f(n) {\n    s = 0\n    for (i = 0; i < n; i += 1) {\n' \
+                 '%s    }\n    return s\n}\n' % body
+        self.assertEqual(_run(source)['f'](3), -900.0)
+
+    def test_stack_depth(self):
+        source = 'a = [1, 2, 3]\nfor (i = 0; i < 3; i += 1) {\n' \
+                 '    if a[i] > 1 {\n        a[i] = a[i] + 1\n    }\n}\n'
+        compiler = _compile(source)
+        Assembler().assemble_code_string(compiler.unit.top_block, compiler)
+
+        # calling range(0, 3, 1) needs 4 slots, the loop body needs less
+        self.assertEqual(compiler.unit.stack_size, 4)
+
+    def test_stack_effect(self):
+        self.assertEqual(stack_effect(LOAD_ATTR, 0), 0)
+        self.assertEqual(stack_effect(BUILD_LIST, 5), -4)
+        self.assertEqual(stack_effect(FOR_ITER, 0, True), -1)
+        self.assertEqual(stack_effect(FOR_ITER, 0, False), 1)
+        self.assertEqual(stack_effect(SETUP_FINALLY, 0), 6)
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_chained_compare(self):
+        self.assertIs(_run('r = 1 < 2 < 3\n')['r'], True)
+        self.assertIs(_run('r = 3 < 2 < 3\n')['r'], False)
+        self.assertIs(_run('x = 2\nr = 1 < x <= 3 != 4\n')['r'], True)
+        self.assertEqual(
+            _run('x = 2\nr = [1 < x > 3, 5]\n')['r'], [False, 5])
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_optimized_chained_compare(self):
+        # '-O' must not fold a chain as (a < b) < c
+        for source, value in (('r = 3 < 2 < 3\n', False),
+                              ('r = 1 < 3 < 2\n', False),
+                              ('x = 3\nr = 1 < 2 < x\n', True)):
+            ns = {}
+            exec(ail_compile(
+                source, '<test>', 'exec', compiler=CP_PY_CODE, optimize=1), ns)
+            self.assertIs(ns['r'], value)
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_break_in_finally(self):
+        source = 'r = 0\nforeach i in [1, 2, 3] {\n    try {\n' \
+                 '        if i == 2 {\n            break\n        }\n' \
+                 '    } finally {\n        r += 1\n    }\n}\n'
+        self.assertEqual(_run(source)['r'], 2)
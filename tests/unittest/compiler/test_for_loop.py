@@ -0,0 +1,111 @@
+import ast as pyast
+
+from unittest import TestCase
+
+from ail.core.alex import Lex
+from ail.core.aparser import Parser, ASTConverter
+from ail.core.pyexec import ail_compile
+
+
+S_RANGE = '''
+s = 0
+for (i = 0; i < 10; i += 2) {
+    s += i
+}
+'''
+
+S_WHILE = '''
+s = 0
+n = 10
+for (i = 0; i < n; i += 1) {
+    s += i
+}
+'''
+
+S_CONTINUE = '''
+s = 0
+n = 10
+for (i = 0; i < n; i += 1) {
+    if i mod 2 == 0 {
+        continue
+    }
+    s += i
+}
+'''
+
+S_BREAK = '''
+for (i = 10; i >= 0; i -= 3) {
+    if i == 4 {
+        break
+    }
+}
+for (j = 0; j < 5; j = j + 1) {
+    i = i
+}
+'''
+
+S_BREAK_CONTINUE = '''
+n = 10
+s = 0
+for (i = 0; i < n; i += 1) {
+    if i == 1 {
+        continue
+    }
+    if i == 3 {
+        break
+    }
+    s += i
+}
+'''
+
+
+def _convert(source: str) -> pyast.Module:
+    ts = Lex().lex(source, '<test>')
+    return ASTConverter().convert_module(Parser().parse(ts, source, '<test>'))
+
+
+def _run(source: str) -> dict:
+    ns = {}
+    exec(ail_compile(source, '<test>', 'exec'), ns)
+    return ns
+
+
+class TestForLoop(TestCase):
+    def test_range_loop(self):
+        loop = _convert(S_RANGE).body[1]
+        self.assertIsInstance(loop, pyast.For)
+
+        ns = _run(S_RANGE)
+        self.assertEqual(ns['s'], 20)
+        self.assertEqual(ns['i'], 10)
+
+    def test_no_continue(self):
+        loop = _convert(S_WHILE).body[-1]
+        self.assertIsInstance(loop, pyast.While)
+        self.assertFalse(any(isinstance(s, pyast.Try) for s in loop.body))
+
+        ns = _run(S_WHILE)
+        self.assertEqual((ns['s'], ns['i']), (45, 10))
+
+    def test_continue(self):
+        loop = _convert(S_CONTINUE).body[-1]
+        self.assertIsInstance(loop, pyast.While)
+        self.assertFalse(any(isinstance(s, pyast.Try) for s in loop.body))
+
+        # the update list runs before 'continue'
+        continue_if = loop.body[0]
+        self.assertIsInstance(continue_if.body[-1], pyast.Continue)
+        self.assertIsInstance(continue_if.body[-2], pyast.AugAssign)
+
+        ns = _run(S_CONTINUE)
+        self.assertEqual((ns['s'], ns['i']), (25, 10))
+
+    def test_break(self):
+        ns = _run(S_BREAK)
+        self.assertEqual(ns['i'], 4)
+        self.assertEqual(ns['j'], 5)
+
+    def test_break_and_continue(self):
+        # 'break' never runs the update list, even if there is 'continue'
+        ns = _run(S_BREAK_CONTINUE)
+        self.assertEqual((ns['s'], ns['i']), (2, 3))
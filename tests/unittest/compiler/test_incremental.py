@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core import incremental
+
+
+S_OLD = '''x = 1
+
+fun f(a) {
+    return a + 1
+}
+
+@dec
+fun g() {
+    print f(x)
+}
+
+y = g()
+'''
+
+
+class TestIncremental(TestCase):
+    def __tokens(self, ts):
+        return [(tok.value, tok.ttype, tok.ln, tok.offset) for tok in ts]
+
+    def __lines(self, tree) -> list:
+        """
+        :return: [(node type, ln)] of the nodes of tree, in pre-order
+        """
+        lines = []
+        stack = [tree]
+
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (list, tuple)):
+                stack.extend(reversed(node))
+            elif type(node).__module__ == ast.__name__:
+                lines.append((type(node).__name__, getattr(node, 'ln', None)))
+                stack.extend(
+                    value for _, value in reversed(list(ast.iter_fields(node))))
+
+        return lines
+
+    def __check(self, new_source: str, start_ln: int, end_ln: int):
+        ts, tree = incremental.parse_source(S_OLD)
+        new_ts, new_tree = incremental.reparse(
+            ts, tree, S_OLD, new_source, start_ln, end_ln)
+        full_ts, full_tree = incremental.parse_source(new_source)
+
+        self.assertListEqual(self.__tokens(new_ts), self.__tokens(full_ts))
+        self.assertListEqual(
+            new_tree.stmt_token_index, full_tree.stmt_token_index)
+        self.assertListEqual(
+            self.__lines(new_tree), self.__lines(full_tree))
+
+        return new_tree
+
+    def test_edit_line(self):
+        source = S_OLD.replace(
+            '    return a + 1\n', '    b = a\n    return b + 2\n')
+        tree = self.__check(source, 4, 4)
+        self.assertEqual(len(tree.stmts[1].block.stmts), 2)
+
+    def test_open_comment(self):
+        source = S_OLD.replace('fun g() {', '/* fun g() {\n */ fun g() {')
+        self.__check(source, 8, 8)
@@ -0,0 +1,68 @@
+import tempfile
+
+from unittest import TestCase
+
+from ail.core import shared
+from ail.core.aloader import MAIN_LOADER
+from ail.core.objects import AILImporter, LazyAILModule
+
+from tests.unittest.compiler import write_tree
+
+
+S_SOURCES = {
+    'a.ail': 'x = 1\nfun f() {\n    return x + 1\n}\n',
+    'c1.ail': 'import \'c2\'\ny = c2.x\n',
+    'c2.ail': 'import \'c1\'\nx = c1.y\n',
+}
+
+
+class TestLazyImport(TestCase):
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.root = self.__dir.name
+        write_tree(self.root, S_SOURCES)
+
+        data = shared.GLOBAL_SHARED_DATA
+        self.__old = data.find_path, data.lazy_import
+        data.find_path = [self.root]
+        data.lazy_import = True
+        MAIN_LOADER.invalidate_caches()
+
+    def tearDown(self):
+        data = shared.GLOBAL_SHARED_DATA
+        data.find_path, data.lazy_import = self.__old
+        MAIN_LOADER.invalidate_caches()
+
+        for path in list(shared.loaded_modules):
+            if path.startswith(self.root):
+                del shared.loaded_modules[path]
+
+        self.__dir.cleanup()
+
+    def test_lazy(self):
+        ns = {}
+        AILImporter().import_module(1, 'a', ns, 'a', [])
+
+        module = ns['a']
+        self.assertIsInstance(module, LazyAILModule)
+        self.assertIn('not loaded', repr(module))
+
+        self.assertEqual(module.f(), 2)
+        self.assertNotIn('not loaded', repr(module))
+        self.assertRaises(AttributeError, getattr, module, 'y')
+
+    def test_load_after_lazy(self):
+        importer = AILImporter()
+        ns = {}
+        importer.import_module(1, 'a', ns, 'a', [])
+        importer.import_module(0, 'a', ns, None, [])
+
+        self.assertEqual(ns['x'], 1)
+        self.assertIs(ns['f'].__globals__, ns['a'].__dict__)
+
+    def test_circular_import(self):
+        ns = {}
+        AILImporter().import_module(1, 'c1', ns, 'c1', [])
+
+        with self.assertRaises(ImportError):
+            ns['c1'].y
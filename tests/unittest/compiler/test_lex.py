@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from ail.core import alex
+
+
+S_TOKENS = '''
+// comment
+# doc string
+# line 2
+fun f(a, b) {
+    x = a ** 2 + b->c
+    y := `multi
+line` + r"raw\\n" + "esc\\t" + 'single'
+    if x >= 0x1F && y != .5 || not z in w {
+        return 1.5e+3 /* block
+        comment */ - -1
+    }
+    a <<= 1; b = f<>
+    return a \\
+        + b
+}
+'''
+
+
+class TestLex(TestCase):
+    def __tokens(self, source: str, regex_mode: bool):
+        ts = alex.Lex(regex_mode).lex(source, '<string>')
+        return [(tok.value, tok.ttype, tok.ln, tok.offset) for tok in ts]
+
+    def test_regex_mode(self):
+        self.assertListEqual(
+            self.__tokens(S_TOKENS, True), self.__tokens(S_TOKENS, False))
+
+    def test_regex_mode_lib(self):
+        from os import listdir
+        from os.path import join
+        from ail._config import LIB_PATH
+
+        for fn in listdir(LIB_PATH):
+            if not fn.endswith('.ail'):
+                continue
+            source = open(join(LIB_PATH, fn), encoding='UTF-8').read()
+            self.assertListEqual(
+                self.__tokens(source, True), self.__tokens(source, False))
+
+    def test_error(self):
+        for source in ('"abc', 'a /* b', 'a >< b'):
+            self.assertRaises(SyntaxError, alex.Lex().lex, source)
+
+    def test_token_stream(self):
+        ts = alex.Lex().lex('a not in b', '<string>')
+
+        self.assertEqual(ts[1].ttype, alex.AIL_NOT_IN)
+        self.assertEqual(ts[100].ttype, alex.AIL_EOF)
+        self.assertFalse(hasattr(ts[0], '__dict__'))
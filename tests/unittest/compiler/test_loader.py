@@ -0,0 +1,121 @@
+import os
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from ail.core import shared
+from ail.core.aloader import ModuleLoader
+
+
+class TestModuleLoader(TestCase):
+    def setUp(self):
+        self.__dir_a = tempfile.TemporaryDirectory()
+        self.__dir_b = tempfile.TemporaryDirectory()
+        self.dir_a = self.__dir_a.name
+        self.dir_b = self.__dir_b.name
+
+        self.__find_path = shared.GLOBAL_SHARED_DATA.find_path
+        shared.GLOBAL_SHARED_DATA.find_path = [self.dir_a]
+
+    def tearDown(self):
+        shared.GLOBAL_SHARED_DATA.find_path = self.__find_path
+        self.__dir_a.cleanup()
+        self.__dir_b.cleanup()
+
+    def __touch(self, dir_: str, name: str) -> str:
+        path = os.path.join(dir_, name)
+        open(path, 'w').close()
+        return path
+
+    def test_search(self):
+        loader = ModuleLoader()
+        path = self.__touch(self.dir_a, 'm.ail')
+
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+        self.assertIsNone(loader.search_module('n'))
+
+    def test_find_path_changed(self):
+        loader = ModuleLoader()
+        self.__touch(self.dir_a, 'm.ail')
+        path = self.__touch(self.dir_b, 'm.ail')
+
+        loader.search_module('m')
+
+        shared.GLOBAL_SHARED_DATA.find_path.insert(0, self.dir_b)
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_directory_changed(self):
+        loader = ModuleLoader()
+        self.assertIsNone(loader.search_module('m'))
+
+        path = self.__touch(self.dir_a, 'm.py')
+        # make sure the mtime of directory changed
+        os.utime(self.dir_a, ns=(0, 0))
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_module_removed(self):
+        loader = ModuleLoader()
+        path = self.__touch(self.dir_a, 'm.ail')
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+        os.remove(path)
+        self.assertIsNone(loader.search_module('m'))
+
+    def test_module_shadowed(self):
+        loader = ModuleLoader()
+        shared.GLOBAL_SHARED_DATA.find_path.append(self.dir_b)
+        self.__touch(self.dir_b, 'm.ail')
+        loader.search_module('m')
+
+        # a new module in the first search directory hides the cached one
+        path = self.__touch(self.dir_a, 'm.ail')
+        os.utime(self.dir_a, ns=(0, 0))
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_probe_on_miss(self):
+        loader = ModuleLoader()
+        self.assertIsNone(loader.search_module('m'))
+
+        # the listing is not refreshed if the mtime does not change, a miss
+        # still finds the file by probing
+        mtime = os.stat(self.dir_a).st_mtime_ns
+        path = self.__touch(self.dir_a, 'm.ail')
+        os.utime(self.dir_a, ns=(mtime, mtime))
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_case_insensitive(self):
+        path = self.__touch(self.dir_a, 'm.ail')
+        if not os.path.isfile(os.path.join(self.dir_a, 'M.ail')):
+            self.skipTest('the file system is case sensitive')
+
+        loader = ModuleLoader()
+        self.assertIsNotNone(loader.search_module('M'))
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_extension_order(self):
+        loader = ModuleLoader()
+        shared.GLOBAL_SHARED_DATA.find_path.append(self.dir_b)
+        self.__touch(self.dir_a, 'm.py')
+        path = self.__touch(self.dir_b, 'm.ail')
+
+        self.assertEqual(loader.search_module('m'), os.path.normpath(path))
+
+    def test_py_module_cached(self):
+        loader = ModuleLoader()
+        path = os.path.join(self.dir_a, 'pym.py')
+        with open(path, 'w') as f:
+            f.write('_IS_AIL_MODULE_ = True\n'
+                    '_AIL_NAMESPACE_ = {"obj": object()}\n')
+
+        ns_a = loader.get_py_namespace(path)
+        ns_b = loader.get_py_namespace(path)
+
+        self.assertIsNot(ns_a, ns_b)
+        self.assertIs(ns_a['obj'], ns_b['obj'])
+
+    def test_not_ail_module(self):
+        loader = ModuleLoader()
+        path = self.__touch(self.dir_a, 'notmod.py')
+
+        self.assertRaises(ModuleNotFoundError, loader.get_py_namespace, path)
@@ -0,0 +1,85 @@
+import ast as pyast
+
+from unittest import TestCase
+
+from ail.core.alex import Lex
+from ail.core.aparser import Parser, ASTConverter
+from ail.core.exceptions import UnhandledMatchError
+from ail.core.functions import ail_match_index
+from ail.core.pyexec import ail_compile
+
+
+S_CONSTANT_MATCH = '''
+fun decode(op) {
+    return match op {
+        0: 'nop',
+        1, 2: 'push',
+        3: 'pop',
+        'x', 1.5: 'other',
+        else: 'unknown'
+    }
+}
+
+fun strict(op) {
+    return match op { 1: 'one', 2: 'two' }
+}
+'''
+
+S_WHEN_MATCH = '''
+x = 2
+
+fun f(v) {
+    return match v { 1: 'one', x: 'x', when v > 5: 'big', else: 'other' }
+}
+'''
+
+
+def _convert(source: str) -> pyast.Module:
+    ts = Lex().lex(source, '<test>')
+    return ASTConverter().convert_module(Parser().parse(ts, source, '<test>'))
+
+
+def _run(source: str) -> dict:
+    ns = {}
+    exec(ail_compile(source, '<test>', 'exec'), ns)
+    return ns
+
+
+class TestMatchDispatch(TestCase):
+    def test_table(self):
+        body = _convert(S_CONSTANT_MATCH).body
+
+        table = body[0]
+        self.assertIsInstance(table.value, pyast.Dict)
+        self.assertEqual(len(table.value.keys), 6)
+
+    def test_constant_match(self):
+        decode = _run(S_CONSTANT_MATCH)['decode']
+
+        self.assertEqual(
+            [decode(v) for v in (0, 1, 2, 3, 'x', 1.5, 1.0, True, 9, [1])],
+            ['nop', 'push', 'push', 'pop', 'other', 'other', 'push', 'push',
+             'unknown', 'unknown'])
+
+    def test_unhandled(self):
+        strict = _run(S_CONSTANT_MATCH)['strict']
+
+        self.assertEqual(strict(2), 'two')
+        self.assertRaises(UnhandledMatchError, strict, 3)
+
+    def test_sequential_match(self):
+        # 'when' and name patterns keep the sequential semantics
+        first = _convert(S_WHEN_MATCH).body[0]
+        self.assertNotIsInstance(first.value, pyast.Dict)
+
+        f = _run(S_WHEN_MATCH)['f']
+        self.assertEqual(
+            [f(v) for v in (1, 2, 9, 4)], ['one', 'x', 'big', 'other'])
+
+    def test_match_index(self):
+        table = {1: 0, 2: 0, 'a': 1}
+        cases = ((1, 2), ('a',))
+
+        self.assertEqual(ail_match_index(table, cases, 2, 2), 0)
+        self.assertEqual(ail_match_index(table, cases, 'b', 2), 2)
+        self.assertEqual(ail_match_index(table, cases, [1], 2), 2)
@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aoptimizer import optimize_ast
+from ail.core.aparser import Parser
+from ail.core.pyexec import ail_compile
+
+
+def _optimize(source: str) -> ast.ProgramBlock:
+    ts = Lex().lex(source, '<test>')
+    return optimize_ast(Parser().parse(ts, source, '<test>'))
+
+
+def _run(source: str, optimize: int) -> dict:
+    ns = {}
+    exec(ail_compile(source, '<test>', 'exec', optimize=optimize), ns)
+    return ns
+
+
+S_FOLD = '''
+a = 60 * 60 * 24
+b = 'a' + 'b' * 2
+c = 2 ** 3 ** 2
+d = 1 < 2
+e = -(10 - 3 - 2)
+f = x + 1 + 2
+'''
+
+S_DEAD_BRANCH = '''
+if false {
+    a = 1
+} else {
+    a = 2
+}
+while false {
+    a = 3
+}
+fun f() {
+    if false {
+        b = 1
+    }
+}
+'''
+
+S_MATCH = '''
+a = match 2 { 1: 'one', 2, 3: 'two', else: 'other' }
+b = match 5 { 1: 'one', else: 'other' }
+c = match 1 { x: 'x', 1: 'one' }
+'''
+
+S_CHAINED_COMPARE = '''
+x = 3
+a = 3 < 2 < 3
+b = 1 < 3 < 2
+c = 1 < 2 < x
+'''
+
+
+class TestASTOptimizer(TestCase):
+    def test_constant_folding(self):
+        tree = _optimize(S_FOLD)
+        values = [stmt.right.value for stmt in tree.stmts[:5]]
+
+        self.assertEqual(values, ['86400', 'abb', '64', 'true', '-5'])
+
+        f = tree.stmts[5].right  # (x + 1) + 2, can not be folded
+        self.assertIsInstance(f, ast.AddSubExprAST)
+        self.assertEqual(len(f.right), 2)
+
+    def test_dead_branch(self):
+        tree = _optimize(S_DEAD_BRANCH)
+
+        self.assertEqual(len(tree.stmts), 2)
+        self.assertEqual(tree.stmts[0].right.value, '2')
+
+        # the branch binds 'b' as a local name, keep it
+        func = tree.stmts[1]
+        self.assertIsInstance(func.block.stmts[0], ast.IfStmtAST)
+
+    def test_match(self):
+        tree = _optimize(S_MATCH)
+
+        self.assertEqual(tree.stmts[0].right.value, 'two')
+        self.assertEqual(tree.stmts[1].right.value, 'other')
+        self.assertIsInstance(tree.stmts[2].right, ast.MatchExpr)
+        self.assertEqual(len(tree.stmts[2].right.cases), 2)
+
+    def test_same_result(self):
+        for source in (S_FOLD.replace('x + ', '1 + '), S_DEAD_BRANCH, S_MATCH):
+            source = 'x = 0\n' + source
+            origin = _run(source, 0)
+            optimized = _run(source, 1)
+
+            for name in ('a', 'b', 'c', 'd', 'e'):
+                self.assertEqual(origin.get(name), optimized.get(name))
+
+    def test_chained_compare(self):
+        tree = _optimize(S_CHAINED_COMPARE)
+        for stmt in tree.stmts[1:]:
+            self.assertIsInstance(stmt.right.test, ast.CmpTestAST)
+            self.assertEqual(len(stmt.right.test.right), 2)
+
+        origin = _run(S_CHAINED_COMPARE, 0)
+        optimized = _run(S_CHAINED_COMPARE, 1)
+        for name in ('a', 'b', 'c'):
+            self.assertEqual(origin[name], optimized[name])
@@ -0,0 +1,114 @@
+import sys
+
+from unittest import TestCase, skipUnless
+
+from ail.core.acompile import Assembler, BasicBlock, Compiler, Instruction
+from ail.core.alex import Lex
+from ail.core.apeephole import (
+    PeepholeOptimizer, PEEPHOLE_ALL, PEEPHOLE_DEAD_CODE
+)
+from ail.core.aparser import Parser
+from ail.core.pyopcode import *
+
+
+S_MODULE = '''
+'doc'
+a = (1, 2)
+if a {
+    b = 1
+} else {
+    b = 2
+}
+'''
+
+S_RUN = '''
+fun f(a, b=(1, 2)) {
+    'doc'
+    if a {
+        return b
+        print 'dead'
+    }
+    while true {
+        if a == 0 {
+            break
+        }
+    }
+    return 0
+}
+'''
+
+
+def _compile(source: str, passes: int) -> Compiler:
+    ts = Lex().lex(source, '<test>')
+    compiler = Compiler(passes)
+    compiler.compile(
+        Parser().parse(ts, source, '<test>'), source, '<test>')
+    return compiler
+
+
+def _opcodes(block) -> list:
+    opcodes = []
+    while block is not None:
+        opcodes.extend(instr.opcode for instr in block.instructions)
+        block = block.next_block
+    return opcodes
+
+
+def _new_instr(opcode, arg=0, target=None) -> Instruction:
+    return Instruction(
+        opcode, arg, is_jabs=target is not None, target=target)
+
+
+class TestPeephole(TestCase):
+    def test_module(self):
+        origin = _compile(S_MODULE, 0)
+        compiler = _compile(S_MODULE, PEEPHOLE_ALL)
+
+        opcodes = _opcodes(compiler.unit.top_block)
+        self.assertLess(len(opcodes), len(_opcodes(origin.unit.top_block)))
+        self.assertNotIn(POP_TOP, opcodes)
+
+        name, before, after = compiler.peephole_stats[-1]
+        self.assertEqual(after, len(opcodes))
+        self.assertGreater(before, after)
+
+    def test_toggle(self):
+        compiler = _compile(S_MODULE, PEEPHOLE_DEAD_CODE)
+        self.assertIn(POP_TOP, _opcodes(compiler.unit.top_block))
+
+        compiler = _compile(S_MODULE, 0)
+        self.assertEqual(compiler.peephole_stats, [])
+
+    def test_jump_and_dead_code(self):
+        # b0: JUMP b2; b1: (unreachable) RETURN; b2: JUMP b3;
+        # b3: LOAD_CONST 300; RETURN; LOAD_CONST 0
+        blocks = [BasicBlock() for _ in range(4)]
+        for prev, block in zip(blocks, blocks[1:]):
+            prev.next_block = block
+
+        b0, b1, b2, b3 = blocks
+        b0.add_instruction(_new_instr(JUMP_ABSOLUTE, target=b2))
+        b1.add_instruction(_new_instr(RETURN_VALUE))
+        b2.add_instruction(_new_instr(JUMP_ABSOLUTE, target=b3))
+        b3.add_instruction(_new_instr(LOAD_CONST, 300))
+        b3.add_instruction(_new_instr(RETURN_VALUE))
+        b3.add_instruction(_new_instr(LOAD_CONST, 0))
+
+        before, after = PeepholeOptimizer().optimize(b0, [], None)
+
+        self.assertEqual((before, after), (6, 2))
+        self.assertIs(b0.next_block, b3)
+        self.assertEqual(
+            [(i.opcode, i.arg) for i in b3.instructions],
+            [(LOAD_CONST, 300), (RETURN_VALUE, 0)])
+
+    @skipUnless(sys.version_info[:2] == (3, 8), 'native compile mode')
+    def test_same_result(self):
+        for passes in (0, PEEPHOLE_ALL):
+            compiler = _compile(S_RUN, passes)
+            code = Assembler().assemble(compiler.unit.top_block, compiler)
+
+            ns = {}
+            exec(code, ns)
+            self.assertEqual(ns['f'](1), (1, 2))
+            self.assertEqual(ns['f'](0), 0)
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from ail.ail_main import _make_argv, parse_arg
+from ail.core.startup import format_startup_report, parse_import_time
+
+
+_IMPORT_TIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | io
+some output of the program
+import time:      1500 |       2000 |     ail.core.objects
+import time:       800 |       2800 |   ail.core
+'''
+
+
+class TestStartup(TestCase):
+    def test_parse_import_time(self):
+        imports = parse_import_time(_IMPORT_TIME.splitlines())
+
+        self.assertListEqual(imports, [
+            ('_io', 1, 120, 120),
+            ('io', 0, 300, 420),
+            ('ail.core.objects', 2, 1500, 2000),
+            ('ail.core', 1, 800, 2800),
+        ])
+
+        report = format_startup_report(imports, 0.01, top=2)
+        self.assertIn('(4 modules)', report)
+        self.assertIn('(2 modules)', report)
+        self.assertTrue(report.endswith('ail.core.objects'))
+
+    def test_parse_arg(self):
+        # the fast path of 'ail <file> [args]' parses like argparse
+        for argv in (['a.ail'], ['a.ail', '-O', 'x'], ['-O', 'a.ail', 'x'],
+                     ['--startup-profile', 'a.ail', '--lazy-import']):
+            opt = parse_arg(argv)
+            self.assertFalse(opt.shell_mode)
+            self.assertEqual(opt.filename, 'a.ail')
+            self.assertListEqual(opt.rest_args, argv[argv.index('a.ail') + 1:])
+
+        self.assertTrue(parse_arg(['-O', 'a.ail']).optimize)
+        self.assertFalse(parse_arg(['a.ail', '-O']).optimize)
+        self.assertTrue(parse_arg(['--startup-profile', 'a']).startup_profile)
+        self.assertFalse(parse_arg(['a.ail', '--lazy-import']).lazy_import)
+        self.assertTrue(parse_arg([]).shell_mode)
+
+    def test_profile_argv(self):
+        # argparse accepts the abbreviations of --startup-profile
+        for argv in (['--startup-profile', '-O', 'a.ail', 'x', '-n'],
+                     ['-O', '--startup-prof', 'a.ail', 'x', '-n']):
+            opt = parse_arg(argv)
+            self.assertTrue(opt.startup_profile)
+            self.assertListEqual(_make_argv(opt), ['-O', 'a.ail', 'x', '-n'])
+
+        self.assertListEqual(
+            _make_argv(parse_arg(['--startup', '--lazy-import'])),
+            ['--lazy-import'])
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from ail.core import asts as ast
+from ail.core.alex import Lex
+from ail.core.aparser import Parser
+
+
+def _parse(source: str) -> list:
+    tree = Parser().parse(Lex().lex(source, '<test>'), source, '<test>')
+    return [s for s in tree.stmts
+            if not isinstance(s, (ast.NullLineAST, ast.EOFAST))]
+
+
+class TestStmtDispatch(TestCase):
+    def test_keywords(self):
+        cases = [
+            ('print 1\n', ast.PrintStmtAST),
+            ('if 1 { a = 1\n}\n', ast.IfStmtAST),
+            ('while 1 { break\n}\n', ast.WhileStmtAST),
+            ('fun f() { return 1\n}\n', ast.FunctionDefineAST),
+            ('func f() { }\n', ast.FunctionDefineAST),
+            ('class A { init() { } }\n', ast.ClassDefineAST),
+            ('throw 1\n', ast.ThrowStmtAST),
+            ('import \'x\'\n', ast.ImportStmtAST),
+            ('not a\n', ast.TestExprAST),
+        ]
+
+        for source, node_type in cases:
+            stmts = _parse(source)
+            self.assertEqual(len(stmts), 1, source)
+            self.assertIsInstance(stmts[0], node_type, source)
+
+    def test_outside(self):
+        for source in ('continue\n', 'break\n', 'return\n',
+                       'global a\n', 'nonlocal a\n', 'then\n', 'end\n'):
+            self.assertRaises(SyntaxError, _parse, source)
+
+    def test_class_body(self):
+        # the special method names are only keywords in a class body
+        stmts = _parse('class A {\n    new() { }\n}\nnew()\n')
+        body = [s for s in stmts[0].func.block.stmts
+                if isinstance(s, ast.FunctionDefineAST)]
+
+        self.assertEqual(body[-1].name, '__new__')
+        self.assertIsInstance(stmts[1], ast.CallExprAST)
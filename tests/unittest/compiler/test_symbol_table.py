@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from ail.core.symbol import (
+    symtable, SYM_FREE, SYM_GLOBAL, SYM_LOCAL
+)
+
+
+S_SCOPE = '''
+a = 1
+b = 2
+
+fun f(x) {
+    y = x + a
+    fun g() {
+        fun h() {
+            return y + b
+        }
+        return h
+    }
+    return g
+}
+
+a = 3
+'''
+
+
+class TestSymbolTable(TestCase):
+    def test_order(self):
+        tab = symtable(S_SCOPE, '<test>')
+
+        self.assertEqual(
+            [s.name for s in tab.store_symbols], ['f', 'b', 'a'])
+
+    def test_scope(self):
+        tab = symtable(S_SCOPE, '<test>')
+        f = tab.store_symbols[0].namespace
+        g = f.store_symbols[0].namespace
+        h = g.store_symbols[0].namespace
+
+        self.assertEqual(f.cellvars, {'y'})
+        self.assertEqual(g.freevars, {'y'})
+        self.assertEqual(h.freevars, {'y'})
+        self.assertTrue(f.get_symbol('a').flag & SYM_GLOBAL)
+        self.assertTrue(f.get_symbol('x').flag & SYM_LOCAL)
+        self.assertTrue(h.get_symbol('y').flag & SYM_FREE)
+        self.assertTrue(h.get_symbol('b').flag & SYM_GLOBAL)
+        self.assertIsNone(h.get_symbol('a'))
+
+    def test_wide_module(self):
+        source = ''.join(
+            'a%d = %d\nfun f%d(x) {\n    return x + a%d\n}\n' % (i, i, i, i)
+            for i in range(500))
+        tab = symtable(source, '<test>')
+
+        self.assertEqual(len(tab.store_symbols), 1000)
+
+        sym = tab.store_symbols[0]
+        self.assertEqual(sym.name, 'f499')
+        self.assertTrue(sym.namespace.get_symbol('a499').flag & SYM_GLOBAL)